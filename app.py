@@ -1,17 +1,51 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+import base64
+import binascii
+import click
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, g, Response, stream_with_context, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
-from functools import wraps
+from werkzeug.utils import safe_join
+from functools import wraps, partial
 import re
 from difflib import SequenceMatcher
 import json
-from collections import Counter
+from collections import Counter, OrderedDict, defaultdict
 import math
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import sqlite3
+import threading
+import time
+import zlib
+import itertools
+import hashlib
+import tempfile
+import gzip
+import mimetypes
+import queue
+import multiprocessing
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+from database_backup import create_backup, backup_files
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional - SmartMatcher.score_many falls back to pure Python
+    np = None
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional - uploads are then served without resized variants
+    Image = None
+
+try:
+    import brotli
+except ImportError:  # brotli is optional - static assets are then precompressed with gzip only
+    brotli = None
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
@@ -38,6 +72,80 @@ if not os.path.exists(os.path.dirname(DATABASE_PATH)):
 app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{DATABASE_PATH}'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# SQLite engine profile, applied to every new connection (see SQLITE_PROFILES)
+app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'wal')
+app.config['SQLITE_PRAGMAS'] = {}  # Per-pragma overrides on top of the profile
+
+# Pragmas per profile, applied in order. busy_timeout comes first so the others
+# wait for locks instead of failing while another worker holds the database.
+SQLITE_PROFILES = {
+    # Rollback journal with the driver defaults - how the app ran before profiles existed
+    'legacy': {
+        'journal_mode': 'DELETE'
+    },
+    # Readers never block the writer; NORMAL sync is safe in WAL mode (a crash may only lose the last commits)
+    'wal': {
+        'busy_timeout': 5000,  # ms
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -20000,  # Negative means KiB, so about 20 MB per connection
+        'mmap_size': 134217728,  # 128 MB
+        'temp_store': 'MEMORY'
+    },
+    # WAL with an fsync on every commit
+    'durable': {
+        'busy_timeout': 10000,
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -20000,
+        'mmap_size': 134217728,
+        'temp_store': 'MEMORY'
+    }
+}
+SQLITE_DIAGNOSTIC_PRAGMAS = ['journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout',
+                             'page_size', 'page_count', 'freelist_count', 'wal_autocheckpoint']
+
+# Smart matching configuration
+app.config['MATCH_INDEX_ENABLED'] = True  # Use the keyword/trigram index to pick candidates
+app.config['IMAGE_MATCH_WEIGHT'] = 0.15  # Share of the match score given to photo similarity when both items have a photo
+app.config['IMAGE_HASH_MAX_DISTANCE'] = 10  # Differing bits (of 64) at which two photos still count as near-duplicates
+# /api/matches: 'recompute' runs find_matches, 'persisted' serves the stored ItemMatch rows
+app.config['MATCH_RESULTS_SOURCE'] = os.environ.get('MATCH_RESULTS_SOURCE', 'recompute')
+app.config['MATCH_CACHE_SIZE'] = 1024  # Items whose /api/matches results each process keeps (LRU); 0 turns the cache off
+
+# Search configuration
+app.config['SEARCH_BACKEND'] = os.environ.get('SEARCH_BACKEND', 'fts')  # 'fts' (SQLite FTS5 when available) or 'like'
+app.config['FTS_AVAILABLE'] = False  # Set on the first request (or by init-db) once the item_fts table is ready
+app.config['API_SEARCH_PAGE_SIZE'] = 50  # Default page size for /api/search
+app.config['API_SEARCH_MAX_PAGE_SIZE'] = 200
+app.config['ITEMS_PER_PAGE'] = 24  # Default page size for the public /items listing
+app.config['ITEMS_MAX_PER_PAGE'] = 96
+
+# Background job configuration
+# 'thread' runs jobs on a worker thread after the response is sent, 'eager' runs them inline (tests)
+app.config['JOB_QUEUE_MODE'] = os.environ.get('JOB_QUEUE_MODE', 'thread')
+app.config['JOB_POLL_INTERVAL'] = 2.0  # Seconds between queue polls when idle
+app.config['JOB_MAX_ATTEMPTS'] = 3
+app.config['JOB_RETRY_DELAY'] = timedelta(seconds=30)  # Wait before retrying a failed job, doubled per attempt
+app.config['JOB_STALE_AFTER'] = timedelta(minutes=10)  # Running jobs older than this are retried
+app.config['ANALYTICS_SNAPSHOT_INTERVAL'] = 300  # Seconds between background analytics snapshots
+
+# Write queue configuration
+# 'group' applies submitted writes on one writer thread per process, many per commit; 'direct' commits each inline
+app.config['WRITE_QUEUE_MODE'] = os.environ.get('WRITE_QUEUE_MODE', 'group')
+app.config['WRITE_BATCH_WINDOW'] = 0.005  # Seconds the writer waits for more work before committing a batch
+app.config['WRITE_BATCH_MAX'] = 200  # Max units of work per commit
+
+# Notifications
+# Seconds of admin match/claim events folded into one rolling digest per admin; 0 sends one notification per event
+app.config['NOTIFICATION_DIGEST_WINDOW'] = int(os.environ.get('NOTIFICATION_DIGEST_WINDOW', 0))
+app.config['NOTIFICATION_RETENTION'] = timedelta(days=30)  # Read notifications older than this are pruned
+app.config['NOTIFICATION_PRUNE_INTERVAL'] = 3600  # Seconds between background prune runs
+app.config['NOTIFICATION_PRUNE_BATCH'] = 500  # Rows deleted per transaction, so the write lock is held briefly
+
+# Seconds a process serves its cached SystemInfo before re-checking SystemInfo.updated_at
+app.config['SYSTEM_INFO_CACHE_TTL'] = 30
+
 # Ensure the database directory exists with better error handling
 try:
     db_dir = os.path.dirname(DATABASE_PATH)
@@ -51,10 +159,29 @@ except Exception as e:
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{DATABASE_PATH}'
     print(f"🔄 Fallback database path: {DATABASE_PATH}")
 
-print(f"🗄️ Database path: {DATABASE_PATH}")
+# Create and seed a database that has no tables on the first request; deploys run 'flask init-db' and 'flask seed'
+app.config['AUTO_INIT_DB'] = os.environ.get('AUTO_INIT_DB', '1') == '1'
+
+# Online backups (SQLite backup API, see database_backup.py), taken by the background worker or 'flask backup-db'
+app.config['BACKUP_DIR'] = os.environ.get('BACKUP_DIR') or os.path.join(os.path.dirname(DATABASE_PATH) or '.', 'backups')
+app.config['BACKUP_INTERVAL'] = int(os.environ.get('BACKUP_INTERVAL', 24 * 3600))  # Seconds between backups; 0 turns them off
+app.config['BACKUP_KEEP'] = int(os.environ.get('BACKUP_KEEP', 7))  # Newest backups retained
+app.config['BACKUP_COMPRESS'] = True  # gzip the backup while writing it
+app.config['BACKUP_PAGES_PER_STEP'] = 256  # Pages copied per step; writers get the lock between steps
 
 # Upload folder configuration
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
+app.config['ALLOWED_IMAGE_EXTENSIONS'] = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+# Largest accepted request body; bigger uploads get a 413 before any of it is stored
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_UPLOAD_MB', 16)) * 1024 * 1024
+app.config['UPLOAD_GC_GRACE'] = timedelta(hours=1)  # Unreferenced blobs younger than this are kept
+# Resized copies made for every upload: name -> max width in pixels, each saved as WebP and JPEG
+app.config['IMAGE_VARIANTS'] = {'thumb': 400, 'card': 800, 'full': 1600}
+app.config['IMAGE_WEBP_QUALITY'] = 78
+app.config['IMAGE_JPEG_QUALITY'] = 82
+# Static assets: URLs carry ?v=<content hash> so browsers may cache them for a year without revalidating
+app.config['STATIC_IMMUTABLE_MAX_AGE'] = 365 * 24 * 3600
+app.config['STATIC_COMPRESS_EXTENSIONS'] = {'css', 'js', 'svg', 'json', 'txt', 'map', 'html'}  # Precompressed by build-static
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
@@ -63,6 +190,26 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
+@db.event.listens_for(Engine, 'connect')
+def apply_sqlite_profile(dbapi_connection, connection_record):
+    """Apply the configured SQLITE_PROFILE pragmas to each new SQLite connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    pragmas = dict(SQLITE_PROFILES.get(app.config['SQLITE_PROFILE'], SQLITE_PROFILES['wal']))
+    pragmas.update(app.config['SQLITE_PRAGMAS'])
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        try:
+            cursor.execute(f'PRAGMA {name} = {value}')
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not set PRAGMA {name} = {value}: {e}")
+    cursor.close()
+
+def sqlite_settings():
+    """Effective pragma values of a pooled connection, for the diagnostics page"""
+    connection = db.session.connection()
+    return {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in SQLITE_DIAGNOSTIC_PRAGMAS}
+
 # Enhanced Database Models
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -91,6 +238,8 @@ class Item(db.Model):
     location = db.Column(db.String(200))
     contact_info = db.Column(db.String(200))
     image_path = db.Column(db.String(500))
+    image_variants = db.Column(db.Text)  # JSON: {name: {'width', 'height', 'webp', 'jpeg'}} paths under static/
+    image_hash = db.Column(db.String(16))  # 64-bit perceptual hash (dHash) of the photo as hex, set by the image_variants job
     is_approved = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -113,9 +262,17 @@ class Item(db.Model):
     claim_proof = db.Column(db.Text)  # Description of proof provided
     claim_notes = db.Column(db.Text)  # Admin notes about the claim
     
-    # Matching fields
-    matched_items = db.relationship('ItemMatch', foreign_keys='ItemMatch.item1_id', backref='item1')
-    matched_with = db.relationship('ItemMatch', foreign_keys='ItemMatch.item2_id', backref='item2')
+    # Matching fields (a deleted item takes its matches with it)
+    matched_items = db.relationship('ItemMatch', foreign_keys='ItemMatch.item1_id', backref='item1', cascade='all, delete-orphan')
+    matched_with = db.relationship('ItemMatch', foreign_keys='ItemMatch.item2_id', backref='item2', cascade='all, delete-orphan')
+    
+    # Existing databases get these from migrate_db.py
+    __table_args__ = (
+        db.Index('ix_item_public_listing', 'is_approved', 'status', 'created_at'),  # Home, /items, /api/search
+        db.Index('ix_item_category_status', 'category_id', 'status'),  # Category filter and sidebar counts
+        db.Index('ix_item_status_created', 'status', 'created_at'),  # Admin item list, brute-force matching
+        db.Index('ix_item_created_at', 'created_at'),  # Newest-first listings and keyset pagination
+    )
 
 class ItemMatch(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -125,16 +282,29 @@ class ItemMatch(db.Model):
     match_type = db.Column(db.String(50))  # exact, similar, potential
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_notified = db.Column(db.Boolean, default=False)
+    
+    __table_args__ = (
+        db.Index('ix_item_match_item1_score', 'item1_id', 'similarity_score'),
+        db.Index('ix_item_match_item2_score', 'item2_id', 'similarity_score'),
+        db.Index('ix_item_match_score', 'similarity_score'),
+    )
 
 class Notification(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     message = db.Column(db.Text, nullable=False)
-    type = db.Column(db.String(50))  # match, system, alert
+    type = db.Column(db.String(50))  # match, system, alert, digest
     is_read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    digest_key = db.Column(db.String(50))  # Set on rolling digests, which collect events until read or the window ends
+    event_count = db.Column(db.Integer, default=1)  # Events folded into this notification
     user = db.relationship('User', backref='notifications')
+    
+    __table_args__ = (
+        db.Index('ix_notification_user_read', 'user_id', 'is_read', 'created_at'),
+        db.Index('ix_notification_created_at', 'created_at'),
+    )
 
 class Message(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -164,6 +334,10 @@ class Analytics(db.Model):
     matches_found = db.Column(db.Integer, default=0)
     new_users = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_analytics_date', 'date'),
+    )
 
 class Claim(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -182,9 +356,147 @@ class Claim(db.Model):
     # Relationships
     item = db.relationship('Item', backref='claims')
     admin_user = db.relationship('User', backref='processed_claims')
+    
+    __table_args__ = (
+        db.Index('ix_claim_status_created', 'status', 'created_at'),
+        db.Index('ix_claim_created_at', 'created_at'),
+        db.Index('ix_claim_item_id', 'item_id'),
+    )
+
+class BackgroundJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # match_item, ...
+    payload = db.Column(db.Text)  # JSON arguments for the handler
+    status = db.Column(db.String(20), default='pending', index=True)  # pending, running, done, failed
+    attempts = db.Column(db.Integer, default=0)
+    run_after = db.Column(db.DateTime)  # Failed jobs are not retried before this time
+    result = db.Column(db.Text)  # JSON result of the last successful run
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'payload': json.loads(self.payload or '{}'),
+            'status': self.status,
+            'attempts': self.attempts,
+            'run_after': self.run_after.isoformat() if self.run_after else None,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class ItemFeatures(db.Model):
+    """Precomputed smart matching features for an item, rebuilt when SmartMatcher.FEATURE_VERSION changes"""
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, index=True)
+    title = db.Column(db.Text)  # Normalized (lowercased) title
+    description = db.Column(db.Text)  # Normalized description
+    location = db.Column(db.Text)  # Normalized location
+    keywords = db.Column(db.Text)  # Comma-separated distinct keywords of title + description
+    title_grams = db.Column(db.Text)  # Comma-separated title trigrams
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ItemToken(db.Model):
+    """Inverted index for smart matching: one row per (token, item) pair"""
+    token = db.Column(db.String(100), primary_key=True)  # k:<keyword> or t:<title trigram>
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), primary_key=True, index=True)
+
+class ItemImageHash(db.Model):
+    """Multi-index hash table for near-duplicate photos: Item.image_hash split into IMAGE_HASH_CHUNKS 16-bit chunks"""
+    item_id = db.Column(db.Integer, db.ForeignKey('item.id'), primary_key=True)
+    chunk = db.Column(db.Integer, primary_key=True)  # 0 is the most significant chunk
+    value = db.Column(db.Integer, nullable=False)
+    __table_args__ = (db.Index('ix_item_image_hash_chunk_value', 'chunk', 'value'),)
+
+class UploadBlob(db.Model):
+    """A content-addressed upload under static/uploads/blobs, reference-counted by Item.image_path"""
+    sha256 = db.Column(db.String(64), primary_key=True)
+    path = db.Column(db.String(500), nullable=False)  # uploads/blobs/ab/cd/<sha256>.<ext>, relative to static/
+    size = db.Column(db.Integer)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # Last reference change
+
+class StatCounter(db.Model):
+    """Materialized row counts for the dashboards, maintained by count_rows_after_flush"""
+    name = db.Column(db.String(100), primary_key=True)  # items.total, items.status.found, messages.is_read.0, ...
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class RematchRun(db.Model):
+    """Progress of a 'flask rematch-all' run; an interrupted run resumes after its last stored chunk"""
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), default='running')  # running, done, abandoned
+    threshold = db.Column(db.Float, nullable=False)
+    last_item_id = db.Column(db.Integer, default=0)  # Lost items up to this id are done
+    lost_done = db.Column(db.Integer, default=0)
+    pairs_scored = db.Column(db.Integer, default=0)  # Lost x found pairs considered
+    exact_scored = db.Column(db.Integer, default=0)  # Pairs whose upper bound reached the threshold
+    matches_stored = db.Column(db.Integer, default=0)
+    seconds = db.Column(db.Float, default=0.0)  # Time spent scoring and storing, over all resumes
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
 
 # Smart Matching Algorithm
+# Common words ignored when extracting keywords
+STOP_WORDS = frozenset({'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them'})
+
+IMAGE_HASH_CHUNKS = 4
+
+def image_dhash(image, size=8):
+    """64-bit difference hash of a PIL image as hex: one bit per horizontally adjacent pixel pair of a 9x8 grayscale thumbnail"""
+    pixels = list(image.convert('L').resize((size + 1, size), Image.LANCZOS).getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (size + 1) + col + 1])
+    return format(bits, '016x')
+
+def hamming_distance(hash1, hash2):
+    """Number of differing bits between two hex image hashes"""
+    return (int(hash1, 16) ^ int(hash2, 16)).bit_count()
+
+def hash_chunks(image_hash):
+    """The IMAGE_HASH_CHUNKS 16-bit chunks of a hex image hash, most significant first"""
+    value = int(image_hash, 16)
+    return [(value >> (16 * (IMAGE_HASH_CHUNKS - 1 - chunk))) & 0xFFFF for chunk in range(IMAGE_HASH_CHUNKS)]
+
+def chunk_neighbors(value, radius):
+    """Every 16-bit value at most radius bit flips away from value"""
+    values = [value]
+    for distance in range(1, radius + 1):
+        for bits in itertools.combinations(range(16), distance):
+            values.append(value ^ sum(1 << bit for bit in bits))
+    return values
+
+class MatchFeatures:
+    """Normalized text and keyword set of one item, as used in the matching hot loop"""
+    __slots__ = ('title', 'description', 'location', 'keywords')
+    
+    def __init__(self, title, description, location, keywords):
+        self.title = title
+        self.description = description
+        self.location = location
+        self.keywords = keywords
+    
+    @classmethod
+    def from_record(cls, record):
+        keywords = frozenset(record.keywords.split(',')) if record.keywords else frozenset()
+        return cls(record.title or '', record.description or '', record.location or '', keywords)
+
 class SmartMatcher:
+    FEATURE_VERSION = 1  # Bump whenever extract_keywords or text normalization changes
+    CHAR_BINS = 128  # Size of the hashed character histograms used by score_many
+    TEXT_WEIGHTS = (('title', 0.3), ('description', 0.2), ('location', 0.1))
+    PRUNE_ORDER = (0, 2, 1)  # Exact ratios by weight per cost: title, location, then the long description
+    
     def __init__(self):
         self.keywords_weight = 0.4
         self.category_weight = 0.2
@@ -196,135 +508,1736 @@ class SmartMatcher:
         if not text:
             return []
         
-        # Remove common words and extract meaningful terms
-        common_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them'}
-        
         # Clean text and extract words
         text = re.sub(r'[^\w\s]', ' ', text.lower())
         words = text.split()
         
         # Filter out common words and short words
-        keywords = [word for word in words if word not in common_words and len(word) > 2]
+        keywords = [word for word in words if word not in STOP_WORDS and len(word) > 2]
         
         return keywords
     
-    def calculate_similarity(self, item1, item2):
-        """Calculate similarity score between two items"""
-        score = 0.0
-        
-        # Title similarity
-        if item1.title and item2.title:
-            title_similarity = SequenceMatcher(None, item1.title.lower(), item2.title.lower()).ratio()
-            score += title_similarity * 0.3
+    def title_trigrams(self, title):
+        """Character trigrams of a title (padded so very short titles still produce some)"""
+        title = ' ' + re.sub(r'[^\w]+', ' ', (title or '').lower()).strip() + ' '
+        return {title[i:i + 3] for i in range(len(title) - 2)}
+    
+    def build_features(self, item):
+        """Compute matching features for an item from its current text"""
+        return MatchFeatures(
+            (item.title or '').lower(),
+            (item.description or '').lower(),
+            (item.location or '').lower(),
+            frozenset(self.extract_keywords((item.title or '') + ' ' + (item.description or '')))
+        )
+    
+    def feature_record(self, item):
+        """Column values of the persisted ItemFeatures row for an item"""
+        features = self.build_features(item)
+        return {
+            'item_id': item.id,
+            'version': self.FEATURE_VERSION,
+            'title': features.title,
+            'description': features.description,
+            'location': features.location,
+            'keywords': ','.join(sorted(features.keywords)),
+            'title_grams': ','.join(sorted(self.title_trigrams(item.title))),
+            'updated_at': datetime.utcnow()
+        }
+    
+    def load_features(self, items, chunk_size=900):
+        """Features for many items: stored records in bulk, computed on the fly if missing or stale"""
+        ids = [item.id for item in items if item.id is not None]
+        stored = {}
+        for start in range(0, len(ids), chunk_size):
+            records = ItemFeatures.query.filter(
+                ItemFeatures.item_id.in_(ids[start:start + chunk_size]),
+                ItemFeatures.version == self.FEATURE_VERSION
+            ).all()
+            stored.update((record.item_id, MatchFeatures.from_record(record)) for record in records)
+        return [stored.get(item.id) or self.build_features(item) for item in items]
+    
+    def calculate_similarity(self, item1, item2, features1=None, features2=None, threshold=None):
+        """Calculate similarity score between two items.
         
-        # Description similarity
-        if item1.description and item2.description:
-            desc_similarity = SequenceMatcher(None, item1.description.lower(), item2.description.lower()).ratio()
-            score += desc_similarity * 0.2
+        With a threshold, the SequenceMatcher ratios (the expensive part) are only
+        computed while the pair can still reach it: category and keywords are scored
+        first, each text field starts at its length bound (real_quick_ratio), then
+        quick_ratio, then ratio, and None is returned as soon as the best achievable
+        score drops below the threshold. Pairs that are not pruned get exactly the
+        score they get without a threshold.
+        """
+        features1 = features1 or self.build_features(item1)
+        features2 = features2 or self.build_features(item2)
         
         # Category match
-        if item1.category_id == item2.category_id:
-            score += 0.2
-        
-        # Location similarity
-        if item1.location and item2.location:
-            location_similarity = SequenceMatcher(None, item1.location.lower(), item2.location.lower()).ratio()
-            score += location_similarity * 0.1
+        category_similarity = 0.2 if item1.category_id == item2.category_id else 0.0
         
         # Keywords similarity
-        keywords1 = self.extract_keywords(item1.title + ' ' + (item1.description or ''))
-        keywords2 = self.extract_keywords(item2.title + ' ' + (item2.description or ''))
-        
+        keywords1 = features1.keywords
+        keywords2 = features2.keywords
+        keyword_similarity = 0.0
         if keywords1 and keywords2:
-            common_keywords = set(keywords1) & set(keywords2)
-            total_keywords = set(keywords1) | set(keywords2)
-            if total_keywords:
-                keyword_similarity = len(common_keywords) / len(total_keywords)
-                score += keyword_similarity * 0.2
+            keyword_similarity = len(keywords1 & keywords2) / len(keywords1 | keywords2)
+        
+        # Title, description and location similarity
+        texts = [(getattr(features1, field), getattr(features2, field)) for field, weight in self.TEXT_WEIGHTS]
+        if threshold is None:
+            ratios = [SequenceMatcher(None, a, b).ratio() if a and b else 0.0 for a, b in texts]
+        else:
+            ratios = self._bounded_ratios(texts, category_similarity + keyword_similarity * 0.2,
+                                          self.image_similarity(item1, item2), threshold)
+            if ratios is None:
+                return None
+        title_similarity, desc_similarity, location_similarity = ratios
+        
+        score = title_similarity * 0.3
+        score += desc_similarity * 0.2
+        score += category_similarity
+        score += location_similarity * 0.1
+        score += keyword_similarity * 0.2
+        return self.blend_image_score(min(score, 1.0), self.image_similarity(item1, item2))
+    
+    def _bounded_ratios(self, texts, known, image_similarity, threshold):
+        """Exact text ratios for calculate_similarity, or None once the pair provably cannot reach threshold"""
+        weights = [weight for field, weight in self.TEXT_WEIGHTS]
+        # real_quick_ratio() without building a SequenceMatcher: 2 * shorter / total length
+        bounds = [2.0 * min(len(a), len(b)) / (len(a) + len(b)) if a and b else 0.0 for a, b in texts]
+        
+        def reachable():
+            best = known + sum(bound * weight for bound, weight in zip(bounds, weights))
+            return self.blend_image_score(min(best, 1.0), image_similarity) >= threshold - 1e-9
+        
+        if not reachable():
+            return None
+        # Tighten the cheap bounds for every field first, then pay for the exact ratios in PRUNE_ORDER
+        matchers = {}
+        for ratio in ('quick_ratio', 'ratio'):
+            for index in self.PRUNE_ORDER:
+                if not bounds[index]:
+                    continue
+                if index not in matchers:
+                    matchers[index] = SequenceMatcher(None, *texts[index])
+                bounds[index] = getattr(matchers[index], ratio)()
+                if not reachable():
+                    return None
+        return bounds
+    
+    def image_similarity(self, item1, item2):
+        """1.0 for identical photo hashes down to 0.0 at 32 differing bits (unrelated photos); None unless both have a photo"""
+        if not item1.image_hash or not item2.image_hash:
+            return None
+        return max(0.0, 1.0 - hamming_distance(item1.image_hash, item2.image_hash) / 32.0)
+    
+    def blend_image_score(self, score, image_similarity):
+        """Mix photo similarity into a text score with weight IMAGE_MATCH_WEIGHT; items without photos keep their score"""
+        weight = app.config['IMAGE_MATCH_WEIGHT']
+        if image_similarity is None or not weight:
+            return score
+        return score * (1.0 - weight) + image_similarity * weight
+    
+    def _feature_arrays(self, features, category_ids):
+        """Stack features into NumPy arrays (one row per item), plus an inverted index of their keywords"""
+        size = len(features)
+        hists = np.zeros((3, size, self.CHAR_BINS), dtype=np.int32)
+        lengths = np.zeros((3, size), dtype=np.int32)
+        keyword_rows = defaultdict(list)
+        keyword_counts = np.zeros(size, dtype=np.int32)
+        categories = np.full(size, -1, dtype=np.int64)
+        for row, feature in enumerate(features):
+            for field, text in enumerate((feature.title, feature.description, feature.location)):
+                if text:
+                    codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32) % self.CHAR_BINS
+                    hists[field, row] = np.bincount(codes, minlength=self.CHAR_BINS)
+                    lengths[field, row] = len(text)
+            for word in feature.keywords:
+                keyword_rows[word].append(row)
+            keyword_counts[row] = len(feature.keywords)
+            if category_ids[row] is not None:
+                categories[row] = int(category_ids[row])
+        keyword_rows = {word: np.array(rows, dtype=np.int64) for word, rows in keyword_rows.items()}
+        return hists, lengths, (keyword_rows, keyword_counts), categories
+    
+    def score_many(self, item, candidates, features=None, target=None, arrays=None):
+        """Score item against many candidates in one vectorized pass.
+        
+        Uses the same 0.3/0.2/0.2/0.1/0.2 weighting as calculate_similarity, but
+        replaces each SequenceMatcher.ratio() with its quick_ratio() upper bound
+        (character multiset overlap, counted on hashed character bins; merging
+        bins can only add common characters). Category and keyword Jaccard are
+        exact, the latter through an inverted index of the candidates' keywords.
+        So the result is never below calculate_similarity for the same pair
+        (tolerance is one-sided: 0 below, about 0.1 above on average, under 0.3
+        on our synthetic corpus). Photo similarity is blended in exactly, which
+        keeps the bound.
+        find_matches uses it to discard candidates that cannot reach the
+        threshold before running the exact comparison. arrays, from
+        candidate_arrays(), saves rebuilding the candidate side on every call.
+        """
+        if not candidates:
+            return []
+        features = features or self.load_features(candidates)
+        target = target or self.build_features(item)
+        if np is None:
+            scores = self._score_many_python(item, candidates, features, target)
+        else:
+            scores = self._score_many_numpy(item, candidates, features, target, arrays)
+        return [self.blend_image_score(score, self.image_similarity(item, candidate))
+                for score, candidate in zip(scores, candidates)]
+    
+    def candidate_arrays(self, candidates, features):
+        """Candidate side of score_many, for scoring many items against the same candidates; None without numpy"""
+        if np is None:
+            return None
+        return self._feature_arrays(features, [c.category_id for c in candidates])
+    
+    def _score_many_numpy(self, item, candidates, features, target, arrays=None):
+        """Text part of score_many as array operations"""
+        hists, lengths, (keyword_rows, keyword_counts), categories = arrays or self.candidate_arrays(candidates, features)
+        t_hists, t_lengths, _, t_categories = self._feature_arrays([target], [item.category_id])
+        
+        # quick_ratio per text field: 2 * |common chars| / (len1 + len2), 0 if either side is empty
+        common = np.minimum(hists, t_hists).sum(axis=2)
+        totals = lengths + t_lengths
+        both = (lengths > 0) & (t_lengths > 0)
+        ratios = np.where(both, 2.0 * common / np.maximum(totals, 1), 0.0)
+        
+        # Exact keyword Jaccard: count the target's keywords in each candidate through the inverted index
+        intersection = np.zeros(len(keyword_counts), dtype=np.int32)
+        for word in target.keywords:
+            if word in keyword_rows:
+                intersection[keyword_rows[word]] += 1
+        union = keyword_counts + len(target.keywords) - intersection
+        has_keywords = (keyword_counts > 0) & bool(target.keywords)
+        jaccard = np.where(has_keywords, intersection / np.maximum(union, 1), 0.0)
         
-        return min(score, 1.0)
+        scores = (ratios[0] * 0.3 + ratios[1] * 0.2 + (categories == t_categories) * 0.2
+                  + ratios[2] * 0.1 + jaccard * 0.2)
+        return np.minimum(scores, 1.0).tolist()
+    
+    def _score_many_python(self, item, candidates, features=None, target=None):
+        """Pure Python version of score_many for installs without numpy"""
+        features = features or self.load_features(candidates)
+        target = target or self.build_features(item)
+        target_texts = (target.title, target.description, target.location)
+        target_counts = [Counter(text) for text in target_texts]
+        scores = []
+        for candidate, feature in zip(candidates, features):
+            score = 0.2 if str(candidate.category_id) == str(item.category_id) else 0.0
+            texts = (feature.title, feature.description, feature.location)
+            for weight, text, t_text, t_counts in zip((0.3, 0.2, 0.1), texts, target_texts, target_counts):
+                if text and t_text:
+                    score += weight * 2.0 * sum((Counter(text) & t_counts).values()) / (len(text) + len(t_text))
+            if feature.keywords and target.keywords:
+                union = feature.keywords | target.keywords
+                score += 0.2 * len(feature.keywords & target.keywords) / len(union)
+            scores.append(min(score, 1.0))
+        return scores
+    
+    def index_tokens(self, item):
+        """Tokens stored in the inverted index for an item (keywords plus title trigrams)"""
+        if item.keywords:
+            keywords = item.keywords.split(',')
+        else:
+            keywords = self.extract_keywords((item.title or '') + ' ' + (item.description or ''))
+        tokens = {f'k:{word[:98]}' for word in keywords if word}
+        tokens.update(f't:{gram}' for gram in self.title_trigrams(item.title))
+        return tokens
     
-    def find_matches(self, item, threshold=0.6):
-        """Find potential matches for an item"""
-        matches = []
+    def similar_image_ids(self, item, status, max_distance=None, approved_only=True):
+        """Ids of (approved) items with the given status whose photo hash is within max_distance bits of item's.
         
+        Two hashes within max_distance bits agree to within max_distance // IMAGE_HASH_CHUNKS
+        bits on at least one chunk, so only those chunk values are looked up in item_image_hash
+        and the candidates are then checked on the full hash.
+        """
+        if not item.image_hash:
+            return []
+        if max_distance is None:
+            max_distance = app.config['IMAGE_HASH_MAX_DISTANCE']
+        radius = max_distance // IMAGE_HASH_CHUNKS
+        # One index search per chunk; the item filters run on the few ids found rather than the other way round
+        lookups = [db.select(ItemImageHash.item_id).where(ItemImageHash.chunk == chunk,
+                                                          ItemImageHash.value.in_(chunk_neighbors(value, radius)))
+                   for chunk, value in enumerate(hash_chunks(item.image_hash))]
+        ids = [row.item_id for row in db.session.execute(db.union(*lookups)) if row.item_id != item.id]
+        distances = {}
+        for start in range(0, len(ids), 900):
+            rows = db.session.query(Item.id, Item.image_hash).filter(
+                Item.id.in_(ids[start:start + 900]),
+                Item.image_hash.isnot(None),
+                Item.status == status
+            )
+            if approved_only:
+                rows = rows.filter(Item.is_approved == True)
+            distances.update((row.id, hamming_distance(item.image_hash, row.image_hash)) for row in rows)
+        return sorted((i for i, distance in distances.items() if distance <= max_distance), key=lambda i: (distances[i], i))
+    
+    def candidate_ids(self, item, status, approved_only=True, threshold=0.6):
+        """Ids of (approved) items with the given status sharing index tokens with item and able to reach threshold.
+        
+        Of the items sharing a token, those whose best possible calculate_similarity
+        is below threshold are left out, so a token shared with thousands of items no
+        longer makes all of them candidates. The best possible score is exact for the
+        category, takes s / n for the keyword Jaccard (s of item's n keywords shared)
+        and each text ratio at its length bound, 2 * shorter / total length, the
+        real_quick_ratio() that _bounded_ratios starts from. Photos within
+        IMAGE_HASH_MAX_DISTANCE come from similar_image_ids; any other photo scores at
+        most 1 - (IMAGE_HASH_MAX_DISTANCE + 1) / 32 on the image side. Title trigrams are
+        no use for the bound: SequenceMatcher gives titles without a common trigram
+        ratios close to 0.6 ('grey charger' and 'red car keys' score 0.58).
+        Items sharing no token at all are still never candidates, so the indexed
+        path can miss pairs the brute-force scan finds (MATCH_INDEX_ENABLED off).
+        """
+        tokens = self.index_tokens(item)
+        if not tokens:
+            return []
+        
+        hits = db.func.count(ItemToken.token)
+        query = db.session.query(ItemToken.item_id).join(Item, Item.id == ItemToken.item_id).filter(
+            ItemToken.token.in_(tokens),
+            Item.status == status
+        )
+        if approved_only:
+            query = query.filter(Item.is_approved == True)
+        if item.id is not None:
+            query = query.filter(ItemToken.item_id != item.id)
+        query = query.group_by(ItemToken.item_id)
+        
+        needed = threshold
+        weight = app.config['IMAGE_MATCH_WEIGHT']
+        if item.image_hash and weight:
+            best_image = max(0.0, 1.0 - (app.config['IMAGE_HASH_MAX_DISTANCE'] + 1) / 32.0)
+            needed = min(needed, (threshold - best_image * weight) / (1.0 - weight))
+        features = self.build_features(item)
+        keyword_count = sum(token.startswith('k:') for token in tokens)
+        # Everything but the keywords depends on the candidate row alone
+        best = db.case((Item.category_id == item.category_id, 0.2), else_=0.0)
+        for (field, field_weight), column in zip(self.TEXT_WEIGHTS, (Item.title, Item.description, Item.location)):
+            length = len(getattr(features, field))
+            if length:
+                other = db.func.coalesce(db.func.length(column), 0)
+                best = best + field_weight * 2.0 * db.func.min(other, length) / (other + length)
+        best = db.func.max(best)
+        if keyword_count:
+            keyword_hits = db.func.sum(db.case((ItemToken.token.like('k:%'), 1), else_=0))
+            best = best + 0.2 * keyword_hits / keyword_count
+        rows = query.having(best >= needed - 1e-9).order_by(hits.desc(), ItemToken.item_id).all()
+        return [row.item_id for row in rows]
+    
+    @staticmethod
+    def match_type(similarity):
+        return 'exact' if similarity >= 0.8 else 'similar' if similarity >= 0.6 else 'potential'
+    
+    def find_matches(self, item, threshold=0.6, use_index=None):
+        """Find potential matches for an item"""
+        return self.score_candidates(item, self.match_candidates(item, use_index, threshold=threshold), threshold)
+    
+    def match_candidates(self, item, use_index=None, approved_only=True, threshold=0.6):
+        """Items of the opposite status that find_matches scores item against"""
         # Get items with opposite status
         opposite_status = 'lost' if item.status == 'found' else 'found'
-        potential_matches = Item.query.filter_by(status=opposite_status, is_approved=True).all()
+        if use_index is None:
+            use_index = app.config['MATCH_INDEX_ENABLED']
+        
+        if use_index:
+            # Only score the candidates that share keywords or title trigrams, plus near-duplicate photos
+            candidate_ids = self.candidate_ids(item, opposite_status, approved_only, threshold)
+            seen = set(candidate_ids)
+            candidate_ids += [i for i in self.similar_image_ids(item, opposite_status, approved_only=approved_only)
+                              if i not in seen]
+            potential_matches = []
+            for start in range(0, len(candidate_ids), 900):
+                potential_matches += Item.query.filter(Item.id.in_(candidate_ids[start:start + 900])).all()
+        else:
+            query = Item.query.filter_by(status=opposite_status)
+            potential_matches = (query.filter_by(is_approved=True) if approved_only else query).all()
+        return [c for c in potential_matches if c.id != item.id]
+    
+    def score_candidates(self, item, candidates, threshold=0.6):
+        """Candidates scoring at least threshold against item, best first"""
+        matches = []
+        
+        # Vectorized upper bound first, exact score only for candidates that can reach the threshold
+        target = self.build_features(item)
+        features = self.load_features(candidates)
+        bounds = self.score_many(item, candidates, features, target)
         
-        for potential_match in potential_matches:
-            if potential_match.id != item.id:
-                similarity = self.calculate_similarity(item, potential_match)
+        for potential_match, candidate_features, bound in zip(candidates, features, bounds):
+            if bound >= threshold - 1e-9:
+                similarity = self.calculate_similarity(item, potential_match, target, candidate_features, threshold)
                 
-                if similarity >= threshold:
+                if similarity is not None and similarity >= threshold:
                     matches.append({
                         'item': potential_match,
                         'similarity': similarity,
-                        'match_type': 'exact' if similarity >= 0.8 else 'similar' if similarity >= 0.6 else 'potential'
+                        'match_type': self.match_type(similarity)
                     })
         
-        # Sort by similarity score
-        matches.sort(key=lambda x: x['similarity'], reverse=True)
+        # Sort by similarity score (ties by id so both paths rank identically)
+        matches.sort(key=lambda x: (-x['similarity'], x['item'].id))
         return matches
 
 # Initialize smart matcher
 smart_matcher = SmartMatcher()
 
+# Columns find_matches reads, on the item itself or on its candidates
+MATCH_COLUMNS = ('title', 'description', 'location', 'keywords', 'category_id', 'status', 'is_approved', 'image_hash')
+MATCH_POOLS = ('lost', 'found')  # Statuses find_matches draws candidates from
+
+class MatchResultCache:
+    """Process-wide LRU of /api/matches results, bounded by MATCH_CACHE_SIZE entries.
+    
+    An entry is keyed by item id and a fingerprint of the item's own matching columns,
+    and remembers the data version it was computed at: match_pool.<opposite status>,
+    which only moves when an item of that status is added, deleted or edited in one of
+    MATCH_COLUMNS (approval and status changes included), plus 'matches' when serving
+    stored rows. A stale entry is simply recomputed, so a write in one gunicorn worker
+    invalidates the others' entries too.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.stats = Counter()  # hits, misses, stale (misses on an outdated entry), evictions
+    
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[1]
+            self.stats['misses'] += 1
+            if entry is not None:
+                self.stats['stale'] += 1
+                del self.entries[key]
+            return None
+    
+    def put(self, key, version, value):
+        size = app.config['MATCH_CACHE_SIZE']
+        with self.lock:
+            self.entries[key] = (version, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > size:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+match_cache = MatchResultCache()
+
+def match_result(item, similarity, match_type):
+    """JSON representation of one match in /api/matches"""
+    return {
+        'id': item.id,
+        'title': item.title,
+        'description': item.description,
+        'similarity': similarity,
+        'match_type': match_type,
+        'status': item.status,
+        'location': item.location
+    }
+
+def persisted_matches(item):
+    """Stored ItemMatch rows of an item, as find_matches would return them: approved opposite-status items only"""
+    opposite_status = 'lost' if item.status == 'found' else 'found'
+    other_id = db.case((ItemMatch.item1_id == item.id, ItemMatch.item2_id), else_=ItemMatch.item1_id)
+    rows = db.session.query(Item, ItemMatch.similarity_score, ItemMatch.match_type).join(ItemMatch, Item.id == other_id).filter(
+        db.or_(ItemMatch.item1_id == item.id, ItemMatch.item2_id == item.id),
+        Item.status == opposite_status,
+        Item.is_approved == True
+    ).order_by(ItemMatch.similarity_score.desc(), Item.id).all()
+    return [match_result(other, score, match_type) for other, score, match_type in rows]
+
+def cached_matches(item):
+    """Matches of an item from MATCH_RESULTS_SOURCE, reused while nothing a match could involve has changed"""
+    source = app.config['MATCH_RESULTS_SOURCE']
+    opposite_status = 'lost' if item.status == 'found' else 'found'
+    version = tuple(data_versions([f'match_pool.{opposite_status}'] + (['matches'] if source == 'persisted' else [])))
+    settings = (source, app.config['MATCH_INDEX_ENABLED'], app.config['IMAGE_MATCH_WEIGHT'])
+    fingerprint = hashlib.sha1(repr((settings, [getattr(item, column) for column in MATCH_COLUMNS])).encode()).hexdigest()
+    key = (item.id, fingerprint)
+    if app.config['MATCH_CACHE_SIZE']:
+        results = match_cache.get(key, version)
+        if results is not None:
+            return results
+    if source == 'persisted':
+        results = persisted_matches(item)
+    else:
+        results = [match_result(match['item'], match['similarity'], match['match_type'])
+                   for match in smart_matcher.find_matches(item)]
+    if app.config['MATCH_CACHE_SIZE']:
+        match_cache.put(key, version, results)
+    return results
+
+# Keep the matching features and index in sync with every write path
+def write_item_features(connection, item):
+    connection.execute(ItemFeatures.__table__.delete().where(ItemFeatures.item_id == item.id))
+    connection.execute(ItemFeatures.__table__.insert(), smart_matcher.feature_record(item))
+
+def write_item_tokens(connection, item):
+    connection.execute(ItemToken.__table__.delete().where(ItemToken.item_id == item.id))
+    tokens = smart_matcher.index_tokens(item)
+    if tokens:
+        connection.execute(ItemToken.__table__.insert(), [{'token': token, 'item_id': item.id} for token in tokens])
+
+def write_item_image_hash(connection, item):
+    connection.execute(ItemImageHash.__table__.delete().where(ItemImageHash.item_id == item.id))
+    if item.image_hash:
+        connection.execute(ItemImageHash.__table__.insert(), [
+            {'item_id': item.id, 'chunk': chunk, 'value': value} for chunk, value in enumerate(hash_chunks(item.image_hash))
+        ])
+
+@db.event.listens_for(Item, 'after_insert')
+def index_item_after_insert(mapper, connection, target):
+    write_item_features(connection, target)
+    write_item_tokens(connection, target)
+    if target.image_hash:
+        write_item_image_hash(connection, target)
+
+@db.event.listens_for(Item, 'after_update')
+def index_item_after_update(mapper, connection, target):
+    state = db.inspect(target)
+    changed = {name for name in ('title', 'description', 'location', 'keywords', 'image_hash')
+               if state.attrs[name].history.has_changes()}
+    if changed & {'title', 'description', 'location'}:
+        write_item_features(connection, target)
+    if changed & {'title', 'description', 'keywords'}:
+        write_item_tokens(connection, target)
+    if 'image_hash' in changed:
+        write_item_image_hash(connection, target)
+
+@db.event.listens_for(Item, 'after_delete')
+def unindex_item_after_delete(mapper, connection, target):
+    connection.execute(ItemFeatures.__table__.delete().where(ItemFeatures.item_id == target.id))
+    connection.execute(ItemToken.__table__.delete().where(ItemToken.item_id == target.id))
+    connection.execute(ItemImageHash.__table__.delete().where(ItemImageHash.item_id == target.id))
+
+# Statistics counters
+# Every flush adjusts the stat_counter rows of the rows it inserts, deletes or moves
+# between statuses, in the same transaction, so the dashboards read all of their
+# figures with one query. Bulk Query.delete()/update() and raw SQL bypass the
+# session and leave the counters stale - run 'flask reconcile-counters' after them.
+COUNTED_MODELS = {
+    Item: ('items', ('status', 'category_id')),
+    ItemMatch: ('matches', ('match_type',)),
+    Claim: ('claims', ('status',)),
+    Message: ('messages', ('is_read',)),
+    Notification: ('notifications', ('is_read',)),
+    User: ('users', ()),
+    Category: ('categories', ())
+}
+
+def counter_name(prefix, attr, value):
+    if isinstance(value, bool):
+        value = int(value)
+    return f'{prefix}.{attr}.{value}'
+
+def counter_names(prefix, attrs, values):
+    """Counters a row with the given attribute values contributes to"""
+    return [f'{prefix}.total'] + [counter_name(prefix, attr, values[attr]) for attr in attrs]
+
+def load_old_value(target, value, oldvalue, initiator):
+    """No-op: registered with active_history so the old value is loaded before it is replaced"""
+
+for model, (prefix, attrs) in COUNTED_MODELS.items():
+    for attr in attrs:
+        db.event.listen(getattr(model, attr), 'set', load_old_value, active_history=True)
+
+@db.event.listens_for(db.session, 'after_flush')
+def count_rows_after_flush(session, flush_context):
+    deltas = Counter()
+    for target in session.new:
+        if type(target) in COUNTED_MODELS:
+            prefix, attrs = COUNTED_MODELS[type(target)]
+            deltas.update(counter_names(prefix, attrs, db.inspect(target).dict))
+    for target in session.deleted:
+        if type(target) in COUNTED_MODELS:
+            prefix, attrs = COUNTED_MODELS[type(target)]
+            deltas.subtract(counter_names(prefix, attrs, db.inspect(target).dict))
+    for target in session.dirty:
+        if type(target) in COUNTED_MODELS and target not in session.deleted:
+            prefix, attrs = COUNTED_MODELS[type(target)]
+            state = db.inspect(target)
+            for attr in attrs:
+                history = state.attrs[attr].history
+                if history.added:
+                    old = history.deleted[0] if history.deleted else None
+                    deltas[counter_name(prefix, attr, old)] -= 1
+                    deltas[counter_name(prefix, attr, history.added[0])] += 1
+    
+    apply_counter_deltas(session.connection(), deltas)
+    
+    touched = {VERSIONED_MODELS[type(target)] for target in session.new | session.deleted if type(target) in VERSIONED_MODELS}
+    touched.update(VERSIONED_MODELS[type(target)] for target in session.dirty
+                   if type(target) in VERSIONED_MODELS and session.is_modified(target))
+    touched.update(f'match_pool.{status}' for status in touched_match_pools(session))
+    if touched:
+        bump_versions(session.connection(), touched)
+
+def touched_match_pools(session):
+    """Statuses (of MATCH_POOLS) whose matching candidates a flush changes"""
+    pools = set()
+    for target in session.new | session.deleted:
+        if isinstance(target, Item):
+            # An expired instance has no status loaded, so either pool may have changed
+            pools.update([target.__dict__['status']] if 'status' in target.__dict__ else MATCH_POOLS)
+    for target in session.dirty:
+        if isinstance(target, Item) and target not in session.deleted:
+            state = db.inspect(target)
+            if not any(state.attrs[column].history.has_changes() for column in MATCH_COLUMNS):
+                continue
+            status = state.attrs.status.history
+            if 'status' not in state.dict or (status.added and not status.deleted):
+                pools.update(MATCH_POOLS)  # Old or new status not loaded
+            else:
+                pools.update(status.deleted)
+                pools.add(state.dict['status'])
+    return pools & set(MATCH_POOLS)
+
+def apply_counter_deltas(connection, deltas):
+    """Add {name: change} to the stat_counter rows; bulk writes call this themselves in their transaction"""
+    changes = [{'name': name, 'value': delta} for name, delta in deltas.items() if delta]
+    if changes:
+        insert = sqlite_insert(StatCounter.__table__)
+        connection.execute(
+            insert.on_conflict_do_update(
+                index_elements=['name'],
+                set_={'value': StatCounter.__table__.c.value + insert.excluded.value}
+            ),
+            changes
+        )
+
+# Data versions for conditional GET
+# Every flush that writes one of these tables moves its version.<name> counter to
+# max(previous + 1, current time in ms), so a version is both a write counter and
+# a timestamp. Bulk writes leave them alone; reconcile_counters() bumps them all.
+VERSIONED_MODELS = {Item: 'items', ItemMatch: 'matches', Category: 'categories', User: 'users', SystemInfo: 'settings'}
+
+def bump_versions(connection, names):
+    now = int(time.time() * 1000)
+    insert = sqlite_insert(StatCounter.__table__)
+    connection.execute(
+        insert.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'value': db.func.max(StatCounter.__table__.c.value + 1, insert.excluded.value)}
+        ),
+        [{'name': f'version.{name}', 'value': now} for name in names]
+    )
+
+def data_versions(names):
+    """Version counters of the given tables in one query; 0 for tables never written through the session"""
+    rows = db.session.query(StatCounter.name, StatCounter.value).filter(
+        StatCounter.name.in_([f'version.{name}' for name in names])
+    )
+    values = dict(rows.all())
+    return [values.get(f'version.{name}', 0) for name in names]
+
+def get_counters():
+    """Every statistics counter in one query; missing counters read as 0"""
+    return Counter({counter.name: counter.value for counter in StatCounter.query.all()})
+
+def count_rows():
+    """Recompute every counter from the tables with GROUP BY queries"""
+    counts = Counter()
+    for model, (prefix, attrs) in COUNTED_MODELS.items():
+        counts[f'{prefix}.total'] = db.session.query(db.func.count()).select_from(model).scalar()
+        for attr in attrs:
+            column = getattr(model, attr)
+            for value, count in db.session.query(column, db.func.count()).group_by(column):
+                counts[counter_name(prefix, attr, value)] = count
+    return counts
+
+def reconcile_counters(fix=True):
+    """Compare the counters with the real row counts and return {name: (stored, actual)} for any drift"""
+    stored = Counter({name: value for name, value in get_counters().items() if not name.startswith('version.')})
+    actual = count_rows()
+    drift = {name: (stored[name], actual[name]) for name in set(stored) | set(actual) if stored[name] != actual[name]}
+    if fix and drift:
+        db.session.execute(StatCounter.__table__.delete().where(~StatCounter.name.startswith('version.')))
+        db.session.execute(StatCounter.__table__.insert(), [{'name': name, 'value': value} for name, value in actual.items()])
+        # Whatever drifted was cached somewhere too
+        bump_versions(db.session.connection(), list(VERSIONED_MODELS.values()) + [f'match_pool.{status}' for status in MATCH_POOLS])
+        db.session.commit()
+    return drift
+
+# Reference counts of content-addressed uploads follow Item.image_path
+def change_blob_refs(connection, image_path, delta):
+    sha256 = blob_hash(image_path)
+    if not sha256:
+        return
+    path = static_file_path(image_path)
+    insert = sqlite_insert(UploadBlob.__table__).values(
+        sha256=sha256, path=image_path, size=os.path.getsize(path) if os.path.exists(path) else None,
+        ref_count=delta, created_at=datetime.utcnow(), updated_at=datetime.utcnow()
+    )
+    connection.execute(insert.on_conflict_do_update(
+        index_elements=['sha256'],
+        set_={'ref_count': UploadBlob.__table__.c.ref_count + insert.excluded.ref_count,
+              'updated_at': insert.excluded.updated_at}
+    ))
+
+db.event.listen(Item.image_path, 'set', load_old_value, active_history=True)
+
+@db.event.listens_for(Item, 'after_insert')
+def ref_blob_after_insert(mapper, connection, target):
+    change_blob_refs(connection, target.image_path, 1)
+
+@db.event.listens_for(Item, 'after_update')
+def ref_blob_after_update(mapper, connection, target):
+    history = db.inspect(target).attrs.image_path.history
+    if history.added:
+        for old in history.deleted:
+            change_blob_refs(connection, old, -1)
+        change_blob_refs(connection, history.added[0], 1)
+
+@db.event.listens_for(Item, 'after_delete')
+def unref_blob_after_delete(mapper, connection, target):
+    change_blob_refs(connection, db.inspect(target).attrs.image_path.loaded_value, -1)
+
+def collect_upload_garbage(dry_run=False):
+    """Recount blob references from Item rows, then delete unreferenced blobs and stray temp files.
+    
+    Anything changed within UPLOAD_GC_GRACE is kept so in-flight uploads are never removed.
+    Returns a dict of what was (or, with dry_run, would be) fixed and removed.
+    """
+    report = {'recounted': 0, 'deleted_blobs': 0, 'deleted_files': 0, 'freed_bytes': 0}
+    cutoff = datetime.utcnow() - app.config['UPLOAD_GC_GRACE']
+    
+    # Fix reference counts left stale by bulk deletes or raw SQL
+    actual = Counter()
+    for image_path, count in db.session.query(Item.image_path, db.func.count()).filter(
+            Item.image_path.like('uploads/blobs/%')).group_by(Item.image_path):
+        actual[blob_hash(image_path)] += count
+    for blob in UploadBlob.query.all():
+        if blob.ref_count != actual[blob.sha256]:
+            report['recounted'] += 1
+            if not dry_run:
+                blob.ref_count = actual[blob.sha256]
+                blob.updated_at = datetime.utcnow()
+    if not dry_run:
+        db.session.commit()
+    
+    known = {}
+    for blob in UploadBlob.query.all():
+        known[blob.sha256] = blob
+        path = static_file_path(blob.path)
+        unreferenced = (actual[blob.sha256] if dry_run else blob.ref_count) <= 0
+        if unreferenced and blob.updated_at < cutoff and not recently_modified(path, cutoff):
+            report['deleted_blobs'] += 1
+            report['freed_bytes'] += blob.size or 0
+            if not dry_run:
+                remove_file(path)
+                db.session.delete(blob)
+    if not dry_run:
+        db.session.commit()
+    
+    # Files nobody recorded: uploads whose item was never saved, and temp files of aborted uploads
+    blob_root = os.path.join(app.config['UPLOAD_FOLDER'], 'blobs')
+    temp_root = os.path.join(app.config['UPLOAD_FOLDER'], 'tmp')
+    for root, in_blobs in ((blob_root, True), (temp_root, False)):
+        for directory, subdirs, files in os.walk(root):
+            for name in files:
+                path = os.path.join(directory, name)
+                if in_blobs and name.split('.')[0] in known:
+                    continue
+                if not recently_modified(path, cutoff):
+                    report['deleted_files'] += 1
+                    report['freed_bytes'] += os.path.getsize(path)
+                    if not dry_run:
+                        remove_file(path)
+    return report
+
+def recently_modified(path, cutoff):
+    return os.path.exists(path) and datetime.utcfromtimestamp(os.path.getmtime(path)) >= cutoff
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
 # Helper Functions
-def backup_database():
-    """Create a backup of the database before making changes"""
+def backup_database(compress=None):
+    """Online backup of the live database into BACKUP_DIR; returns the backup path or None"""
+    return create_backup(
+        DATABASE_PATH,
+        app.config['BACKUP_DIR'],
+        compress=app.config['BACKUP_COMPRESS'] if compress is None else compress,
+        keep=app.config['BACKUP_KEEP'],
+        pages=app.config['BACKUP_PAGES_PER_STEP']
+    )
+
+def save_uploaded_image(file, chunk_size=65536):
+    """Store an uploaded image by content hash and return its path relative to static/.
+    
+    The upload is hashed while it is streamed to a temp file in chunks, then moved
+    to uploads/blobs/<aa>/<bb>/<sha256>.<ext>. Identical uploads share one file;
+    different files with the same name no longer overwrite each other.
+    Raises ValueError for file types that are not allowed.
+    """
+    extension = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
+    if extension not in app.config['ALLOWED_IMAGE_EXTENSIONS']:
+        raise ValueError('Invalid file type. Please upload an image (PNG, JPG, JPEG, GIF, WEBP).')
+    extension = 'jpg' if extension == 'jpeg' else extension
+    
+    temp_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'tmp')
+    os.makedirs(temp_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as temp:
+        try:
+            for chunk in iter(lambda: file.stream.read(chunk_size), b''):
+                digest.update(chunk)
+                temp.write(chunk)
+        except BaseException:
+            temp.close()
+            os.remove(temp.name)
+            raise
+    
+    sha256 = digest.hexdigest()
+    blob_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'blobs', sha256[:2], sha256[2:4])
+    os.makedirs(blob_dir, exist_ok=True)
+    existing = [name for name in os.listdir(blob_dir) if name.split('.')[0] == sha256]
+    if existing:
+        # Already stored: touch it so garbage collection treats it as freshly used
+        os.remove(temp.name)
+        filename = existing[0]
+        os.utime(os.path.join(blob_dir, filename))
+    else:
+        filename = f'{sha256}.{extension}'
+        os.replace(temp.name, os.path.join(blob_dir, filename))
+    return f'uploads/blobs/{sha256[:2]}/{sha256[2:4]}/{filename}'
+
+def blob_hash(image_path):
+    """sha256 of a content-addressed image path, None for uploads saved before the blob store"""
+    if not image_path or not image_path.startswith('uploads/blobs/'):
+        return None
+    return os.path.basename(image_path).split('.')[0]
+
+def static_file_path(relative_path):
+    """Filesystem path of a path relative to static/, such as Item.image_path"""
+    return os.path.join(os.path.dirname(app.config['UPLOAD_FOLDER']), relative_path)
+
+def build_image_variants(item_id, image_path):
+    """Decode an upload once and write every IMAGE_VARIANTS size as WebP and JPEG.
+    
+    Returns the variants dict and the perceptual hash of the photo, taken from the smallest variant.
+    """
+    source = static_file_path(image_path)
+    with open(source, 'rb') as f:
+        digest = format(zlib.crc32(f.read()), '08x')  # New uploads get new URLs, so caches never serve a stale variant
+    
+    variants_dir = os.path.join(app.config['UPLOAD_FOLDER'], 'variants')
+    os.makedirs(variants_dir, exist_ok=True)
+    sizes = sorted(app.config['IMAGE_VARIANTS'].items(), key=lambda v: v[1], reverse=True)
+    
+    with Image.open(source) as original:
+        # Let the JPEG decoder downscale by up to 8x while decoding when the photo is much larger than needed
+        original.draft('RGB', (sizes[0][1], sizes[0][1]))
+        image = ImageOps.exif_transpose(original)
+        if image.mode != 'RGB':
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.convert('RGBA').getchannel('A'))
+            image = background
+        
+        variants = {}
+        for name, width in sizes:
+            # Each size is scaled from the previous one, never upscaled
+            if image.width > width:
+                image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+            stem = f'item-{item_id}-{digest}-{name}'
+            image.save(os.path.join(variants_dir, stem + '.webp'), 'WEBP', quality=app.config['IMAGE_WEBP_QUALITY'], method=4)
+            image.save(os.path.join(variants_dir, stem + '.jpg'), 'JPEG', quality=app.config['IMAGE_JPEG_QUALITY'],
+                       optimize=True, progressive=True)
+            variants[name] = {
+                'width': image.width,
+                'height': image.height,
+                'webp': f'uploads/variants/{stem}.webp',
+                'jpeg': f'uploads/variants/{stem}.jpg'
+            }
+        image_hash = image_dhash(image)
+    return variants, image_hash
+
+def remove_image_variants(variants_json):
+    """Delete the files of a stored image_variants value"""
+    for variant in json.loads(variants_json or '{}').values():
+        for key in ('webp', 'jpeg'):
+            try:
+                os.remove(static_file_path(variant[key]))
+            except OSError:
+                pass
+
+def rebuild_match_index(batch_size=1000):
+    """Rebuild the smart matching index (tokens and photo hash chunks) for every item"""
+    db.session.query(ItemToken).delete()
+    db.session.query(ItemImageHash).delete()
+    rows, hash_rows = [], []
+    count = 0
+    for item in Item.query.order_by(Item.id).yield_per(batch_size):
+        rows.extend({'token': token, 'item_id': item.id} for token in smart_matcher.index_tokens(item))
+        if item.image_hash:
+            hash_rows.extend({'item_id': item.id, 'chunk': chunk, 'value': value}
+                             for chunk, value in enumerate(hash_chunks(item.image_hash)))
+        count += 1
+        if len(rows) >= batch_size * 20:
+            db.session.execute(ItemToken.__table__.insert(), rows)
+            rows = []
+        if len(hash_rows) >= batch_size * 20:
+            db.session.execute(ItemImageHash.__table__.insert(), hash_rows)
+            hash_rows = []
+    if rows:
+        db.session.execute(ItemToken.__table__.insert(), rows)
+    if hash_rows:
+        db.session.execute(ItemImageHash.__table__.insert(), hash_rows)
+    db.session.commit()
+    return count
+
+def rebuild_item_features(rebuild_all=False, batch_size=500):
+    """Recompute stored matching features that are missing or from an older FEATURE_VERSION"""
+    query = db.session.query(Item.id).outerjoin(ItemFeatures, ItemFeatures.item_id == Item.id)
+    if not rebuild_all:
+        query = query.filter(db.or_(ItemFeatures.item_id.is_(None), ItemFeatures.version != smart_matcher.FEATURE_VERSION))
+    item_ids = [row.id for row in query.order_by(Item.id).all()]
+    
+    for start in range(0, len(item_ids), batch_size):
+        batch = item_ids[start:start + batch_size]
+        items = Item.query.filter(Item.id.in_(batch)).all()
+        db.session.execute(ItemFeatures.__table__.delete().where(ItemFeatures.item_id.in_(batch)))
+        db.session.execute(ItemFeatures.__table__.insert(), [smart_matcher.feature_record(item) for item in items])
+        db.session.commit()
+    return len(item_ids)
+
+# Full re-match
+# 'flask rematch-all' recomputes every lost x found pair, e.g. after tuning the
+# matcher. Lost items are split into chunks that a multiprocessing pool scores
+# against one read-only snapshot of the found items (inherited on fork, sent once
+# per worker otherwise). Each finished chunk replaces its items' matches with one
+# bulk insert and moves the RematchRun checkpoint in the same transaction.
+rematch_snapshot = {}
+
+def match_snapshot(items):
+    """Plain copies of items and their matching features that can be sent to another process"""
+    features = smart_matcher.load_features(items)
+    copies = [SimpleNamespace(id=item.id, category_id=item.category_id, image_hash=item.image_hash,
+                              is_approved=bool(item.is_approved)) for item in items]
+    return copies, features
+
+def load_rematch_snapshot(found, features):
+    rematch_snapshot.update(found=found, features=features, arrays=smart_matcher.candidate_arrays(found, features))
+
+def rematch_chunk(lost, threshold):
+    """Score [(lost item, features)] against the found snapshot; returns (item ids, matches, pairs, exact comparisons)"""
+    found, features, arrays = rematch_snapshot['found'], rematch_snapshot['features'], rematch_snapshot['arrays']
+    matches, exact = [], 0
+    for item, target in lost:
+        bounds = smart_matcher.score_many(item, found, features, target, arrays)
+        for candidate, candidate_features, bound in zip(found, features, bounds):
+            # The pairs match_item would store from either side: one of the two must be approved
+            if bound < threshold - 1e-9 or not (candidate.is_approved or item.is_approved):
+                continue
+            similarity = smart_matcher.calculate_similarity(item, candidate, target, candidate_features, threshold)
+            if similarity is None:
+                continue
+            exact += 1
+            if similarity >= threshold:
+                matches.append((item.id, candidate.id, similarity, smart_matcher.match_type(similarity)))
+    return [item.id for item, target in lost], matches, len(lost) * len(found), exact
+
+def delete_match_rows(connection, condition):
+    """Bulk delete ItemMatch rows; returns the counter deltas for the caller to apply in the same transaction"""
+    table = ItemMatch.__table__
+    deltas = Counter()
+    for match_type, count in connection.execute(
+            db.select(table.c.match_type, db.func.count()).where(condition).group_by(table.c.match_type)):
+        deltas['matches.total'] -= count
+        deltas[counter_name('matches', 'match_type', match_type)] -= count
+    connection.execute(table.delete().where(condition))
+    return deltas
+
+def store_rematch_chunk(connection, run_id, item_ids, matches, pairs, exact, seconds):
+    table = ItemMatch.__table__
+    deltas = delete_match_rows(connection, db.or_(table.c.item1_id.in_(item_ids), table.c.item2_id.in_(item_ids)))
+    if matches:
+        connection.execute(table.insert(), [
+            {'item1_id': item1_id, 'item2_id': item2_id, 'similarity_score': similarity, 'match_type': match_type}
+            for item1_id, item2_id, similarity, match_type in matches
+        ])
+        deltas['matches.total'] += len(matches)
+        deltas.update(counter_name('matches', 'match_type', match_type) for item1_id, item2_id, similarity, match_type in matches)
+    apply_counter_deltas(connection, deltas)
+    bump_versions(connection, ['matches'])
+    runs = RematchRun.__table__
+    connection.execute(runs.update().where(runs.c.id == run_id).values(
+        last_item_id=max(item_ids),
+        lost_done=runs.c.lost_done + len(item_ids),
+        pairs_scored=runs.c.pairs_scored + pairs,
+        exact_scored=runs.c.exact_scored + exact,
+        matches_stored=runs.c.matches_stored + len(matches),
+        seconds=runs.c.seconds + seconds,
+        updated_at=datetime.utcnow()
+    ))
+
+def rematch_all(workers=None, chunk_size=200, threshold=0.6, restart=False, max_chunks=None, progress=None):
+    """Recompute the matches of every lost item against all found items, resuming an interrupted run.
+    
+    Returns the figures of this session: lost items, pairs scored, exact comparisons, matches stored,
+    seconds and whether the run is complete. progress(totals, seconds, remaining) is called per chunk.
+    """
+    run = RematchRun.query.filter_by(status='running').order_by(RematchRun.id.desc()).first()
+    if run and restart:
+        run.status = 'abandoned'
+        run = None
+    if run is None:
+        run = RematchRun(threshold=threshold)
+        db.session.add(run)
+        db.session.commit()
+    run_id, threshold, checkpoint = run.id, run.threshold, run.last_item_id or 0
+    
+    found, found_features = match_snapshot(Item.query.filter_by(status='found').order_by(Item.id).all())
+    lost, lost_features = match_snapshot(Item.query.filter(Item.status == 'lost', Item.id > checkpoint).order_by(Item.id).all())
+    db.session.commit()  # End the read transaction before the chunks are written
+    chunks = [list(zip(lost[start:start + chunk_size], lost_features[start:start + chunk_size]))
+              for start in range(0, len(lost), chunk_size)]
+    complete = max_chunks is None or len(chunks) <= max_chunks
+    chunks = chunks[:max_chunks]
+    
+    workers = workers or os.cpu_count() or 1
+    load_rematch_snapshot(found, found_features)
+    pool = None
+    if workers > 1 and len(chunks) > 1:
+        methods = multiprocessing.get_all_start_methods()
+        pool = multiprocessing.get_context('fork' if 'fork' in methods else None).Pool(
+            workers, initializer=load_rematch_snapshot, initargs=(found, found_features))
+        results = pool.imap(partial(rematch_chunk, threshold=threshold), chunks)
+    else:
+        results = (rematch_chunk(chunk, threshold) for chunk in chunks)
+    
+    totals = Counter()
+    started = last = time.perf_counter()
     try:
-        if os.path.exists(DATABASE_PATH):
-            backup_path = f"{DATABASE_PATH}.backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            import shutil
-            shutil.copy2(DATABASE_PATH, backup_path)
-            print(f"✅ Database backed up to: {backup_path}")
-            return backup_path
+        for item_ids, matches, pairs, exact in results:
+            with db.engine.begin() as connection:
+                store_rematch_chunk(connection, run_id, item_ids, matches, pairs, exact, time.perf_counter() - last)
+            last = time.perf_counter()
+            totals.update(lost=len(item_ids), pairs=pairs, exact=exact, matches=len(matches))
+            if progress:
+                progress(totals, last - started, len(lost) - totals['lost'])
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+    
+    if complete:
+        # Pairs left from items that are no longer lost
+        table = ItemMatch.__table__
+        lost_ids = db.select(Item.id).where(Item.status == 'lost')
+        with db.engine.begin() as connection:
+            deltas = delete_match_rows(connection, db.and_(table.c.item1_id.not_in(lost_ids), table.c.item2_id.not_in(lost_ids)))
+            if deltas:
+                apply_counter_deltas(connection, deltas)
+                bump_versions(connection, ['matches'])
+            connection.execute(RematchRun.__table__.update().where(RematchRun.__table__.c.id == run_id).values(
+                status='done', finished_at=datetime.utcnow(), updated_at=datetime.utcnow()))
+    return dict(totals, run_id=run_id, resumed_after=checkpoint, seconds=time.perf_counter() - started, complete=complete)
+
+# Full-text search
+# item_fts is an external-content FTS5 table over the searchable item columns,
+# kept in sync with the item table by triggers. When FTS5 is not compiled into
+# SQLite, searches fall back to the original LIKE filters.
+FTS_COLUMNS = ['title', 'description', 'location', 'brand', 'model', 'color']
+FTS_WEIGHTS = [10.0, 4.0, 2.0, 3.0, 3.0, 1.0]  # bm25 column weights, same order as FTS_COLUMNS
+
+def setup_search_index():
+    """Create the FTS5 table and sync triggers if needed; returns True when FTS5 is usable"""
+    columns = ', '.join(FTS_COLUMNS)
+    new_values = ', '.join(f'new.{c}' for c in FTS_COLUMNS)
+    old_values = ', '.join(f'old.{c}' for c in FTS_COLUMNS)
+    try:
+        with db.engine.begin() as connection:
+            exists = connection.execute(db.text("SELECT 1 FROM sqlite_master WHERE name = 'item_fts'")).first()
+            connection.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS item_fts USING fts5({columns}, "
+                f"content='item', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            connection.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS item_fts_insert AFTER INSERT ON item BEGIN "
+                f"INSERT INTO item_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+            )
+            connection.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS item_fts_delete AFTER DELETE ON item BEGIN "
+                f"INSERT INTO item_fts(item_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+            )
+            connection.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS item_fts_update AFTER UPDATE OF {columns} ON item BEGIN "
+                f"INSERT INTO item_fts(item_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+                f"INSERT INTO item_fts(rowid, {columns}) VALUES (new.id, {new_values}); END"
+            )
+            if not exists:
+                # Index items that were posted before the search table existed
+                connection.exec_driver_sql("INSERT INTO item_fts(item_fts) VALUES ('rebuild')")
+        return True
     except Exception as e:
-        print(f"⚠️ Warning: Could not create database backup: {e}")
-    return None
+        print(f"⚠️ Full-text search unavailable, using LIKE search: {e}")
+        return False
+
+def fts_query(search, columns):
+    """Turn free text into an FTS5 query: every word must match, as a prefix, in one of the columns"""
+    terms = re.findall(r'\w+', search.lower())
+    if not terms:
+        return None
+    return '{' + ' '.join(columns) + '} : (' + ' '.join(f'"{term}"*' for term in terms) + ')'
+
+def search_items(query, search, columns):
+    """Filter an Item query by a search string; returns (query, rank column or None)"""
+    if app.config['FTS_AVAILABLE'] and app.config['SEARCH_BACKEND'] == 'fts':
+        match = fts_query(search, columns)
+        if match is None:
+            return query, None
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        ranked = db.text(
+            f"SELECT rowid AS item_id, bm25(item_fts, {weights}) AS rank FROM item_fts WHERE item_fts MATCH :match"
+        ).bindparams(match=match).columns(item_id=db.Integer, rank=db.Float).subquery('ranked')
+        return query.join(ranked, ranked.c.item_id == Item.id), ranked.c.rank
+    
+    return query.filter(db.or_(*[getattr(Item, column).ilike(f'%{search}%') for column in columns])), None
+
+def public_category_counts():
+    """Number of public (approved, active) items per category id, from a single GROUP BY query"""
+    rows = db.session.query(Item.category_id, db.func.count(Item.id)).filter(
+        Item.is_approved == True,
+        Item.status.in_(['found', 'lost', 'recovered'])
+    ).group_by(Item.category_id).all()
+    return {category_id: count for category_id, count in rows}
+
+SYSTEM_INFO_DEFAULTS = {
+    'site_name': 'FOUND IT',
+    'about_content': 'Welcome to FOUND IT - Your Smart Lost and Found System!',
+    'contact_email': 'admin@foundit.com',
+    'contact_phone': '+234 810 678 1706',
+    'contact_address': 'ABU Zaria, Main Campus, Nigeria'
+}
+
+def system_info_row():
+    """The SystemInfo row itself, created on first use - only for code that writes settings"""
+    info = SystemInfo.query.first()
+    if not info:
+        info = SystemInfo(**SYSTEM_INFO_DEFAULTS)
+        db.session.add(info)
+        db.session.commit()
+    return info
+
+class SystemInfoCache:
+    """Process-wide read-only snapshot of the SystemInfo row.
+    
+    After SYSTEM_INFO_CACHE_TTL seconds the snapshot re-checks SystemInfo.updated_at
+    and only reloads the row when it changed, so a save in one gunicorn worker
+    reaches the others within the TTL. Saves in this process call invalidate().
+    Callers that have already read the version.settings counter pass it to get(),
+    which reloads straight away when it moved since the snapshot was taken. Pages
+    with a settings ETag do, so they never pair a new ETag with old settings.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.version = None
+        self.settings_version = None
+        self.checked_at = 0.0
+    
+    def stale(self, settings_version):
+        return (self.snapshot is None or time.monotonic() - self.checked_at > app.config['SYSTEM_INFO_CACHE_TTL']
+                or (settings_version is not None and settings_version != self.settings_version))
+    
+    def get(self, settings_version=None):
+        if self.stale(settings_version):
+            with self.lock:
+                if self.stale(settings_version):
+                    self.refresh(settings_version)
+        return self.snapshot
+    
+    def refresh(self, settings_version=None):
+        # Read the counter before the row, so the snapshot is never older than the version it is filed under
+        if settings_version is None:
+            settings_version = data_versions(['settings'])[0]
+        stamp = db.session.query(SystemInfo.id, SystemInfo.updated_at).order_by(SystemInfo.id).first()
+        version = tuple(stamp) if stamp else None
+        if self.snapshot is None or version != self.version or settings_version != self.settings_version:
+            info = db.session.get(SystemInfo, stamp.id) if stamp else None
+            values = {name: getattr(info, name) if info else default for name, default in SYSTEM_INFO_DEFAULTS.items()}
+            self.snapshot = SimpleNamespace(**values)
+            self.version = version
+        self.settings_version = settings_version
+        self.checked_at = time.monotonic()
+    
+    def invalidate(self):
+        with self.lock:
+            self.snapshot = None
+
+system_info_cache = SystemInfoCache()
 
 def get_system_info():
+    """Site settings for templates, memoized per request on top of the process-wide cache"""
+    if 'system_info' in g:
+        return g.system_info
     try:
-        info = SystemInfo.query.first()
-        if not info:
-            info = SystemInfo(
-                site_name='FOUND IT',
-                about_content='Welcome to FOUND IT - Your Smart Lost and Found System!',
-                contact_email='admin@foundit.com',
-                contact_phone='+234 810 678 1706',
-                contact_address='ABU Zaria, Main Campus, Nigeria'
-            )
-            db.session.add(info)
-            db.session.commit()
-        return info
+        g.system_info = system_info_cache.get()
     except Exception as e:
         print(f"get_system_info error: {e}")
         # Return a fallback object
-        return type('SystemInfo', (), {
-            'site_name': 'FOUND IT',
-            'about_content': 'Welcome to FOUND IT - Your Smart Lost and Found System!',
-            'contact_email': 'admin@foundit.com',
-            'contact_phone': '+234 810 678 1706',
-            'contact_address': 'ABU Zaria, Main Campus, Nigeria'
-        })()
+        g.system_info = SimpleNamespace(**SYSTEM_INFO_DEFAULTS)
+    return g.system_info
 
-def create_notification(user_id, title, message, notification_type='system'):
-    """Create a new notification"""
+def add_notification(session, user_id, title, message, notification_type='system'):
     notification = Notification(
         user_id=user_id,
         title=title,
         message=message,
         type=notification_type
     )
-    db.session.add(notification)
-    db.session.commit()
-    return notification
+    session.add(notification)
+    session.flush()
+    return notification.id
 
+def create_notification(user_id, title, message, notification_type='system'):
+    """Create a new notification through the write queue; returns a Future of its id"""
+    return write_queue.submit(add_notification, user_id, title, message, notification_type)
+
+def add_notifications(session, recipients, title, message, notification_type='system', digest_key=None):
+    """Notify many users with one INSERT ... SELECT; returns the number of rows.
+    
+    recipients is a select of user ids, or a list of ids.
+    """
+    if not isinstance(recipients, db.Select):
+        recipients = db.select(User.id).where(User.id.in_(list(recipients)))
+    rows = recipients.add_columns(db.literal(title), db.literal(message), db.literal(notification_type), db.literal(digest_key))
+    result = session.execute(Notification.__table__.insert().from_select(
+        ['user_id', 'title', 'message', 'type', 'digest_key'], rows
+    ))
+    # Core inserts skip the flush listener that keeps the counters
+    apply_counter_deltas(session.connection(), {'notifications.total': result.rowcount,
+                                                'notifications.is_read.0': result.rowcount})
+    return result.rowcount
+
+def add_admin_event(session, title, message, notification_type):
+    """Tell every admin about a match or claim.
+    
+    With NOTIFICATION_DIGEST_WINDOW set, the event is folded into each admin's unread
+    digest from the current window instead, and admins without one get a new digest;
+    two statements whatever the number of admins. Returns the number of notifications written.
+    """
+    admins = db.select(User.id).where(User.role == 'admin')
+    window = app.config['NOTIFICATION_DIGEST_WINDOW']
+    if not window:
+        return add_notifications(session, admins, title, message, notification_type)
+    
+    table = Notification.__table__
+    open_digest = db.and_(table.c.digest_key == 'admin-events', table.c.is_read == False,
+                          table.c.created_at >= datetime.utcnow() - timedelta(seconds=window))
+    line = f'{title}: {message}'
+    folded = session.execute(table.update().where(open_digest, table.c.user_id.in_(admins)).values(
+        event_count=table.c.event_count + 1,
+        title='Activity digest - ' + db.cast(table.c.event_count + 1, db.String) + ' new events',
+        message=db.func.substr(db.literal(line) + '\n' + table.c.message, 1, 4000)  # Newest first
+    )).rowcount
+    fresh = admins.where(~db.exists().where(open_digest, table.c.user_id == User.id))
+    return folded + add_notifications(session, fresh, 'Activity digest - 1 new event', line, 'digest', 'admin-events')
+
+# Write Queue
+# Request handlers and jobs hand their writes to one writer thread per process
+# as units of work: functions called with a session that add or change rows and
+# return plain values (ids), never ORM objects. The writer applies everything
+# that queued up within WRITE_BATCH_WINDOW and commits once, so concurrent
+# posts share one write lock and one fsync. submit(..., wait=True) blocks
+# until the commit for read-your-writes; otherwise it returns a Future.
+class WriteQueue:
+    """Single writer thread that applies submitted units of work in group commits"""
+    def __init__(self, flask_app):
+        self.app = flask_app
+        self.queue = queue.Queue()
+        self.thread = None
+        self.pid = None
+        self.lock = threading.Lock()
+        self.stats = Counter()  # units, commits, retried_batches, failed_units
+    
+    def submit(self, unit, *args, wait=False, timeout=30.0, **kwargs):
+        """Apply unit(session, *args, **kwargs) in a group commit"""
+        if self.app.config['WRITE_QUEUE_MODE'] != 'group':
+            future = Future()
+            try:
+                result = unit(db.session, *args, **kwargs)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                if wait:
+                    raise
+                print(f"Write queue error in {unit.__name__}: {e}")
+                future.set_exception(e)
+            else:
+                self.stats.update(units=1, commits=1)
+                future.set_result(result)
+            return future.result() if wait else future
+        
+        self.start()
+        future = Future()
+        self.queue.put((future, unit, args, kwargs))
+        return future.result(timeout) if wait else future
+    
+    def start(self):
+        with self.lock:
+            # Threads do not survive fork, so gunicorn workers each start their own
+            if self.thread and self.thread.is_alive() and self.pid == os.getpid():
+                return
+            if self.pid != os.getpid():
+                self.queue = queue.Queue()
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, name='found-it-writer', daemon=True)
+            self.thread.start()
+    
+    def next_batch(self):
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.app.config['WRITE_BATCH_WINDOW']
+        while len(batch) < self.app.config['WRITE_BATCH_MAX']:
+            try:
+                remaining = deadline - time.monotonic()
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+    
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            with self.app.app_context():
+                try:
+                    self.apply(batch)
+                finally:
+                    db.session.remove()
+    
+    def apply(self, batch):
+        try:
+            results = [unit(db.session, *args, **kwargs) for future, unit, args, kwargs in batch]
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            # Apply the units one by one so a bad unit only fails its own caller
+            self.stats['retried_batches'] += 1
+            for entry in batch:
+                self.apply_one(*entry)
+            return
+        self.stats.update(units=len(batch), commits=1)
+        for (future, unit, args, kwargs), result in zip(batch, results):
+            future.set_result(result)
+    
+    def apply_one(self, future, unit, args, kwargs):
+        try:
+            result = unit(db.session, *args, **kwargs)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Write queue error in {unit.__name__}: {e}")
+            self.stats['failed_units'] += 1
+            future.set_exception(e)
+            return
+        self.stats.update(units=1, commits=1)
+        future.set_result(result)
+
+write_queue = WriteQueue(app)
+
+# Background Jobs
+# Jobs are stored in the background_job table so they survive restarts. Each
+# process drains the table with one worker thread; a job is claimed with an
+# atomic UPDATE so several gunicorn workers never run the same job twice.
+job_handlers = {}
+
+def job_handler(kind):
+    """Register a function as the handler for a background job kind"""
+    def decorator(f):
+        job_handlers[kind] = f
+        return f
+    return decorator
+
+def add_job(session, kind, **payload):
+    """Add a background job row to a unit of work; returns its id"""
+    job = BackgroundJob(kind=kind, payload=json.dumps(payload))
+    session.add(job)
+    session.flush()
+    return job.id
+
+def dispatch_job(job_id):
+    """Start a committed job: inline in eager mode, otherwise by waking the worker"""
+    if app.config['JOB_QUEUE_MODE'] == 'eager':
+        run_job(job_id)
+    else:
+        job_worker.start()
+        job_worker.wake()
+    return db.session.get(BackgroundJob, job_id)
+
+def enqueue_job(kind, **payload):
+    """Queue a background job; in eager mode it runs before returning"""
+    job_id = write_queue.submit(add_job, kind, wait=True, **payload)
+    return dispatch_job(job_id)
+
+def run_job(job_id):
+    """Claim and run a single pending job; returns False if another worker got it first"""
+    claimed = db.session.execute(
+        db.update(BackgroundJob)
+        .where(BackgroundJob.id == job_id, BackgroundJob.status == 'pending', job_is_due())
+        .values(status='running', started_at=datetime.utcnow(), attempts=BackgroundJob.attempts + 1)
+    ).rowcount
+    db.session.commit()
+    if not claimed:
+        return False
+    
+    job = db.session.get(BackgroundJob, job_id)
+    try:
+        handler = job_handlers[job.kind]
+        result = handler(**json.loads(job.payload or '{}'))
+        job.status = 'done'
+        job.result = json.dumps(result)
+        job.error = None
+    except Exception as e:
+        db.session.rollback()
+        print(f"Background job {job_id} ({job.kind}) error: {e}")
+        job = db.session.get(BackgroundJob, job_id)
+        job.status = 'pending' if job.attempts < app.config['JOB_MAX_ATTEMPTS'] else 'failed'
+        job.error = str(e)
+        # Exponential backoff, so a job that keeps failing does not spin the worker
+        job.run_after = datetime.utcnow() + app.config['JOB_RETRY_DELAY'] * 2 ** (job.attempts - 1)
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    return True
+
+def job_is_due():
+    """Condition for jobs whose retry backoff is over (or that never failed)"""
+    return db.or_(BackgroundJob.run_after.is_(None), BackgroundJob.run_after <= datetime.utcnow())
+
+def run_pending_jobs(limit=None):
+    """Run due queued jobs in creation order until none are left; returns the number run"""
+    count = 0
+    while limit is None or count < limit:
+        job_id = db.session.query(BackgroundJob.id).filter(
+            BackgroundJob.status == 'pending', job_is_due()
+        ).order_by(BackgroundJob.id).limit(1).scalar()
+        if job_id is None:
+            break
+        if run_job(job_id):
+            count += 1
+    return count
+
+def requeue_stale_jobs():
+    """Put jobs left running by a crashed or recycled worker back in the queue"""
+    cutoff = datetime.utcnow() - app.config['JOB_STALE_AFTER']
+    requeued = db.session.execute(
+        db.update(BackgroundJob)
+        .where(BackgroundJob.status == 'running', BackgroundJob.started_at < cutoff)
+        .values(status='pending')
+    ).rowcount
+    db.session.commit()
+    return requeued
+
+# Periodic tasks run on the job worker thread of every process at most once per interval
+periodic_tasks = {}
+
+def periodic_task(name, interval_setting):
+    """Register a function to run every app.config[interval_setting] seconds"""
+    def decorator(f):
+        periodic_tasks[name] = {'func': f, 'interval_setting': interval_setting, 'last_run': None}
+        return f
+    return decorator
+
+def run_periodic_tasks(force=False):
+    """Run the periodic tasks that are due; returns their names"""
+    ran = []
+    for name, task in periodic_tasks.items():
+        interval = app.config[task['interval_setting']]
+        if not interval:
+            continue
+        if force or task['last_run'] is None or time.monotonic() - task['last_run'] >= interval:
+            task['last_run'] = time.monotonic()
+            try:
+                task['func']()
+                ran.append(name)
+            except Exception as e:
+                db.session.rollback()
+                print(f"Periodic task {name} error: {e}")
+    return ran
+
+def wait_for_job(job_id, timeout=30.0):
+    """Block until a job has finished (done or failed) and return it"""
+    deadline = time.monotonic() + timeout
+    while True:
+        status = db.session.query(BackgroundJob.status).filter_by(id=job_id).scalar()
+        if status in ('done', 'failed') or time.monotonic() >= deadline:
+            break
+        job_worker.wake()
+        time.sleep(0.05)
+    db.session.expire_all()
+    return db.session.get(BackgroundJob, job_id)
+
+class JobWorker:
+    """Daemon thread that drains the background job queue for this process"""
+    def __init__(self, flask_app):
+        self.app = flask_app
+        self.thread = None
+        self.pid = None
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+    
+    def start(self):
+        with self.lock:
+            # Threads do not survive fork, so gunicorn workers each start their own
+            if self.thread and self.thread.is_alive() and self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.thread = threading.Thread(target=self.run, name='found-it-jobs', daemon=True)
+            self.thread.start()
+    
+    def wake(self):
+        self.event.set()
+    
+    def stop(self, timeout=10.0):
+        """Let the thread finish its current pass and exit"""
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread and thread.is_alive():
+            self.wake()
+            thread.join(timeout)
+    
+    def run(self):
+        with self.app.app_context():
+            try:
+                requeue_stale_jobs()
+            except Exception as e:
+                print(f"Job worker startup error: {e}")
+            db.session.remove()
+        while self.thread is threading.current_thread():
+            with self.app.app_context():
+                try:
+                    run_pending_jobs()
+                    run_periodic_tasks()
+                except Exception as e:
+                    print(f"Job worker error: {e}")
+                finally:
+                    db.session.remove()
+            self.event.wait(self.app.config['JOB_POLL_INTERVAL'])
+            self.event.clear()
+
+job_worker = JobWorker(app)
+
+class DatabaseReadiness:
+    """Per-process check, on the first request, that the database has been set up.
+    
+    One sqlite_master query tells whether 'flask init-db' has run and whether the
+    item_fts table exists. A database without tables is initialized and seeded on
+    the spot when AUTO_INIT_DB is on, so 'python app.py' works on a fresh checkout.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+    
+    def ensure(self):
+        if self.pid == os.getpid():
+            return
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            with db.engine.connect() as connection:
+                tables = {row[0] for row in connection.execute(db.text(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('user', 'item_fts')"))}
+            if 'user' not in tables and app.config['AUTO_INIT_DB']:
+                print("🔄 Database has no tables yet - running init-db and seed")
+                init_database()
+                seed_database()
+            else:
+                app.config['FTS_AVAILABLE'] = 'item_fts' in tables
+            self.pid = os.getpid()
+
+database_readiness = DatabaseReadiness()
+
+@app.before_request
+def ensure_database_ready():
+    # Registered before the job worker hook so a fresh database exists before any job runs
+    database_readiness.ensure()
+
+@app.before_request
+def start_background_jobs():
+    # Pick up jobs queued before a restart as soon as the worker serves traffic
+    if app.config['JOB_QUEUE_MODE'] == 'thread':
+        job_worker.start()
+
+@job_handler('match_item')
+def match_item_job(item_id):
+    """Match one item against the index and bring its stored matches up to date.
+    
+    Queued when an item is posted, and by the change hooks below when it is added,
+    edited, approved or unapproved, or changes status. Items that are neither lost
+    nor found (claimed, archived, ...) no longer match anything. Pairs are kept when
+    either side is approved, as in rematch_all, and the items it is already matched
+    with are always re-scored, so stored pairs never outlive what they were based on.
+    """
+    item = db.session.get(Item, item_id)
+    if not item:
+        return {'matches': 0}
+    
+    partner_ids = {other_id for pair in db.session.query(ItemMatch.item1_id, ItemMatch.item2_id).filter(
+        db.or_(ItemMatch.item1_id == item.id, ItemMatch.item2_id == item.id)) for other_id in pair} - {item.id}
+    candidates = []
+    if item.status in MATCH_POOLS:
+        candidates = smart_matcher.match_candidates(item, approved_only=not item.is_approved)
+        opposite_status = 'lost' if item.status == 'found' else 'found'
+        missing = partner_ids - {candidate.id for candidate in candidates}
+        if missing:
+            candidates += [other for other in Item.query.filter(Item.id.in_(missing)).order_by(Item.id)
+                           if other.status == opposite_status and (item.is_approved or other.is_approved)]
+    matches = smart_matcher.score_candidates(item, candidates)
+    found = [(match['item'].id, match['similarity'], match['match_type']) for match in matches]
+    scored = partner_ids | {candidate.id for candidate in candidates}
+    
+    # Matches and admin notifications are written in one unit of work
+    write_queue.submit(store_matches, item.id, item.title, found, scored, wait=True)
+    return {'matches': len(matches)}
+
+def store_matches(session, item_id, item_title, found, scored):
+    """Bring the stored matches of one item in line with found [(other item id, similarity, match type)].
+    
+    A pair is stored once, in either direction: existing rows are updated in place, pairs
+    with an item in scored that no longer qualify are deleted and new ones are added with
+    this item as item1. Pairs with items that were not scored (say, stored by another job
+    in the meantime) are left alone. Only new pairs are announced, so re-matching after
+    edits and job retries stay quiet.
+    """
+    found = {other_id: (similarity, match_type) for other_id, similarity, match_type in found}
+    matched = len(found)
+    existing = session.query(ItemMatch).filter(
+        db.or_(ItemMatch.item1_id == item_id, ItemMatch.item2_id == item_id)
+    ).order_by(ItemMatch.id).all()
+    seen = set()
+    for item_match in existing:
+        other_id = item_match.item2_id if item_match.item1_id == item_id else item_match.item1_id
+        if other_id in seen:
+            session.delete(item_match)  # A duplicate of a pair already seen
+            continue
+        seen.add(other_id)
+        if other_id not in found:
+            if other_id in scored:
+                session.delete(item_match)
+            continue
+        similarity, match_type = found.pop(other_id)
+        if item_match.similarity_score != similarity or item_match.match_type != match_type:
+            item_match.similarity_score = similarity
+            item_match.match_type = match_type
+    for item2_id, (similarity, match_type) in found.items():
+        item_match = ItemMatch(
+            item1_id=item_id,
+            item2_id=item2_id,
+            similarity_score=similarity,
+            match_type=match_type
+        )
+        session.add(item_match)
+    
+    # Notify admin about new matches
+    if found:
+        match_count = len(found)
+        add_admin_event(
+            session,
+            f'New Match Found - {item_title}',
+            f'Found {match_count} potential match(es) for "{item_title}". Check the matches section.',
+            'match'
+        )
+    return matched
+
+# Change capture for matching
+# Every flush notes the items it inserts or changes in one of MATCH_COLUMNS, and the
+# commit adds a match_item job for each of them in the same transaction (unless one
+# is already pending), so edits, approvals, status changes and claims re-match just
+# the affected item. Jobs run on the worker; in eager mode before the response is sent,
+# flagged in the info of the session that committed them, so each request only runs
+# the jobs its own writes queued.
+
+@db.event.listens_for(db.session, 'after_flush')
+def capture_item_changes(session, flush_context):
+    changed = session.info.setdefault('rematch_item_ids', set())
+    for target in session.new:
+        if isinstance(target, Item):
+            changed.add(target.id)
+    for target in session.dirty:
+        if isinstance(target, Item) and target not in session.deleted:
+            state = db.inspect(target)
+            if any(state.attrs[column].history.has_changes() for column in MATCH_COLUMNS):
+                changed.add(target.id)
+    for target in session.deleted:
+        if isinstance(target, Item):
+            changed.discard(target.id)
+
+@db.event.listens_for(db.session, 'before_commit')
+def queue_rematch_jobs(session):
+    session.flush()  # Capture whatever is still pending
+    item_ids = session.info.pop('rematch_item_ids', None)
+    if not item_ids:
+        return
+    pending = session.query(BackgroundJob.payload).filter(
+        BackgroundJob.kind == 'match_item', BackgroundJob.status == 'pending'
+    )
+    queued = {json.loads(payload).get('item_id') for payload, in pending}
+    for item_id in sorted(item_ids - queued):
+        session.add(BackgroundJob(kind='match_item', payload=json.dumps({'item_id': item_id})))
+    session.flush()
+    session.info.pop('rematch_item_ids', None)  # Adding the jobs captured nothing new
+    session.info['queued_rematch_jobs'] = True
+
+@db.event.listens_for(db.session, 'after_commit')
+def dispatch_rematch_jobs(session):
+    if session.info.pop('queued_rematch_jobs', False):
+        session.info['captured_jobs'] = True
+        if app.config['JOB_QUEUE_MODE'] == 'thread':
+            job_worker.wake()
+
+@db.event.listens_for(db.session, 'after_rollback')
+def forget_item_changes(session):
+    session.info.pop('rematch_item_ids', None)
+    session.info.pop('queued_rematch_jobs', None)
+
+@app.before_request
+def reset_captured_jobs():
+    # Requests inside an outer app context (tests, CLI) share its session
+    db.session.info.pop('captured_jobs', None)
+
+@app.after_request
+def run_captured_jobs(response):
+    # Eager mode: jobs queued by this request's writes run before the response goes out
+    if db.session.info.pop('captured_jobs', False) and app.config['JOB_QUEUE_MODE'] == 'eager':
+        run_pending_jobs()
+    return response
+
+@job_handler('image_variants')
+def image_variants_job(item_id):
+    """Resize an item's uploaded image into the responsive variants used by the listings and hash it for matching"""
+    item = db.session.get(Item, item_id)
+    if Image is None or not item or not item.image_path:
+        return {'variants': 0}
+    image_path = item.image_path
+    variants, image_hash = build_image_variants(item_id, image_path)
+    stale = write_queue.submit(store_image_variants, item_id, image_path, json.dumps(variants), image_hash, wait=True)
+    if stale is not None:
+        remove_image_variants(stale)
+    return {'variants': len(variants), 'image_hash': image_hash}
+
+def store_image_variants(session, item_id, image_path, variants_json, image_hash=None):
+    """Save new variants and photo hash unless the image was replaced meanwhile; returns the variants they replace"""
+    item = session.get(Item, item_id)
+    if not item or item.image_path != image_path:
+        return variants_json  # Outdated, so the files just written are the stale ones
+    stale = item.image_variants if item.image_variants != variants_json else None
+    item.image_variants = variants_json
+    item.image_hash = image_hash
+    return stale
+
+@periodic_task('analytics_snapshot', 'ANALYTICS_SNAPSHOT_INTERVAL')
 def update_analytics():
     """Update daily analytics"""
     today = datetime.now().date()
@@ -335,15 +2248,40 @@ def update_analytics():
         db.session.add(analytics)
     
     # Update counts
-    analytics.total_items = Item.query.count()
-    analytics.found_items = Item.query.filter_by(status='found').count()
-    analytics.lost_items = Item.query.filter_by(status='lost').count()
-    analytics.claimed_items = Item.query.filter_by(status='claimed').count()
-    analytics.matches_found = ItemMatch.query.count()
+    counters = get_counters()
+    analytics.total_items = counters['items.total']
+    analytics.found_items = counters['items.status.found']
+    analytics.lost_items = counters['items.status.lost']
+    analytics.claimed_items = counters['items.status.claimed']
+    analytics.matches_found = counters['matches.total']
     analytics.new_users = User.query.filter(User.created_at >= today).count()
     
     db.session.commit()
 
+@periodic_task('prune_notifications', 'NOTIFICATION_PRUNE_INTERVAL')
+def prune_notifications(batch_size=None):
+    """Delete read notifications older than NOTIFICATION_RETENTION, one short transaction per batch"""
+    batch_size = batch_size or app.config['NOTIFICATION_PRUNE_BATCH']
+    cutoff = datetime.utcnow() - app.config['NOTIFICATION_RETENTION']
+    table = Notification.__table__
+    pruned = 0
+    while True:
+        batch = db.select(table.c.id).where(table.c.is_read == True, table.c.created_at < cutoff).limit(batch_size)
+        deleted = db.session.execute(table.delete().where(table.c.id.in_(batch.scalar_subquery()))).rowcount
+        apply_counter_deltas(db.session.connection(), {'notifications.total': -deleted, 'notifications.is_read.1': -deleted})
+        db.session.commit()
+        pruned += deleted
+        if deleted < batch_size:
+            return pruned
+
+@periodic_task('database_backup', 'BACKUP_INTERVAL')
+def scheduled_backup():
+    """Back up the database unless any worker process already did within the interval"""
+    newest = backup_files(app.config['BACKUP_DIR'], DATABASE_PATH)[:1]
+    if newest and time.time() - os.path.getmtime(newest[0]) < app.config['BACKUP_INTERVAL']:
+        return None
+    return backup_database()
+
 def get_analytics_data():
     """Get analytics data for dashboard"""
     # Last 30 days
@@ -370,29 +2308,121 @@ def nl2br_filter(text):
         return text.replace('\n', '<br>')
     return text
 
+# Responsive image helpers for item cards
+@app.template_global()
+def image_srcset(item, image_format='webp'):
+    """srcset value listing every stored variant of an item image"""
+    variants = json.loads(item.image_variants or '{}')
+    return ', '.join(f"{url_for('static', filename=v[image_format])} {v['width']}w"
+                     for v in sorted(variants.values(), key=lambda v: v['width']))
+
+@app.template_global()
+def image_variant(item, name='card'):
+    """One stored variant of an item image, or None before the variants have been built"""
+    return json.loads(item.image_variants or '{}').get(name)
+
+# Static assets
+# Paths that embed their content hash already, so they are immutable without a ?v= fingerprint
+CONTENT_ADDRESSED_PREFIXES = ('uploads/blobs/', 'uploads/variants/')
+STATIC_ENCODINGS = [('br', '.br'), ('gzip', '.gz')]  # Preferred first
+static_fingerprints = {}  # filename -> ((mtime_ns, size), hash prefix)
+
+def static_fingerprint(filename):
+    """Short content hash of a file under static/, recomputed only when its mtime or size changes"""
+    path = safe_join(app.static_folder, filename)
+    try:
+        stat = os.stat(path) if path else None
+    except OSError:
+        stat = None
+    if stat is None:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = static_fingerprints.get(filename)
+    if cached and cached[0] == key:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    static_fingerprints[filename] = (key, digest.hexdigest()[:12])
+    return static_fingerprints[filename][1]
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    # url_for('static', filename=...) -> /static/<filename>?v=<content hash>
+    if endpoint == 'static' and 'v' not in values:
+        filename = values.get('filename') or ''
+        if not filename.startswith(CONTENT_ADDRESSED_PREFIXES):
+            fingerprint = static_fingerprint(filename)
+            if fingerprint:
+                values['v'] = fingerprint
+
+def serve_static(filename):
+    """Static files, cached forever when the URL is fingerprinted and precompressed when the client accepts it"""
+    immutable = filename.startswith(CONTENT_ADDRESSED_PREFIXES) or (
+        request.args.get('v') is not None and request.args.get('v') == static_fingerprint(filename))
+    max_age = app.config['STATIC_IMMUTABLE_MAX_AGE'] if immutable else None
+    compressible = filename.rsplit('.', 1)[-1].lower() in app.config['STATIC_COMPRESS_EXTENSIONS']
+    
+    response = None
+    source = safe_join(app.static_folder, filename)
+    if compressible and source and os.path.isfile(source):
+        for encoding, suffix in STATIC_ENCODINGS:
+            compressed = source + suffix
+            if (request.accept_encodings[encoding] and os.path.isfile(compressed)
+                    and os.path.getmtime(compressed) >= os.path.getmtime(source)):
+                response = send_from_directory(app.static_folder, filename + suffix, max_age=max_age,
+                                               mimetype=mimetypes.guess_type(filename)[0])
+                response.content_encoding = encoding
+                break
+    if response is None:
+        response = send_from_directory(app.static_folder, filename, max_age=max_age)
+    if compressible:
+        response.vary.add('Accept-Encoding')
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    return response
+
+app.view_functions['static'] = serve_static
+
+def precompress_static(force=False):
+    """Write .gz (and .br with brotli installed) copies of compressible static assets that changed; returns their count"""
+    written = 0
+    for root, dirs, files in os.walk(app.static_folder):
+        # Uploads are images, already compressed
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != os.path.join(app.static_folder, 'uploads')]
+        for name in files:
+            if name.rsplit('.', 1)[-1].lower() not in app.config['STATIC_COMPRESS_EXTENSIONS']:
+                continue
+            source = os.path.join(root, name)
+            with open(source, 'rb') as f:
+                data = None
+                for encoding, suffix in STATIC_ENCODINGS:
+                    if encoding == 'br' and brotli is None:
+                        continue
+                    target = source + suffix
+                    if not force and os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source):
+                        continue
+                    data = data if data is not None else f.read()
+                    compressed = brotli.compress(data, quality=11) if encoding == 'br' else gzip.compress(data, 9, mtime=0)
+                    with open(target, 'wb') as out:
+                        out.write(compressed)
+                    written += 1
+    return written
+
 # Context processor to make system_info available globally
 @app.context_processor
 def inject_system_info():
-    try:
-        with app.app_context():
-            system_info = get_system_info()
-            if system_info:
-                return {'system_info': system_info}
-            else:
-                raise Exception("SystemInfo not found")
-    except Exception as e:
-        print(f"Context processor error: {e}")
-        # Fallback if system_info fails
-        fallback_info = type('SystemInfo', (), {
-            'site_name': 'FOUND IT',
-            'about_content': 'Welcome to FOUND IT - Your Smart Lost and Found System!',
-            'contact_email': 'admin@foundit.com',
-            'contact_phone': '+234 810 678 1706',
-            'contact_address': 'ABU Zaria, Main Campus, Nigeria'
-        })()
-        return {'system_info': fallback_info}
+    return {'system_info': get_system_info()}
 
 # Error handlers
+@app.errorhandler(413)
+def request_too_large(error):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)
+    flash(f'The upload is too large. Images can be at most {limit_mb} MB.', 'error')
+    return redirect(request.url)
+
 @app.errorhandler(500)
 def internal_error(error):
     try:
@@ -442,65 +2472,138 @@ def forbidden_error(error):
         """, 403
 
 # Public Routes
+# Conditional GET for polled pages and APIs
+release_tokens = []
+
+def release_token():
+    """Fingerprint of the templates and static assets this process renders pages with"""
+    if not release_tokens:
+        stamps = []
+        for folder in (app.template_folder, app.static_folder):
+            root_folder = os.path.join(app.root_path, folder)
+            for root, dirs, files in os.walk(root_folder):
+                dirs[:] = [d for d in dirs if os.path.join(root, d) != os.path.join(app.static_folder, 'uploads')]
+                for name in files:
+                    stat = os.stat(os.path.join(root, name))
+                    stamps.append((os.path.relpath(os.path.join(root, name), app.root_path), stat.st_mtime_ns, stat.st_size))
+        release_tokens.append(format(zlib.crc32(repr(sorted(stamps)).encode()), '08x'))
+    return release_tokens[0]
+
+def conditional_get(*tables, page=False):
+    """Answer GETs with 304 Not Modified while none of the tables the view reads has changed.
+    
+    The strong ETag covers the URL and the tables' version counters, plus the templates
+    and logged-in user for HTML pages. APIs also get Last-Modified. The check costs one
+    stat_counter query and runs before the view, so an unchanged poll skips the heavy work.
+    A callable in tables is called on every request and returns more table names, for
+    views whose data source depends on configuration.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if page and session.get('_flashes'):
+                return f(*args, **kwargs)  # Flash messages show once, so this render is never reused
+            names = [name for table in tables for name in (table() if callable(table) else [table])]
+            versions = data_versions(names)
+            if 'settings' in names:
+                # Rendered from the process-wide snapshot: reload it now if another worker saved settings
+                system_info_cache.get(versions[names.index('settings')])
+            parts = [request.full_path, names, versions]
+            if page:
+                parts += [session.get('_user_id'), release_token()]
+            etag = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+            
+            # Last-Modified has one second resolution: only offer it once that second is over,
+            # so a later write can never share it (pages depend on more than the versions)
+            last_modified = None
+            newest = max(versions)
+            if not page and newest and time.time() * 1000 - newest >= 1000:
+                last_modified = datetime.fromtimestamp(newest // 1000, timezone.utc)
+            
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = bool(last_modified and request.if_modified_since
+                                    and last_modified <= request.if_modified_since)
+            response = Response(status=304) if not_modified else app.make_response(f(*args, **kwargs))
+            if response.status_code in (200, 304):
+                response.set_etag(etag)
+                if last_modified:
+                    response.last_modified = last_modified
+                response.cache_control.no_cache = True  # Clients keep the copy but revalidate it
+                if page:
+                    response.cache_control.private = True
+            return response
+        return decorated_function
+    return decorator
+
 @app.route('/')
+@conditional_get('items', 'categories', 'settings', 'users', page=True)
 def home():
     categories = Category.query.all()
     # Only show active items (found/lost/recovered) on public pages
-    items = Item.query.filter(
+    items = Item.query.options(db.joinedload(Item.category)).filter(
         Item.is_approved == True,
         Item.status.in_(['found', 'lost', 'recovered'])
     ).order_by(Item.created_at.desc()).limit(10).all()
+    category_counts = public_category_counts()
     system_info = get_system_info()
     
-    # Update analytics
-    update_analytics()
-    
-    return render_template('public/home.html', items=items, categories=categories, system_info=system_info)
+    # Analytics snapshots are taken by the background worker, keeping this page read-only
+    return render_template('public/home.html', items=items, categories=categories,
+                         category_counts=category_counts, system_info=system_info)
 
 @app.route('/items')
+@conditional_get('items', 'categories', 'settings', 'users', page=True)
 def items():
     # Enhanced search and filtering
     search = request.args.get('search', '')
     category_id = request.args.get('category', '')
     status = request.args.get('status', '')
     sort_by = request.args.get('sort', 'newest')
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', app.config['ITEMS_PER_PAGE'], type=int)
+    per_page = max(1, min(per_page, app.config['ITEMS_MAX_PER_PAGE']))
     
     # Only show active items (found/lost/recovered) on public pages
-    query = Item.query.filter(
+    query = Item.query.options(db.joinedload(Item.category)).filter(
         Item.is_approved == True,
         Item.status.in_(['found', 'lost', 'recovered'])
     )
     
+    rank = None
     if search:
-        query = query.filter(
-            db.or_(
-                Item.title.ilike(f'%{search}%'),
-                Item.description.ilike(f'%{search}%'),
-                Item.location.ilike(f'%{search}%'),
-                Item.brand.ilike(f'%{search}%'),
-                Item.model.ilike(f'%{search}%')
-            )
-        )
+        query, rank = search_items(query, search, ['title', 'description', 'location', 'brand', 'model'])
     
     if category_id:
-        query = query.filter_by(category_id=category_id)
+        query = query.filter(Item.category_id == category_id)
     
     if status and status in ['found', 'lost', 'recovered']:
-        query = query.filter_by(status=status)
+        query = query.filter(Item.status == status)
     
-    # Sorting
-    if sort_by == 'newest':
+    # Sorting (relevance needs full-text search; otherwise it behaves like newest)
+    if sort_by == 'relevance' and rank is not None:
+        query = query.order_by(rank, Item.created_at.desc())
+    elif sort_by in ('newest', 'relevance'):
         query = query.order_by(Item.created_at.desc())
     elif sort_by == 'oldest':
         query = query.order_by(Item.created_at.asc())
     elif sort_by == 'title':
         query = query.order_by(Item.title.asc())
     
-    items = query.all()
+    # Stable order within equal sort keys so pages never overlap
+    query = query.order_by(Item.id.desc())
+    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     categories = Category.query.all()
+    category_counts = public_category_counts()
     system_info = get_system_info()
     
-    return render_template('public/items.html', items=items, categories=categories, 
+    # Current filters, carried over by the pagination links
+    filters = {key: value for key, value in [('search', search), ('category', category_id), ('status', status),
+                                             ('sort', sort_by), ('per_page', request.args.get('per_page'))] if value}
+    
+    return render_template('public/items.html', items=pagination.items, pagination=pagination,
+                         filters=filters, categories=categories, category_counts=category_counts,
                          search=search, selected_category=category_id, selected_status=status, 
                          sort_by=sort_by, system_info=system_info)
 
@@ -548,60 +2651,32 @@ def post_item():
         
         # Handle image upload (optional - gracefully handle errors)
         try:
-            if 'image' in request.files:
-                file = request.files['image']
-                if file and file.filename:
-                    # Ensure upload directory exists
-                    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-                    
-                    # Validate file type
-                    allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-                    if '.' in file.filename and file.filename.rsplit('.', 1)[1].lower() in allowed_extensions:
-                        filename = secure_filename(file.filename)
-                        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                        file.save(file_path)
-                        item.image_path = f'uploads/{filename}'
-                    else:
-                        flash('Invalid file type. Please upload an image (PNG, JPG, JPEG, GIF, WEBP).', 'warning')
+            file = request.files.get('image')
+            if file and file.filename:
+                item.image_path = save_uploaded_image(file)
+        except ValueError as e:
+            flash(str(e), 'warning')
         except Exception as e:
             # Log error but don't fail the entire submission
             print(f"Image upload error: {e}")
             flash('Image upload failed, but item was posted successfully.', 'warning')
         
-        db.session.add(item)
-        db.session.commit()
-        
-        # Find potential matches immediately
-        matches = smart_matcher.find_matches(item)
-        
-        # Create matches in database
-        for match in matches:
-            item_match = ItemMatch(
-                item1_id=item.id,
-                item2_id=match['item'].id,
-                similarity_score=match['similarity'],
-                match_type=match['match_type']
-            )
-            db.session.add(item_match)
+        # The item and its background jobs are written in one group commit
+        job_ids = write_queue.submit(add_posted_item, item, wait=True)
         
-        db.session.commit()
+        # Image resizing, matching, match storage and admin notifications run after the response is sent
+        for job_id in job_ids[:-1]:
+            dispatch_job(job_id)
+        job = dispatch_job(job_ids[-1])
         
-        # Create notifications for matches
-        if matches:
-            match_count = len(matches)
-            flash(f'Item posted successfully! Found {match_count} potential match(es).', 'success')
-            
-            # Notify admin about matches
-            admin_users = User.query.filter_by(role='admin').all()
-            for admin in admin_users:
-                create_notification(
-                    admin.id,
-                    f'New Match Found - {item.title}',
-                    f'Found {match_count} potential match(es) for "{item.title}". Check the matches section.',
-                    'match'
-                )
+        if job.status == 'done':
+            match_count = json.loads(job.result)['matches']
+            if match_count:
+                flash(f'Item posted successfully! Found {match_count} potential match(es).', 'success')
+            else:
+                flash('Item posted successfully! It will be reviewed by admin.', 'success')
         else:
-            flash('Item posted successfully! It will be reviewed by admin.', 'success')
+            flash('Item posted successfully! We are checking for potential matches.', 'success')
         
         return redirect(url_for('items'))
     
@@ -609,6 +2684,14 @@ def post_item():
     system_info = get_system_info()
     return render_template('public/post_item.html', categories=categories, system_info=system_info)
 
+def add_posted_item(session, item):
+    session.add(item)
+    session.flush()
+    # The photo is resized and hashed first so matching can compare it
+    job_ids = [add_job(session, 'image_variants', item_id=item.id)] if item.image_path else []
+    job_ids.append(add_job(session, 'match_item', item_id=item.id))
+    return job_ids
+
 @app.route('/about')
 def about():
     system_info = get_system_info()
@@ -653,69 +2736,124 @@ def item_matches(id):
     
     return render_template('public/item_matches.html', item=item, matches=matches)
 
+def persisted_match_tables():
+    """Stored match rows feed /api/matches only when MATCH_RESULTS_SOURCE is 'persisted'"""
+    return ['matches'] if app.config['MATCH_RESULTS_SOURCE'] == 'persisted' else []
+
 @app.route('/api/matches/<int:item_id>')
+@conditional_get('items', 'categories', persisted_match_tables)
 def api_item_matches(item_id):
     """API endpoint for getting matches for an item"""
     item = Item.query.get_or_404(item_id)
-    matches = smart_matcher.find_matches(item)
-    
     return jsonify({
         'item_id': item_id,
-        'matches': [
-            {
-                'id': match['item'].id,
-                'title': match['item'].title,
-                'description': match['item'].description,
-                'similarity': match['similarity'],
-                'match_type': match['match_type'],
-                'status': match['item'].status,
-                'location': match['item'].location
-            }
-            for match in matches
-        ]
+        'matches': cached_matches(item)
     })
 
+def search_result(item):
+    """JSON representation of an item in search results"""
+    return {
+        'id': item.id,
+        'title': item.title,
+        'description': item.description,
+        'status': item.status,
+        'location': item.location,
+        'category': item.category.name,
+        'created_at': item.created_at.isoformat()
+    }
+
+def encode_cursor(sort_by, values):
+    """Opaque pagination cursor holding the sort key of the last row sent"""
+    return base64.urlsafe_b64encode(json.dumps({'sort': sort_by, 'key': values}).encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor, sort_by):
+    """Inverse of encode_cursor; raises ValueError for malformed or mismatched cursors"""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        key = data['key']
+        if data['sort'] != sort_by:
+            raise ValueError('cursor was issued for a different sort order')
+        # created_at is stored as ISO text; it is second to last in every key
+        key[-2] = datetime.fromisoformat(key[-2])
+        return key
+    except (KeyError, TypeError, IndexError, UnicodeError, json.JSONDecodeError, binascii.Error) as e:
+        raise ValueError(f'invalid cursor: {e}')
+
+def keyset_filter(order, values):
+    """Condition selecting rows strictly after values in an ordering of (column, descending) pairs"""
+    if all(descending for _, descending in order):
+        # Row-value comparison lets SQLite seek straight to the cursor position in an index
+        return db.tuple_(*[column for column, _ in order]) < db.tuple_(*values)
+    clauses = []
+    for i, (column, descending) in enumerate(order):
+        equal = [order[j][0] == values[j] for j in range(i)]
+        clauses.append(db.and_(*equal, column < values[i] if descending else column > values[i]))
+    return db.or_(*clauses)
+
 @app.route('/api/search')
+@conditional_get('items', 'categories')
 def api_search():
     """API endpoint for advanced search"""
     query = request.args.get('q', '')
     category = request.args.get('category', '')
     status = request.args.get('status', '')
+    sort_by = request.args.get('sort', 'newest')
     
     items_query = Item.query.filter_by(is_approved=True)
     
+    rank = None
     if query:
-        items_query = items_query.filter(
-            db.or_(
-                Item.title.ilike(f'%{query}%'),
-                Item.description.ilike(f'%{query}%'),
-                Item.brand.ilike(f'%{query}%'),
-                Item.model.ilike(f'%{query}%'),
-                Item.color.ilike(f'%{query}%')
-            )
-        )
+        items_query, rank = search_items(items_query, query, ['title', 'description', 'brand', 'model', 'color'])
     
     if category:
-        items_query = items_query.filter_by(category_id=category)
+        items_query = items_query.filter(Item.category_id == category)
     
     if status:
-        items_query = items_query.filter_by(status=status)
+        items_query = items_query.filter(Item.status == status)
+    
+    # Keyset pagination: rows are ordered by a unique key and the cursor holds the last key sent
+    relevance = sort_by == 'relevance' and rank is not None
+    if relevance:
+        order = [(rank, False), (Item.created_at, True), (Item.id, True)]
+    else:
+        order = [(Item.created_at, True), (Item.id, True)]
+    items_query = items_query.options(db.joinedload(Item.category)).order_by(
+        *[column.desc() if descending else column for column, descending in order]
+    )
+    if relevance:
+        items_query = items_query.add_columns(rank)
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            items_query = items_query.filter(keyset_filter(order, decode_cursor(cursor, 'relevance' if relevance else 'newest')))
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    limit = request.args.get('limit', type=int)
     
-    items = items_query.order_by(Item.created_at.desc()).all()
+    # NDJSON streams every row (or up to limit) from a server-side cursor with flat memory use
+    if request.args.get('format') == 'ndjson':
+        if limit:
+            items_query = items_query.limit(limit)
+        
+        def generate():
+            for row in items_query.yield_per(500):
+                yield json.dumps(search_result(row[0] if relevance else row)) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    limit = max(1, min(limit or app.config['API_SEARCH_PAGE_SIZE'], app.config['API_SEARCH_MAX_PAGE_SIZE']))
+    rows = items_query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0] if relevance else rows[-1]
+        key = [last.created_at.isoformat(), last.id]
+        next_cursor = encode_cursor('relevance', [rows[-1][1]] + key) if relevance else encode_cursor('newest', key)
     
     return jsonify({
-        'items': [
-            {
-                'id': item.id,
-                'title': item.title,
-                'description': item.description,
-                'status': item.status,
-                'location': item.location,
-                'category': item.category.name,
-                'created_at': item.created_at.isoformat()
-            }
-            for item in items
-        ]
+        'items': [search_result(row[0] if relevance else row) for row in rows],
+        'next_cursor': next_cursor
     })
 
 @app.route('/api/analytics')
@@ -728,25 +2866,45 @@ def api_analytics():
     analytics_data = get_analytics_data()
     
     # Additional statistics
-    total_items = Item.query.count()
-    found_items = Item.query.filter_by(status='found').count()
-    lost_items = Item.query.filter_by(status='lost').count()
-    claimed_items = Item.query.filter_by(status='claimed').count()
-    total_matches = ItemMatch.query.count()
-    total_users = User.query.count()
+    counters = get_counters()
     
     return jsonify({
         'analytics': analytics_data,
         'summary': {
-            'total_items': total_items,
-            'found_items': found_items,
-            'lost_items': lost_items,
-            'claimed_items': claimed_items,
-            'total_matches': total_matches,
-            'total_users': total_users
+            'total_items': counters['items.total'],
+            'found_items': counters['items.status.found'],
+            'lost_items': counters['items.status.lost'],
+            'claimed_items': counters['items.status.claimed'],
+            'total_matches': counters['matches.total'],
+            'total_users': counters['users.total']
         }
     })
 
+@app.route('/api/jobs')
+@login_required
+def api_jobs():
+    """API endpoint for background job queue status"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    counts = dict(db.session.query(BackgroundJob.status, db.func.count(BackgroundJob.id)).group_by(BackgroundJob.status).all())
+    recent = BackgroundJob.query.order_by(BackgroundJob.id.desc()).limit(20).all()
+    return jsonify({
+        'mode': app.config['JOB_QUEUE_MODE'],
+        'counts': {status: counts.get(status, 0) for status in ['pending', 'running', 'done', 'failed']},
+        'recent': [job.to_dict() for job in recent]
+    })
+
+@app.route('/api/jobs/<int:job_id>')
+@login_required
+def api_job_status(job_id):
+    """API endpoint for the status of a single background job"""
+    if current_user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    
+    job = BackgroundJob.query.get_or_404(job_id)
+    return jsonify(job.to_dict())
+
 # Custom decorator for admin-only access
 def admin_required(f):
     @wraps(f)
@@ -869,20 +3027,8 @@ def admin_logout():
 @app.route('/admin/dashboard')
 @admin_required
 def admin_dashboard():
-    # Update analytics
-    update_analytics()
-    
-    # Basic statistics
-    total_items = Item.query.count()
-    found_items = Item.query.filter_by(status='found').count()
-    lost_items = Item.query.filter_by(status='lost').count()
-    claimed_items = Item.query.filter_by(status='claimed').count()
-    archived_items = Item.query.filter_by(status='archived').count()
-    total_categories = Category.query.count()
-    total_users = User.query.count()
-    total_messages = Message.query.count()
-    unread_messages = Message.query.filter_by(is_read=False).count()
-    total_matches = ItemMatch.query.count()
+    # Basic statistics (daily snapshots come from the analytics_snapshot periodic task)
+    counters = get_counters()
     
     # Recent activity
     recent_items = Item.query.order_by(Item.created_at.desc()).limit(5).all()
@@ -892,25 +3038,19 @@ def admin_dashboard():
     # Analytics data for charts
     analytics_data = get_analytics_data()
     
-    # Unread notifications
-    unread_notifications = Notification.query.filter_by(is_read=False).count()
-    
-    # Pending claims
-    pending_claims = Claim.query.filter_by(status='pending').count()
-    
     return render_template('admin/dashboard.html', 
-                         total_items=total_items,
-                         found_items=found_items,
-                         lost_items=lost_items,
-                         claimed_items=claimed_items,
-                         archived_items=archived_items,
-                         total_categories=total_categories,
-                         total_users=total_users,
-                         total_messages=total_messages,
-                         unread_messages=unread_messages,
-                         total_matches=total_matches,
-                         unread_notifications=unread_notifications,
-                         pending_claims=pending_claims,
+                         total_items=counters['items.total'],
+                         found_items=counters['items.status.found'],
+                         lost_items=counters['items.status.lost'],
+                         claimed_items=counters['items.status.claimed'],
+                         archived_items=counters['items.status.archived'],
+                         total_categories=counters['categories.total'],
+                         total_users=counters['users.total'],
+                         total_messages=counters['messages.total'],
+                         unread_messages=counters['messages.is_read.0'],
+                         total_matches=counters['matches.total'],
+                         unread_notifications=counters['notifications.is_read.0'],
+                         pending_claims=counters['claims.status.pending'],
                          recent_items=recent_items,
                          recent_matches=recent_matches,
                          recent_claims=recent_claims,
@@ -992,26 +3132,17 @@ def add_item():
             status=status,
             location=location,
             contact_info=contact_info,
+            keywords=','.join(smart_matcher.extract_keywords((title or '') + ' ' + (description or ''))),
             is_approved=is_approved
         )
         
         # Handle image upload (optional - gracefully handle errors)
         try:
-            if 'image' in request.files:
-                file = request.files['image']
-                if file and file.filename:
-                    # Ensure upload directory exists
-                    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-                    
-                    # Validate file type
-                    allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-                    if '.' in file.filename and file.filename.rsplit('.', 1)[1].lower() in allowed_extensions:
-                        filename = secure_filename(file.filename)
-                        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                        file.save(file_path)
-                        item.image_path = f'uploads/{filename}'
-                    else:
-                        flash('Invalid file type. Please upload an image (PNG, JPG, JPEG, GIF, WEBP).', 'warning')
+            file = request.files.get('image')
+            if file and file.filename:
+                item.image_path = save_uploaded_image(file)
+        except ValueError as e:
+            flash(str(e), 'warning')
         except Exception as e:
             # Log error but don't fail the entire submission
             print(f"Image upload error: {e}")
@@ -1019,6 +3150,8 @@ def add_item():
         
         db.session.add(item)
         db.session.commit()
+        if item.image_path:
+            enqueue_job('image_variants', item_id=item.id)
         flash('Item added successfully!', 'success')
         return redirect(url_for('admin_items'))
     
@@ -1032,35 +3165,33 @@ def edit_item(id):
     if request.method == 'POST':
         item.title = request.form.get('title')
         item.description = request.form.get('description')
-        item.category_id = request.form.get('category_id')
+        item.category_id = request.form.get('category_id', type=int)  # An int, so an unchanged category is not a change
         item.status = request.form.get('status')
         item.location = request.form.get('location')
         item.contact_info = request.form.get('contact_info')
         item.is_approved = 'is_approved' in request.form
+        item.keywords = ','.join(smart_matcher.extract_keywords((item.title or '') + ' ' + (item.description or '')))
+        new_image, stale_variants = False, None
         
         # Handle image upload (optional - gracefully handle errors)
         try:
-            if 'image' in request.files:
-                file = request.files['image']
-                if file and file.filename:
-                    # Ensure upload directory exists
-                    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-                    
-                    # Validate file type
-                    allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-                    if '.' in file.filename and file.filename.rsplit('.', 1)[1].lower() in allowed_extensions:
-                        filename = secure_filename(file.filename)
-                        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                        file.save(file_path)
-                        item.image_path = f'uploads/{filename}'
-                    else:
-                        flash('Invalid file type. Please upload an image (PNG, JPG, JPEG, GIF, WEBP).', 'warning')
+            file = request.files.get('image')
+            if file and file.filename:
+                item.image_path = save_uploaded_image(file)
+                stale_variants, item.image_variants = item.image_variants, None
+                item.image_hash = None  # Hashed again with the new variants
+                new_image = True
+        except ValueError as e:
+            flash(str(e), 'warning')
         except Exception as e:
             # Log error but don't fail the entire submission
             print(f"Image upload error: {e}")
             flash('Image upload failed, but item was updated successfully.', 'warning')
         
         db.session.commit()
+        if new_image:
+            remove_image_variants(stale_variants)
+            enqueue_job('image_variants', item_id=item.id)
         flash('Item updated successfully!', 'success')
         return redirect(url_for('admin_items'))
     
@@ -1071,8 +3202,10 @@ def edit_item(id):
 @login_required
 def delete_item(id):
     item = Item.query.get_or_404(id)
+    variants = item.image_variants
     db.session.delete(item)
     db.session.commit()
+    remove_image_variants(variants)
     flash('Item deleted successfully!', 'success')
     return redirect(url_for('admin_items'))
 
@@ -1204,6 +3337,7 @@ def admin_settings():
     
     system_info = get_system_info()
     if request.method == 'POST':
+        system_info = system_info_row()
         system_info.site_name = request.form.get('site_name')
         system_info.about_content = request.form.get('about_content')
         system_info.contact_email = request.form.get('contact_email')
@@ -1212,11 +3346,37 @@ def admin_settings():
         system_info.updated_at = datetime.utcnow()
         
         db.session.commit()
+        system_info_cache.invalidate()
         flash('Settings updated successfully!', 'success')
         return redirect(url_for('admin_settings'))
     
     return render_template('admin/settings.html', system_info=system_info)
 
+# Database Diagnostics
+@app.route('/admin/diagnostics')
+@admin_required
+def admin_diagnostics():
+    settings = sqlite_settings()
+    files = {}
+    for suffix in ('', '-wal', '-shm'):
+        path = DATABASE_PATH + suffix
+        files[os.path.basename(path)] = os.path.getsize(path) if os.path.exists(path) else None
+    profile = app.config['SQLITE_PROFILE']
+    return render_template('admin/diagnostics.html',
+                         profile=profile if profile in SQLITE_PROFILES else f'{profile} (unknown, using wal)',
+                         configured=SQLITE_PROFILES.get(profile, SQLITE_PROFILES['wal']),
+                         overrides=app.config['SQLITE_PRAGMAS'],
+                         settings=settings,
+                         files=files,
+                         sqlite_version=sqlite3.sqlite_version,
+                         database_path=DATABASE_PATH,
+                         pool_status=db.engine.pool.status(),
+                         write_mode=app.config['WRITE_QUEUE_MODE'],
+                         write_stats=write_queue.stats,
+                         match_source=app.config['MATCH_RESULTS_SOURCE'],
+                         match_cache_stats=match_cache.stats,
+                         match_cache_entries=len(match_cache.entries))
+
 # Match Management
 @app.route('/admin/matches')
 @login_required
@@ -1264,27 +3424,23 @@ def delete_notification(id):
 def admin_analytics():
     analytics_data = get_analytics_data()
     
+    counters = get_counters()
+    
     # Category statistics
     categories = Category.query.all()
     category_stats = []
     for category in categories:
-        item_count = Item.query.filter_by(category_id=category.id).count()
         category_stats.append({
             'name': category.name,
-            'count': item_count
+            'count': counters[f'items.category_id.{category.id}']
         })
     
-    # Match statistics
-    exact_matches = ItemMatch.query.filter_by(match_type='exact').count()
-    similar_matches = ItemMatch.query.filter_by(match_type='similar').count()
-    potential_matches = ItemMatch.query.filter_by(match_type='potential').count()
-    
     return render_template('admin/analytics.html', 
                          analytics_data=analytics_data,
                          category_stats=category_stats,
-                         exact_matches=exact_matches,
-                         similar_matches=similar_matches,
-                         potential_matches=potential_matches)
+                         exact_matches=counters['matches.match_type.exact'],
+                         similar_matches=counters['matches.match_type.similar'],
+                         potential_matches=counters['matches.match_type.potential'])
 
 # Claim Management Routes
 @app.route('/mark_found_by_owner/<int:item_id>')
@@ -1359,14 +3515,12 @@ def claim_item(item_id):
             db.session.commit()
             
             # Notify admins about the claim
-            admin_users = User.query.filter_by(role='admin').all()
-            for admin in admin_users:
-                create_notification(
-                    admin.id,
-                    f'New Item Claim - {item.title}',
-                    f'Item "{item.title}" has been claimed by {claimer_name}. Please review the claim.',
-                    'alert'
-                )
+            write_queue.submit(
+                add_admin_event,
+                f'New Item Claim - {item.title}',
+                f'Item "{item.title}" has been claimed by {claimer_name}. Please review the claim.',
+                'alert'
+            )
             
             flash('Your claim has been submitted successfully! An admin will review it shortly.', 'success')
             return redirect(url_for('items'))
@@ -1467,49 +3621,69 @@ def reject_claim(claim_id):
     
     return render_template('admin/reject_claim.html', claim=claim)
 
-# Initialize database and create default data
-with app.app_context():
-    try:
-        # Create backup before making changes
-        backup_database()
-        
-        # Create all tables
-        db.create_all()
-        print("✅ Database tables created successfully!")
-        
-        # Create default admin user if none exists
-        if not User.query.filter_by(role='admin').first():
-            admin = User(
-                username='admin',
-                email='admin@foundit.com',
-                password_hash=generate_password_hash('admin123'),
-                role='admin'
-            )
-            db.session.add(admin)
-            db.session.commit()
-            print("✅ Default admin user created: username='admin', password='admin123'")
-        
-        # Create default categories if none exist
-        if Category.query.count() == 0:
-            categories = [
-                Category(name='Electronics', description='Phones, laptops, tablets, etc.', icon='fas fa-mobile-alt', color='#007bff'),
-                Category(name='Jewelry', description='Rings, necklaces, watches, etc.', icon='fas fa-gem', color='#ffc107'),
-                Category(name='Clothing', description='Shirts, pants, jackets, etc.', icon='fas fa-tshirt', color='#28a745'),
-                Category(name='Documents', description='IDs, cards, papers, etc.', icon='fas fa-file-alt', color='#dc3545'),
-                Category(name='Keys', description='Car keys, house keys, etc.', icon='fas fa-key', color='#6c757d'),
-                Category(name='Books', description='Textbooks, notebooks, etc.', icon='fas fa-book', color='#17a2b8'),
-                Category(name='Sports', description='Sports equipment, gym items, etc.', icon='fas fa-futbol', color='#fd7e14'),
-                Category(name='Other', description='Miscellaneous items', icon='fas fa-box', color='#6f42c1')
-            ]
-            for category in categories:
-                db.session.add(category)
-            db.session.commit()
-            print("✅ Enhanced default categories created!")
-        
-        # Create system info if it doesn't exist
-        system_info = get_system_info()
-        if not system_info.about_content:
-            system_info.about_content = """
+# Database setup
+# Importing this module only configures the app. Tables, the search index and the
+# default rows are created once per deploy by 'flask init-db' and 'flask seed'
+# (deploy.sh), so gunicorn workers start without touching the database.
+
+def init_database():
+    """Create missing tables, the search index and derived data (counters, match index)"""
+    db.create_all()
+    print("✅ Database tables created successfully!")
+    
+    # Populate the statistics counters for databases created before they existed
+    if not StatCounter.query.first():
+        reconcile_counters()
+    
+    # Full-text search table and triggers
+    app.config['FTS_AVAILABLE'] = setup_search_index()
+    
+    # Build the smart matching index and features for databases created before they existed
+    if not ItemToken.query.first() and Item.query.first():
+        indexed = rebuild_match_index()
+        print(f"✅ Smart matching index built for {indexed} items")
+    if not ItemFeatures.query.first() and Item.query.first():
+        built = rebuild_item_features()
+        print(f"✅ Smart matching features built for {built} items")
+    elif ItemFeatures.query.filter(ItemFeatures.version != smart_matcher.FEATURE_VERSION).first():
+        print("⚠️ Smart matching features are out of date - run 'flask rebuild-features'")
+    print(f"🗄️ Database location: {DATABASE_PATH}")
+
+def seed_database():
+    """Add the default admin user, categories and site information when they are missing"""
+    # Create default admin user if none exists
+    if not User.query.filter_by(role='admin').first():
+        admin = User(
+            username='admin',
+            email='admin@foundit.com',
+            password_hash=generate_password_hash('admin123'),
+            role='admin'
+        )
+        db.session.add(admin)
+        db.session.commit()
+        print("✅ Default admin user created: username='admin', password='admin123'")
+    
+    # Create default categories if none exist
+    if Category.query.count() == 0:
+        categories = [
+            Category(name='Electronics', description='Phones, laptops, tablets, etc.', icon='fas fa-mobile-alt', color='#007bff'),
+            Category(name='Jewelry', description='Rings, necklaces, watches, etc.', icon='fas fa-gem', color='#ffc107'),
+            Category(name='Clothing', description='Shirts, pants, jackets, etc.', icon='fas fa-tshirt', color='#28a745'),
+            Category(name='Documents', description='IDs, cards, papers, etc.', icon='fas fa-file-alt', color='#dc3545'),
+            Category(name='Keys', description='Car keys, house keys, etc.', icon='fas fa-key', color='#6c757d'),
+            Category(name='Books', description='Textbooks, notebooks, etc.', icon='fas fa-book', color='#17a2b8'),
+            Category(name='Sports', description='Sports equipment, gym items, etc.', icon='fas fa-futbol', color='#fd7e14'),
+            Category(name='Other', description='Miscellaneous items', icon='fas fa-box', color='#6f42c1')
+        ]
+        for category in categories:
+            db.session.add(category)
+        db.session.commit()
+        print("✅ Enhanced default categories created!")
+    
+    # Create system info if it doesn't exist
+    system_info = system_info_row()
+    if not system_info.about_content:
+        system_info.about_content = """
             Welcome to FOUND IT - Your Smart Lost and Found System!
             
             Our AI-powered platform helps you find lost items and return found ones quickly and efficiently. 
@@ -1526,33 +3700,141 @@ with app.app_context():
             
             Whether you've lost something or found an item, FOUND IT is here to help!
             """
-            system_info.contact_email = "admin@foundit.com"
-            system_info.contact_phone = "+234 810 678 1706"
-            system_info.contact_address = "ABU Zaria, Main Campus, Nigeria"
-            db.session.commit()
-            print("✅ System information updated!")
-        
-        print("✅ Database initialization completed successfully!")
-        print(f"🗄️ Database location: {DATABASE_PATH}")
-        
-    except Exception as e:
-        print(f"❌ Database initialization error: {e}")
-        print("🔄 Attempting to continue with existing database...")
-        
-        # Try to connect to existing database
+        system_info.contact_email = "admin@foundit.com"
+        system_info.contact_phone = "+234 810 678 1706"
+        system_info.contact_address = "ABU Zaria, Main Campus, Nigeria"
+        system_info.updated_at = datetime.utcnow()
+        db.session.commit()
+        print("✅ System information updated!")
+
+def create_app():
+    """Application factory for WSGI servers: gunicorn 'app:create_app()'
+    
+    Importing this module only configures the app; the database is set up once per
+    deploy by 'flask init-db' and 'flask seed', and checked lazily on the first request.
+    """
+    return app
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create missing tables, the search index and derived data - run once per deploy"""
+    init_database()
+    print("✅ Database initialization completed successfully!")
+
+@app.cli.command('seed')
+def seed_command():
+    """Add the default admin user, categories and site information if missing"""
+    seed_database()
+    print("✅ Default data is in place")
+
+@app.cli.command('rebuild-match-index')
+def rebuild_match_index_command():
+    """Rebuild the keyword/trigram index used by smart matching"""
+    indexed = rebuild_match_index()
+    print(f"✅ Smart matching index rebuilt for {indexed} items")
+
+@app.cli.command('rebuild-features')
+@click.option('--all', 'rebuild_all', is_flag=True, help='Rebuild every record, not only missing or outdated ones')
+def rebuild_features_command(rebuild_all):
+    """Recompute stored smart matching features (run after bumping FEATURE_VERSION)"""
+    rebuilt = rebuild_item_features(rebuild_all=rebuild_all)
+    print(f"✅ Smart matching features rebuilt for {rebuilt} items (version {smart_matcher.FEATURE_VERSION})")
+
+@app.cli.command('rematch-all')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+@click.option('--chunk-size', type=int, default=200, help='Lost items per chunk; progress is saved after each chunk')
+@click.option('--threshold', type=float, default=0.6, help='Lowest similarity stored as a match (new runs only)')
+@click.option('--restart', is_flag=True, help='Start over instead of resuming an interrupted run')
+@click.option('--max-chunks', type=int, default=None, help='Stop after this many chunks; run the command again to resume')
+def rematch_all_command(workers, chunk_size, threshold, restart, max_chunks):
+    """Recompute every lost x found match in parallel (after tuning the matcher); resumes an interrupted run"""
+    def progress(totals, seconds, remaining):
+        print(f"🔄 {totals['lost']} lost items, {totals['pairs'] / max(seconds, 1e-9):,.0f} pairs/s, "
+              f"{totals['matches']} matches, {remaining} to go")
+    
+    running = None if restart else RematchRun.query.filter_by(status='running').order_by(RematchRun.id.desc()).first()
+    if running:
+        print(f"↪️ Resuming run {running.id} after lost item {running.last_item_id} ({running.lost_done} done)")
+    report = rematch_all(workers=workers, chunk_size=chunk_size, threshold=threshold, restart=restart,
+                         max_chunks=max_chunks, progress=progress)
+    rate = report.get('pairs', 0) / max(report['seconds'], 1e-9)
+    print(f"{'✅ Re-matched' if report['complete'] else '⏸️ Paused after'} {report.get('lost', 0)} lost item(s): "
+          f"{report.get('pairs', 0):,} pairs in {report['seconds']:.1f} s ({rate:,.0f} pairs/s), "
+          f"{report.get('exact', 0):,} exact comparisons, {report.get('matches', 0)} matches stored")
+
+@app.cli.command('reconcile-counters')
+@click.option('--dry-run', is_flag=True, help='Only report drift, do not fix the counters')
+def reconcile_counters_command(dry_run):
+    """Recompute the dashboard statistics counters from scratch and report any drift"""
+    drift = reconcile_counters(fix=not dry_run)
+    if not drift:
+        print("✅ Statistics counters are accurate")
+        return
+    for name, (stored, actual) in sorted(drift.items()):
+        print(f"⚠️ {name}: stored {stored}, actual {actual}")
+    print(f"{'⚠️ Found' if dry_run else '✅ Fixed'} {len(drift)} drifted counter(s)")
+
+@app.cli.command('build-image-variants')
+@click.option('--all', 'rebuild_all', is_flag=True, help='Rebuild variants that already exist too')
+def build_image_variants_command(rebuild_all):
+    """Create resized variants and photo hashes for uploaded item images that do not have them yet"""
+    if Image is None:
+        print("❌ Pillow is not installed")
+        return
+    query = db.session.query(Item.id).filter(Item.image_path.isnot(None), Item.image_path != '')
+    if not rebuild_all:
+        query = query.filter(db.or_(Item.image_variants.is_(None), Item.image_hash.is_(None)))
+    built, failed = 0, 0
+    for (item_id,) in query.order_by(Item.id).all():
         try:
-            # Test database connection
-            db.session.execute('SELECT 1')
-            print("✅ Successfully connected to existing database!")
-        except Exception as conn_error:
-            print(f"❌ Cannot connect to database: {conn_error}")
-            print("🔄 Creating in-memory database as fallback...")
-            # Fallback to in-memory database
-            app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
-            db.init_app(app)
-            with app.app_context():
-                db.create_all()
-                print("✅ In-memory database created as fallback")
+            if image_variants_job(item_id)['variants']:
+                built += 1
+        except Exception as e:
+            failed += 1
+            print(f"⚠️ Item {item_id}: {e}")
+    print(f"✅ Image variants built for {built} item(s), {failed} failed")
+
+@app.cli.command('build-static')
+@click.option('--force', is_flag=True, help='Recompress files whose compressed copies are up to date too')
+def build_static_command(force):
+    """Precompress static assets (gzip, plus brotli when installed) and report their fingerprints"""
+    written = precompress_static(force=force)
+    for root, dirs, files in os.walk(app.static_folder):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != os.path.join(app.static_folder, 'uploads')]
+        for name in sorted(files):
+            filename = os.path.relpath(os.path.join(root, name), app.static_folder).replace(os.sep, '/')
+            if not name.endswith(('.gz', '.br')):
+                print(f"   {filename}?v={static_fingerprint(filename)}")
+    print(f"✅ Wrote {written} precompressed file(s){'' if brotli else ' (gzip only, brotli is not installed)'}")
+
+@app.cli.command('prune-notifications')
+def prune_notifications_command():
+    """Delete read notifications older than NOTIFICATION_RETENTION"""
+    pruned = prune_notifications()
+    print(f"✅ Pruned {pruned} read notification(s) older than {app.config['NOTIFICATION_RETENTION'].days} days")
+
+@app.cli.command('backup-db')
+@click.option('--no-compress', is_flag=True, help='Write a plain .db file instead of .db.gz')
+def backup_db_command(no_compress):
+    """Take an online, verified backup of the database and apply the retention policy"""
+    if not backup_database(compress=not no_compress):
+        raise SystemExit(1)
+
+@app.cli.command('gc-uploads')
+@click.option('--dry-run', is_flag=True, help='Only report what would be removed')
+def gc_uploads_command(dry_run):
+    """Delete uploaded images no item references any more"""
+    report = collect_upload_garbage(dry_run=dry_run)
+    prefix = 'Would remove' if dry_run else 'Removed'
+    print(f"✅ Recounted {report['recounted']} blob(s). {prefix} {report['deleted_blobs']} unreferenced blob(s) and "
+          f"{report['deleted_files']} stray file(s), {report['freed_bytes'] / 1024:.0f} KB")
+
+@app.cli.command('run-jobs')
+def run_jobs_command():
+    """Run every pending background job and exit"""
+    requeue_stale_jobs()
+    count = run_pending_jobs()
+    print(f"✅ Ran {count} background job(s)")
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=int(os.environ.get('PORT', 5000))) 
\ No newline at end of file
@@ -0,0 +1,630 @@
+#!/usr/bin/env python3
+"""
+Performance Benchmarks for Found-It App
+Runs against a throwaway database so production data is never touched.
+"""
+
+import os
+import sys
+import random
+import tempfile
+import time
+import json
+from datetime import datetime, timedelta
+
+# Always benchmark against a scratch database
+BENCH_DIR = tempfile.mkdtemp(prefix='found_it_bench_')
+os.environ['DATABASE_PATH'] = os.path.join(BENCH_DIR, 'found_it.db')
+os.environ.setdefault('JOB_QUEUE_MODE', 'eager')
+
+OBJECTS = ['iphone', 'samsung phone', 'laptop', 'wallet', 'student id card', 'car keys', 'water bottle',
+           'backpack', 'calculator', 'textbook', 'umbrella', 'wrist watch', 'earbuds', 'charger', 'jacket']
+COLORS = ['black', 'blue', 'red', 'silver', 'brown', 'white', 'green', 'grey']
+BRANDS = ['apple', 'samsung', 'hp', 'dell', 'casio', 'nike', 'tecno', 'infinix', 'lenovo', '']
+PLACES = ['main library', 'faculty of engineering', 'sports complex', 'cafeteria', 'hostel block b',
+          'senate building', 'lecture theatre 3', 'computer centre', 'mosque', 'chapel']
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def synthetic_items(count, category_ids, seed=42):
+    """Generate rows for the item table that look like campus lost and found reports"""
+    rng = random.Random(seed)
+    from app import smart_matcher
+    now = datetime.utcnow()
+    rows = []
+    for i in range(count):
+        color = rng.choice(COLORS)
+        thing = rng.choice(OBJECTS)
+        brand = rng.choice(BRANDS)
+        place = rng.choice(PLACES)
+        title = f'{color} {brand} {thing}'.replace('  ', ' ')
+        description = f'{title} {rng.choice(["left", "dropped", "forgotten", "misplaced"])} near the {place} #{i}'
+        created = now - timedelta(minutes=i)
+        rows.append({
+            'title': title,
+            'description': description,
+            'category_id': rng.choice(category_ids),
+            'status': rng.choice(['lost', 'found']),
+            'location': place,
+            'brand': brand,
+            'color': color,
+            'keywords': ','.join(smart_matcher.extract_keywords(title + ' ' + description)),
+            'is_approved': True,
+            'created_at': created,
+            'updated_at': created
+        })
+    return rows
+
+
+def reset_database():
+    """Drop and recreate every table in the scratch database"""
+    from app import app, db, setup_search_index
+    db.drop_all()
+    with db.engine.begin() as connection:
+        connection.exec_driver_sql('DROP TABLE IF EXISTS item_fts')
+    db.create_all()
+    app.config['FTS_AVAILABLE'] = setup_search_index()
+
+
+def seed_items(count, batch_size=5000):
+    """Bulk load count synthetic items and return the category ids used"""
+    from app import db, Item, Category, reconcile_counters
+    categories = Category.query.all()
+    if not categories:
+        for name in ['Electronics', 'Jewelry', 'Clothing', 'Documents', 'Keys', 'Books', 'Sports', 'Other']:
+            db.session.add(Category(name=name))
+        db.session.commit()
+        categories = Category.query.all()
+    category_ids = [c.id for c in categories]
+    rows = synthetic_items(count, category_ids)
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(Item.__table__.insert(), rows[start:start + batch_size])
+    db.session.commit()
+    reconcile_counters()  # Core inserts bypass the session counters
+    return category_ids
+
+
+def bench_matching(full=False, posts=5):
+    """Posting latency with and without the smart matching index"""
+    from app import app, db, Item, rebuild_match_index, smart_matcher
+    sizes = [1000, 10000, 100000]
+    client = app.test_client()
+    app.config['JOB_QUEUE_MODE'] = 'eager'  # Keep matching inside the timed request
+    print("🔍 Benchmarking /post_item latency (matching included)")
+    print(f"{'items':>8} {'mode':>12} {'p50 ms':>10} {'max ms':>10} {'candidates':>11}")
+    with app.app_context():
+        for size in sizes:
+            reset_database()
+            category_ids = seed_items(size)
+            rebuild_match_index()
+            modes = [('indexed', True)]
+            if full or size <= 10000:
+                modes.append(('brute-force', False))
+            for label, use_index in modes:
+                app.config['MATCH_INDEX_ENABLED'] = use_index
+                timings, candidates = [], []
+                for i in range(posts):
+                    form = {
+                        'title': random.choice(COLORS) + ' ' + random.choice(OBJECTS),
+                        'description': 'lost it this morning near the ' + random.choice(PLACES),
+                        'category_id': str(random.choice(category_ids)),
+                        'status': 'lost',
+                        'location': random.choice(PLACES)
+                    }
+                    start = time.perf_counter()
+                    client.post('/post_item', data=form)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    posted = Item.query.order_by(Item.id.desc()).first()
+                    candidates.append(len(smart_matcher.match_candidates(posted, use_index, approved_only=False)))
+                print(f"{size:>8} {label:>12} {percentile(timings, 50):>10.1f} {max(timings):>10.1f} "
+                      f"{percentile(candidates, 50):>11,.0f}")
+            app.config['MATCH_INDEX_ENABLED'] = True
+            db.session.remove()
+
+
+def bench_search(full=False, size=100000, repeats=5):
+    """Search latency of the FTS5 backend against the LIKE fallback"""
+    from app import app, db, Item, search_items
+    queries = ['phone', 'samsung', 'black wallet', 'lib', 'calculator casio', 'hostel']
+    columns = ['title', 'description', 'brand', 'model', 'color']
+    print(f"🔍 Benchmarking search on {size} items")
+    with app.app_context():
+        reset_database()
+        seed_items(size)
+        print(f"{'query':>18} {'backend':>8} {'rows':>7} {'all ms':>9} {'top20 ms':>9}")
+        for search in queries:
+            for backend in ('like', 'fts'):
+                app.config['SEARCH_BACKEND'] = backend
+                all_times, page_times = [], []
+                for i in range(repeats):
+                    query, rank = search_items(Item.query.filter_by(is_approved=True), search, columns)
+                    start = time.perf_counter()
+                    rows = query.with_entities(Item.id).all()
+                    all_times.append((time.perf_counter() - start) * 1000)
+                    
+                    order = [rank, Item.created_at.desc()] if rank is not None else [Item.created_at.desc()]
+                    start = time.perf_counter()
+                    query.order_by(*order).limit(20).all()
+                    page_times.append((time.perf_counter() - start) * 1000)
+                print(f"{search:>18} {backend:>8} {len(rows):>7} {percentile(all_times, 50):>9.1f} {percentile(page_times, 50):>9.1f}")
+        app.config['SEARCH_BACKEND'] = 'fts'
+
+
+def bench_home(full=False, threads=8, duration=5.0, size=2000):
+    """Concurrent home page throughput, read-only vs the old per-request analytics write"""
+    import threading
+    from app import app, db, update_analytics, Analytics, Item, ItemMatch, User
+    mode = {'write_analytics': False}
+    
+    def legacy_update_analytics():
+        # The original update_analytics(): six COUNT(*) scans and an upsert, committed per call
+        today = datetime.now().date()
+        analytics = Analytics.query.filter_by(date=today).first()
+        if not analytics:
+            analytics = Analytics(date=today)
+            db.session.add(analytics)
+        analytics.total_items = Item.query.count()
+        analytics.found_items = Item.query.filter_by(status='found').count()
+        analytics.lost_items = Item.query.filter_by(status='lost').count()
+        analytics.claimed_items = Item.query.filter_by(status='claimed').count()
+        analytics.matches_found = ItemMatch.query.count()
+        analytics.new_users = User.query.filter(User.created_at >= today).count()
+        db.session.commit()
+    
+    @app.before_request
+    def legacy_analytics_write():
+        # Reproduces the old behaviour of home() updating analytics on every view
+        from flask import request
+        if mode['write_analytics'] and request.path == '/':
+            legacy_update_analytics()
+    
+    with app.app_context():
+        reset_database()
+        seed_items(size)
+        update_analytics()
+    
+    print(f"🔍 Benchmarking GET / with {threads} concurrent clients for {duration:.0f}s per mode ({size} items)")
+    print(f"{'mode':>18} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for label, write in [('analytics write', True), ('read-only', False)]:
+        mode['write_analytics'] = write
+        timings, errors = [], []
+        deadline = time.perf_counter() + duration
+        
+        def worker():
+            client = app.test_client()
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    if client.get('/').status_code != 200:
+                        errors.append(1)
+                except Exception:
+                    errors.append(1)
+                timings.append((time.perf_counter() - start) * 1000)
+        
+        pool = [threading.Thread(target=worker) for i in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        print(f"{label:>18} {len(timings) / elapsed:>8.1f} {percentile(timings, 50):>8.1f} "
+              f"{percentile(timings, 99):>8.1f} {len(errors):>7}")
+
+
+def bench_sqlite(full=False, writers=4, readers=4, duration=5.0, size=5000):
+    """Concurrent read/write throughput and lock errors for each SQLite engine profile"""
+    import threading
+    from sqlalchemy.exc import OperationalError
+    from app import app, db, Item, SQLITE_PROFILES
+    
+    with app.app_context():
+        reset_database()
+        category_ids = seed_items(size)
+    
+    print(f"🔍 Benchmarking {writers} writer and {readers} reader threads for {duration:.0f}s per profile ({size} items)")
+    print(f"{'profile':>10} {'writes/s':>9} {'reads/s':>9} {'write p99':>10} {'locked':>7} {'lock %':>7}")
+    for profile in SQLITE_PROFILES:
+        app.config['SQLITE_PROFILE'] = profile
+        with app.app_context():
+            db.engine.dispose()  # New connections pick up the profile
+        stats = {'writes': 0, 'reads': 0, 'locked': 0}
+        write_times = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+        
+        def run(write):
+            rng = random.Random()
+            with app.app_context():
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        if write:
+                            # Read then write in one transaction, like post_item followed by matching
+                            Item.query.filter_by(status='found').order_by(Item.id.desc()).limit(50).all()
+                            db.session.add(Item(title=f'{rng.choice(COLORS)} {rng.choice(OBJECTS)}',
+                                                description='benchmark write', category_id=rng.choice(category_ids),
+                                                status='lost', location=rng.choice(PLACES), is_approved=True))
+                            db.session.commit()
+                        else:
+                            Item.query.filter_by(is_approved=True).order_by(Item.created_at.desc()).limit(24).all()
+                            Item.query.filter_by(status='lost').count()
+                            db.session.commit()
+                    except OperationalError as e:
+                        db.session.rollback()
+                        if 'locked' not in str(e):
+                            raise
+                        with lock:
+                            stats['locked'] += 1
+                        continue
+                    with lock:
+                        stats['writes' if write else 'reads'] += 1
+                        if write:
+                            write_times.append((time.perf_counter() - start) * 1000)
+        
+        pool = [threading.Thread(target=run, args=(True,)) for i in range(writers)]
+        pool += [threading.Thread(target=run, args=(False,)) for i in range(readers)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        attempts = stats['writes'] + stats['reads'] + stats['locked']
+        print(f"{profile:>10} {stats['writes'] / elapsed:>9.1f} {stats['reads'] / elapsed:>9.1f} "
+              f"{percentile(write_times, 99):>10.1f} {stats['locked']:>7} {100.0 * stats['locked'] / max(attempts, 1):>6.1f}%")
+    
+    app.config['SQLITE_PROFILE'] = 'wal'
+    with app.app_context():
+        db.engine.dispose()
+
+
+def bench_writes(full=False, threads=8, duration=5.0, size=2000):
+    """Concurrent /post_item throughput with per-request commits vs the group-commit writer"""
+    import threading
+    from app import app, db
+    profiles = ['wal', 'durable'] if full else ['wal']
+    
+    with app.app_context():
+        reset_database()
+        category_ids = seed_items(size)
+    commits = {'count': 0}
+    
+    def count_commit(connection):
+        commits['count'] += 1
+    
+    with app.app_context():
+        db.event.listen(db.engine, 'commit', count_commit)
+    app.config['JOB_QUEUE_MODE'] = 'thread'  # Matching runs on the job worker, as in production
+    
+    print(f"🔍 Benchmarking POST /post_item with {threads} concurrent clients for {duration:.0f}s per mode ({size} items)")
+    print(f"{'profile':>8} {'mode':>7} {'posts/s':>8} {'commits/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for profile in profiles:
+        app.config['SQLITE_PROFILE'] = profile
+        with app.app_context():
+            db.engine.dispose()
+        for mode in ('direct', 'group'):
+            app.config['WRITE_QUEUE_MODE'] = mode
+            timings, errors = [], []
+            deadline = time.perf_counter() + duration
+            commits['count'] = 0
+            
+            def worker():
+                rng = random.Random()
+                client = app.test_client()
+                while time.perf_counter() < deadline:
+                    form = {
+                        'title': rng.choice(COLORS) + ' ' + rng.choice(OBJECTS),
+                        'description': 'lost it this morning near the ' + rng.choice(PLACES),
+                        'category_id': str(rng.choice(category_ids)),
+                        'status': 'lost',
+                        'location': rng.choice(PLACES)
+                    }
+                    start = time.perf_counter()
+                    try:
+                        if client.post('/post_item', data=form).status_code != 302:
+                            errors.append(1)
+                    except Exception:
+                        errors.append(1)
+                    timings.append((time.perf_counter() - start) * 1000)
+            
+            pool = [threading.Thread(target=worker) for i in range(threads)]
+            started = time.perf_counter()
+            for thread in pool:
+                thread.start()
+            for thread in pool:
+                thread.join()
+            elapsed = time.perf_counter() - started
+            print(f"{profile:>8} {mode:>7} {len(timings) / elapsed:>8.1f} {commits['count'] / elapsed:>10.1f} "
+                  f"{percentile(timings, 50):>8.1f} {percentile(timings, 99):>8.1f} {len(errors):>7}")
+    
+    app.config['SQLITE_PROFILE'] = 'wal'
+    app.config['WRITE_QUEUE_MODE'] = 'group'
+
+
+def bench_images(full=False, count=24, viewport_width=360, device_pixel_ratio=2):
+    """Image bytes a phone downloads for one listing page, original uploads vs resized variants"""
+    import io
+    import re
+    from PIL import Image
+    from app import app, db, Item
+    app.config['UPLOAD_FOLDER'] = os.path.join(BENCH_DIR, 'static', 'uploads')
+    app.config['JOB_QUEUE_MODE'] = 'eager'
+    
+    with app.app_context():
+        reset_database()
+        category_ids = seed_items(0)
+        client = app.test_client()
+        print(f"🔍 Posting {count} items with 12 MP phone photos")
+        build_times = []
+        for i in range(count):
+            noise = [Image.effect_noise((378, 504), 60 + i) for channel in range(3)]
+            image = Image.merge('RGB', noise).resize((3024, 4032), Image.BICUBIC)
+            buffer = io.BytesIO()
+            image.save(buffer, 'JPEG', quality=90)
+            buffer.seek(0)
+            start = time.perf_counter()
+            client.post('/post_item', data={
+                'title': f'{random.choice(COLORS)} {random.choice(OBJECTS)}', 'description': 'photo attached',
+                'category_id': str(random.choice(category_ids)), 'status': 'found', 'location': random.choice(PLACES),
+                'image': (buffer, f'photo_{i}.jpg')
+            }, content_type='multipart/form-data')
+            build_times.append((time.perf_counter() - start) * 1000)
+        
+        # The candidate a browser picks: the narrowest variant at least as wide as the rendered card
+        needed = viewport_width * device_pixel_ratio
+        print(f"{'page':>8} {'images':>7} {'original KB':>12} {'webp KB':>9} {'jpeg KB':>9} {'saved':>7}")
+        for path in ('/', '/items'):
+            html = client.get(path).get_data(as_text=True)
+            shown = re.findall(r'alt="([^"]+)"', html)
+            items = Item.query.filter(Item.image_variants.isnot(None)).order_by(Item.created_at.desc()).all()
+            items = [item for item in items if item.title in shown][:len(shown)]
+            totals = {'original': 0, 'webp': 0, 'jpeg': 0}
+            for item in items:
+                totals['original'] += os.path.getsize(os.path.join(BENCH_DIR, 'static', item.image_path))
+                variants = sorted(json.loads(item.image_variants).values(), key=lambda v: v['width'])
+                chosen = next((v for v in variants if v['width'] >= needed), variants[-1])
+                for key in ('webp', 'jpeg'):
+                    totals[key] += os.path.getsize(os.path.join(BENCH_DIR, 'static', chosen[key]))
+            saved = 100.0 * (1 - totals['webp'] / max(totals['original'], 1))
+            print(f"{path:>8} {len(items):>7} {totals['original'] / 1024:>12.0f} {totals['webp'] / 1024:>9.0f} "
+                  f"{totals['jpeg'] / 1024:>9.0f} {saved:>6.1f}%")
+        print(f"Variant build time per upload: p50 {percentile(build_times, 50):.0f} ms (inline in eager mode)")
+
+
+def bench_image_hash(full=False, size=100000, lookups=50, seed=5):
+    """Near-duplicate photo lookup, multi-index hash table vs a linear Hamming scan"""
+    from app import app, db, Item, smart_matcher, rebuild_match_index, hamming_distance
+    rng = random.Random(seed)
+    print(f"🔍 Benchmarking photo hash lookups on {size} items")
+    with app.app_context():
+        reset_database()
+        seed_items(size)
+        # Every fifth photo is a re-upload or re-shoot of an earlier one (a few bits off)
+        hashes = []
+        for i in range(size):
+            if hashes and i % 5 == 0:
+                value = int(rng.choice(hashes), 16)
+                for bit in rng.sample(range(64), rng.randint(0, 8)):
+                    value ^= 1 << bit
+            else:
+                value = rng.getrandbits(64)
+            hashes.append(format(value, '016x'))
+        ids = [row.id for row in db.session.query(Item.id).order_by(Item.id)]
+        db.session.execute(Item.__table__.update().where(Item.id == db.bindparam('item_id')).values(image_hash=db.bindparam('hash')),
+                           [{'item_id': item_id, 'hash': h} for item_id, h in zip(ids, hashes)])
+        db.session.commit()
+        start = time.perf_counter()
+        rebuild_match_index()
+        print(f"Index built in {time.perf_counter() - start:.1f} s")
+        
+        max_distance = app.config['IMAGE_HASH_MAX_DISTANCE']
+        probes = [Item(status='lost', image_hash=h) for h in rng.sample(hashes, lookups)]
+        indexed_times, scan_times, found = [], [], 0
+        for probe in probes:
+            start = time.perf_counter()
+            indexed = smart_matcher.similar_image_ids(probe, 'found')
+            indexed_times.append((time.perf_counter() - start) * 1000)
+            
+            start = time.perf_counter()
+            rows = db.session.query(Item.id, Item.image_hash).filter(
+                Item.status == 'found', Item.is_approved == True, Item.image_hash.isnot(None)).all()
+            distances = {row.id: hamming_distance(probe.image_hash, row.image_hash) for row in rows}
+            scanned = sorted((i for i, d in distances.items() if d <= max_distance), key=lambda i: (distances[i], i))
+            scan_times.append((time.perf_counter() - start) * 1000)
+            assert indexed == scanned, 'index and scan disagree'
+            found += len(indexed)
+        print(f"{'method':>12} {'p50 ms':>9} {'p95 ms':>9}")
+        print(f"{'index':>12} {percentile(indexed_times, 50):>9.1f} {percentile(indexed_times, 95):>9.1f}")
+        print(f"{'linear scan':>12} {percentile(scan_times, 50):>9.1f} {percentile(scan_times, 95):>9.1f}")
+        print(f"{found} near-duplicate(s) within {max_distance} bits over {lookups} lookups, identical results")
+
+
+def bench_rematch(full=False, size=5000, sample=100):
+    """Full lost x found re-match: item by item through find_matches vs the chunked multiprocessing batch job"""
+    from app import app, db, Item, rebuild_item_features, smart_matcher, rematch_all
+    cpus = os.cpu_count() or 1
+    print(f"🔍 Benchmarking a full re-match of {size} items ({cpus} CPU(s))")
+    with app.app_context():
+        reset_database()
+        seed_items(size)
+        rebuild_item_features()
+        lost = Item.query.filter_by(status='lost').order_by(Item.id).all()
+        found_count = Item.query.filter_by(status='found').count()
+        
+        start = time.perf_counter()
+        for item in lost[:sample]:
+            smart_matcher.find_matches(item, use_index=False)
+        elapsed = time.perf_counter() - start
+        print(f"{'method':>22} {'pairs/s':>10} {'full run s':>11}")
+        rate = sample * found_count / elapsed
+        print(f"{'find_matches per item':>22} {rate:>10,.0f} {len(lost) * found_count / rate:>11.1f}")
+        
+        for workers in sorted({1, cpus} | ({4} if full else set())):
+            report = rematch_all(workers=workers, restart=True)
+            print(f"{f'rematch-all x{workers}':>22} {report['pairs'] / report['seconds']:>10,.0f} {report['seconds']:>11.1f}")
+        print(f"{len(lost)} lost x {found_count} found items, {report['matches']} matches stored")
+
+
+def bench_pruning(full=False, size=2000, sample=50):
+    """calculate_similarity with and without threshold pruning, on every pair and on the pairs score_many lets through"""
+    from app import app, Item, rebuild_item_features, smart_matcher
+    print(f"🔍 Benchmarking similarity pruning on {size} synthetic items")
+    with app.app_context():
+        reset_database()
+        seed_items(size)
+        rebuild_item_features()
+        lost = Item.query.filter_by(status='lost').order_by(Item.id).limit(sample).all()
+        found = Item.query.filter_by(status='found').order_by(Item.id).all()
+        features = smart_matcher.load_features(found)
+        targets = smart_matcher.load_features(lost)
+        print(f"{'pairs':>12} {'threshold':>9} {'count':>8} {'pruned':>8} {'exact s':>8} {'pruned s':>9} {'speedup':>8}")
+        for threshold in ((0.4, 0.6, 0.8) if full else (0.6,)):
+            all_pairs, bounded_pairs = [], []
+            for item, target in zip(lost, targets):
+                bounds = smart_matcher.score_many(item, found, features, target)
+                for candidate, candidate_features, bound in zip(found, features, bounds):
+                    pair = (item, candidate, target, candidate_features)
+                    all_pairs.append(pair)
+                    if bound >= threshold - 1e-9:
+                        bounded_pairs.append(pair)
+            for label, pairs in (('all', all_pairs), ('score_many', bounded_pairs)):
+                start = time.perf_counter()
+                exact = [smart_matcher.calculate_similarity(*pair) for pair in pairs]
+                exact_seconds = time.perf_counter() - start
+                start = time.perf_counter()
+                pruned = [smart_matcher.calculate_similarity(*pair, threshold=threshold) for pair in pairs]
+                pruned_seconds = time.perf_counter() - start
+                assert all(p == e if p is not None else e < threshold for p, e in zip(pruned, exact))
+                rate = sum(p is None for p in pruned) / max(len(pairs), 1)
+                print(f"{label:>12} {threshold:>9} {len(pairs):>8} {rate:>8.1%} {exact_seconds:>8.2f} "
+                      f"{pruned_seconds:>9.2f} {exact_seconds / max(pruned_seconds, 1e-9):>7.1f}x")
+
+
+STARTUP_PROBE = """
+import json, os, sys, time
+
+def memory_kb():
+    # Resident set and the part of it no other process shares (what each forked worker really costs)
+    sizes = {'rss': 0, 'private': 0}
+    if os.path.exists('/proc/self/smaps_rollup'):
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                name, value = line.split(':', 1)
+                if name == 'Rss':
+                    sizes['rss'] = int(value.split()[0])
+                elif name in ('Private_Clean', 'Private_Dirty'):
+                    sizes['private'] += int(value.split()[0])
+    else:
+        import resource
+        sizes['rss'] = sizes['private'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return sizes
+
+def first_request(app, started, imported):
+    status = app.test_client().get('/').status_code
+    served = time.perf_counter()
+    return dict(memory_kb(), status=status, import_s=imported - started, first_request_s=served - imported)
+
+start = time.perf_counter()
+from app import create_app
+app = create_app()
+imported = time.perf_counter()
+forks = int(sys.argv[1])
+if not forks:
+    print('STARTUP ' + json.dumps(first_request(app, start, imported)))
+else:
+    # gunicorn --preload: import once, then fork workers that share the imported modules
+    for i in range(forks):
+        read_end, write_end = os.pipe()
+        forked = time.perf_counter()
+        if os.fork() == 0:
+            os.close(read_end)
+            os.write(write_end, json.dumps(first_request(app, forked, forked)).encode())
+            os._exit(0)
+        os.close(write_end)
+        with os.fdopen(read_end) as f:
+            print('STARTUP ' + f.read())
+        os.wait()
+"""
+
+
+def bench_startup(full=False, workers=5, size=2000):
+    """Worker start-up: import to first served request and memory per worker, cold vs preloaded and forked"""
+    import subprocess
+    from app import app, init_database, seed_database
+    print(f"🔍 Benchmarking {workers} worker starts against a {size} item database")
+    with app.app_context():
+        reset_database()
+        seed_items(size)
+        init_database()  # What 'flask init-db' and 'flask seed' do once per deploy
+        seed_database()
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    here = os.path.dirname(os.path.abspath(__file__))
+    
+    def probe(forks):
+        output = subprocess.run([sys.executable, '-c', STARTUP_PROBE, str(forks)], cwd=here, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        results = [json.loads(line[len('STARTUP '):]) for line in output.splitlines() if line.startswith('STARTUP ')]
+        assert all(r['status'] == 200 for r in results), 'first request failed'
+        return results
+    
+    cold = [probe(0)[0] for i in range(workers)]
+    preloaded = probe(workers)
+    print(f"{'mode':>10} {'import ms':>10} {'first req ms':>13} {'ready ms':>9} {'RSS MB':>8} {'private MB':>11}")
+    for label, results in [('cold', cold), ('preloaded', preloaded)]:
+        imports = [r['import_s'] * 1000 for r in results]
+        firsts = [r['first_request_s'] * 1000 for r in results]
+        ready = [(r['import_s'] + r['first_request_s']) * 1000 for r in results]
+        print(f"{label:>10} {percentile(imports, 50):>10.0f} {percentile(firsts, 50):>13.0f} {percentile(ready, 50):>9.0f} "
+              f"{percentile([r['rss'] / 1024 for r in results], 50):>8.1f} "
+              f"{percentile([r['private'] / 1024 for r in results], 50):>11.1f}")
+    print("p50 over each worker; 'private' is memory not shared with other processes")
+
+
+BENCHMARKS = {
+    'matching': bench_matching,
+    'search': bench_search,
+    'home': bench_home,
+    'sqlite': bench_sqlite,
+    'writes': bench_writes,
+    'images': bench_images,
+    'image-hash': bench_image_hash,
+    'startup': bench_startup,
+    'rematch': bench_rematch,
+    'pruning': bench_pruning,
+}
+
+
+def main():
+    """Main function to handle command line arguments."""
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print("Usage: python benchmark.py [" + '|'.join(BENCHMARKS) + "] [--full]")
+        print("Commands:")
+        print("  matching - /post_item latency at 1k, 10k and 100k items, indexed vs brute force")
+        print("  search   - FTS5 vs LIKE query latency on a 100k item table")
+        print("  home     - concurrent GET / throughput with and without per-request analytics writes")
+        print("  sqlite   - concurrent read/write throughput and lock errors per SQLite engine profile")
+        print("  writes   - concurrent /post_item throughput and commit rate, direct commits vs group commit")
+        print("  images   - image bytes per listing page on a phone, original uploads vs resized variants")
+        print("  image-hash - near-duplicate photo lookup at 100k items, multi-index hash table vs linear scan")
+        print("  startup  - worker import-to-first-request time and memory, cold start vs gunicorn --preload fork")
+        print("  rematch  - full lost x found re-match throughput, item by item vs the multiprocessing batch job")
+        print("  pruning  - calculate_similarity pruning rate and speedup at the match threshold, exact vs bounded")
+        print("Options:")
+        print("  --full   - Also run the slow baselines at the largest sizes")
+        return
+
+    print(f"🗄️ Scratch database: {os.environ['DATABASE_PATH']}")
+    BENCHMARKS[sys.argv[1]](full='--full' in sys.argv)
+
+
+if __name__ == '__main__':
+    main()
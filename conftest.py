@@ -0,0 +1,89 @@
+"""
+Pytest configuration for Found-It App
+Points the app at a throwaway database before any test module imports it,
+and provides the fixtures the test modules share.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+TEST_DATA_DIR = tempfile.mkdtemp(prefix='found_it_test_')
+os.environ['DATABASE_PATH'] = os.path.join(TEST_DATA_DIR, 'found_it.db')
+
+# Run background jobs inline so tests can assert on their effects right away
+os.environ['JOB_QUEUE_MODE'] = 'eager'
+
+# Importing the app no longer touches the database; set it up the way deploy.sh does
+from app import (app, db, init_database, seed_database, reconcile_counters, BackgroundJob, Claim, Item, ItemFeatures,
+                 ItemImageHash, ItemMatch, ItemToken, Message, Notification, User)
+
+with app.app_context():
+    init_database()
+    seed_database()
+
+
+def reset_items():
+    """Remove all items and everything hanging off them, then bring the counters back in line"""
+    for model in (ItemMatch, Claim, ItemToken, ItemFeatures, ItemImageHash, Item, Message, Notification, BackgroundJob):
+        model.query.delete()
+    db.session.commit()
+    reconcile_counters()  # Bulk deletes bypass the session
+
+
+def reset_notifications():
+    Notification.query.delete()
+    User.query.filter(User.username.like('extra_admin_%')).delete(synchronize_session=False)
+    db.session.commit()
+    reconcile_counters()  # Bulk deletes bypass the session
+
+
+@pytest.fixture
+def clean_items():
+    """Empty item tables before and after the test, so no test sees another's leftovers"""
+    with app.app_context():
+        reset_items()
+    yield
+    with app.app_context():
+        reset_items()
+
+
+@pytest.fixture
+def clean_notifications():
+    """No notifications or extra admins before and after the test"""
+    with app.app_context():
+        reset_notifications()
+    yield
+    with app.app_context():
+        reset_notifications()
+
+
+@pytest.fixture
+def admin_client():
+    """Test client logged in as the seeded admin"""
+    client = app.test_client()
+    client.post('/admin/login', data={'username': 'admin', 'password': 'admin123'})
+    return client
+
+
+class QueryCounter:
+    """Count SQL statements executed while the block runs"""
+    def __enter__(self):
+        self.count = 0
+        self.statements = []
+        db.event.listen(db.engine, 'before_cursor_execute', self.callback)
+        return self
+
+    def __exit__(self, *exc):
+        db.event.remove(db.engine, 'before_cursor_execute', self.callback)
+
+    def callback(self, conn, cursor, statement, *args):
+        self.count += 1
+        self.statements.append(statement)
+
+
+@pytest.fixture
+def query_counter():
+    """QueryCounter, for 'with query_counter() as queries:' blocks"""
+    return QueryCounter
@@ -5,32 +5,117 @@ Handles database backup, verification, and recovery operations.
 """
 
 import os
+import gzip
 import sqlite3
 import shutil
+import tempfile
+import time
 from datetime import datetime
 import sys
 from pathlib import Path
 
 # Database configuration
 DATABASE_PATH = os.environ.get('DATABASE_PATH', '/opt/render/project/src/persistent_data/found_it.db')
-BACKUP_DIR = os.path.dirname(DATABASE_PATH)
+BACKUP_DIR = os.environ.get('BACKUP_DIR') or os.path.join(os.path.dirname(DATABASE_PATH), 'backups')
+BACKUP_KEEP = int(os.environ.get('BACKUP_KEEP', 7))
+PAGES_PER_STEP = 256  # 1 MB per step at the default 4 KB page size
+MAX_RESTARTS = 3  # Stepped copies restarted by concurrent writes before falling back to a one-step copy
 
-def create_backup():
-    """Create a timestamped backup of the database."""
-    if not os.path.exists(DATABASE_PATH):
-        print(f"❌ Database not found at {DATABASE_PATH}")
-        return False
+class BackupRestarted(Exception):
+    pass
+
+def copy_database(source_path, target_path, pages=PAGES_PER_STEP, sleep=0.005):
+    """Copy a live database with the SQLite online backup API.
+    
+    Each step copies `pages` pages inside a short read transaction and then sleeps, so
+    writers get the lock in between (in WAL mode readers never block them at all).
+    A write from another connection restarts the copy; after MAX_RESTARTS the rest is
+    copied in a single step, which still only holds a read lock.
+    """
+    remaining_before = [None]
+    restarts = [0]
     
-    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    backup_path = f"{DATABASE_PATH}.backup.{timestamp}"
+    def progress(status, remaining, total):
+        if remaining_before[0] is not None and remaining > remaining_before[0]:
+            restarts[0] += 1
+            if restarts[0] > MAX_RESTARTS:
+                raise BackupRestarted()
+        remaining_before[0] = remaining
     
+    source = sqlite3.connect(source_path, timeout=30)
+    target = sqlite3.connect(target_path)
     try:
-        shutil.copy2(DATABASE_PATH, backup_path)
-        print(f"✅ Backup created: {backup_path}")
-        return True
+        try:
+            source.backup(target, pages=pages, progress=progress, sleep=sleep)
+        except BackupRestarted:
+            print(f"⚠️ Backup restarted {MAX_RESTARTS} times by concurrent writes, copying in one step")
+            source.backup(target)
+        target.execute('PRAGMA journal_mode=DELETE')  # A self-contained file, without -wal/-shm companions
+    finally:
+        target.close()
+        source.close()
+    return restarts[0]
+
+def quick_check(db_path):
+    """Result of PRAGMA quick_check on a database file ('ok' when it is sound)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return '; '.join(row[0] for row in conn.execute('PRAGMA quick_check'))
+    finally:
+        conn.close()
+
+def backup_files(backup_dir=BACKUP_DIR, db_path=DATABASE_PATH):
+    """Backups of db_path in backup_dir, newest first"""
+    prefix = os.path.basename(db_path) + '.backup.'
+    if not os.path.isdir(backup_dir):
+        return []
+    paths = [os.path.join(backup_dir, name) for name in os.listdir(backup_dir)
+             if name.startswith(prefix) and name.endswith(('.db', '.db.gz'))]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+def create_backup(db_path=DATABASE_PATH, backup_dir=BACKUP_DIR, compress=True, verify=True, keep=BACKUP_KEEP,
+                  pages=PAGES_PER_STEP):
+    """Take an online backup of the database; returns the backup path or None.
+    
+    The copy is checked with PRAGMA quick_check before it is kept, gzip-compressed by
+    streaming if asked, and only the `keep` newest backups are retained.
+    """
+    if not os.path.exists(db_path):
+        print(f"❌ Database not found at {db_path}")
+        return None
+    
+    os.makedirs(backup_dir, exist_ok=True)
+    name = f"{os.path.basename(db_path)}.backup.{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+    backup_path = os.path.join(backup_dir, name + ('.gz' if compress else ''))
+    fd, temp_path = tempfile.mkstemp(dir=backup_dir, suffix='.tmp')
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        restarts = copy_database(db_path, temp_path, pages=pages)
+        if verify:
+            result = quick_check(temp_path)
+            if result != 'ok':
+                print(f"❌ Backup failed verification: {result}")
+                return None
+        if compress:
+            with open(temp_path, 'rb') as source, gzip.open(temp_path + '.gz', 'wb', compresslevel=6) as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            os.replace(temp_path + '.gz', backup_path)
+        else:
+            os.replace(temp_path, backup_path)
+        duration = time.perf_counter() - start
+        print(f"✅ Backup created: {backup_path} ({os.path.getsize(backup_path) / 1024:.0f} KB, {duration:.1f} s, "
+              f"{restarts} restart(s){', verified' if verify else ''})")
     except Exception as e:
         print(f"❌ Backup failed: {e}")
-        return False
+        return None
+    finally:
+        for leftover in (temp_path, temp_path + '.gz'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    
+    cleanup_old_backups(keep, backup_dir, db_path)
+    return backup_path
 
 def verify_database():
     """Verify database integrity and structure."""
@@ -74,89 +159,105 @@ def verify_database():
         print(f"❌ Database verification failed: {e}")
         return False
 
-def restore_backup(backup_path):
-    """Restore database from backup."""
+def restore_backup(backup_path, db_path=DATABASE_PATH):
+    """Restore the database from a backup (plain or .gz) through the online backup API."""
     if not os.path.exists(backup_path):
         print(f"❌ Backup not found: {backup_path}")
         return False
     
+    temp_path = None
     try:
-        # Create backup of current database if it exists
-        if os.path.exists(DATABASE_PATH):
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            current_backup = f"{DATABASE_PATH}.before_restore.{timestamp}"
-            shutil.copy2(DATABASE_PATH, current_backup)
+        # Keep the current database first
+        if os.path.exists(db_path):
+            current_backup = create_backup(db_path, os.path.dirname(backup_path), keep=None)
             print(f"📊 Current database backed up to: {current_backup}")
         
-        # Restore from backup
-        shutil.copy2(backup_path, DATABASE_PATH)
+        source_path = backup_path
+        if backup_path.endswith('.gz'):
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(backup_path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as target, gzip.open(backup_path, 'rb') as source:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            source_path = temp_path
+        
+        # Copying into the live file through SQLite keeps running connections consistent
+        source = sqlite3.connect(source_path)
+        target = sqlite3.connect(db_path, timeout=30)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
         print(f"✅ Database restored from: {backup_path}")
         return True
         
     except Exception as e:
         print(f"❌ Restore failed: {e}")
         return False
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
 
 def list_backups():
     """List all available backups."""
-    backup_files = []
-    for file in os.listdir(BACKUP_DIR):
-        if file.startswith('found_it.db.backup.'):
-            backup_files.append(file)
+    backups = backup_files()
     
-    if not backup_files:
+    if not backups:
         print("📊 No backups found")
         return []
     
     print("📊 Available backups:")
-    for backup in sorted(backup_files, reverse=True):
-        backup_path = os.path.join(BACKUP_DIR, backup)
+    for backup_path in backups:
         size = os.path.getsize(backup_path)
         mtime = datetime.fromtimestamp(os.path.getmtime(backup_path))
-        print(f"  {backup} ({size} bytes, {mtime.strftime('%Y-%m-%d %H:%M:%S')})")
+        print(f"  {os.path.basename(backup_path)} ({size} bytes, {mtime.strftime('%Y-%m-%d %H:%M:%S')})")
     
-    return backup_files
+    return backups
 
-def cleanup_old_backups(keep_count=5):
-    """Remove old backups, keeping only the most recent ones."""
-    backup_files = []
-    for file in os.listdir(BACKUP_DIR):
-        if file.startswith('found_it.db.backup.'):
-            backup_path = os.path.join(BACKUP_DIR, file)
-            backup_files.append((backup_path, os.path.getmtime(backup_path)))
-    
-    if len(backup_files) <= keep_count:
-        print(f"📊 No cleanup needed. {len(backup_files)} backups (keeping {keep_count})")
-        return
+def cleanup_old_backups(keep_count=BACKUP_KEEP, backup_dir=BACKUP_DIR, db_path=DATABASE_PATH):
+    """Remove old backups, keeping only the most recent ones.
     
-    # Sort by modification time (oldest first)
-    backup_files.sort(key=lambda x: x[1])
+    The full copies that older versions left next to the database file count as backups
+    too, so they go once keep_count newer ones exist. When backup_dir is the database's
+    own directory, current backups are never mistaken for legacy ones.
+    """
+    if keep_count is None:
+        return []
+    backups = backup_files(backup_dir, db_path)
+    current = {os.path.realpath(path) for path in backups}
+    db_dir = os.path.dirname(db_path) or '.'
+    legacy = [os.path.join(db_dir, name) for name in os.listdir(db_dir)
+              if name.startswith((os.path.basename(db_path) + '.backup.', os.path.basename(db_path) + '.backup_'))
+              and os.path.realpath(os.path.join(db_dir, name)) not in current]
+    to_remove = sorted(backups + legacy, key=os.path.getmtime, reverse=True)[keep_count:]
+    
+    if not to_remove:
+        print(f"📊 No cleanup needed (keeping {keep_count} backups)")
+        return []
     
-    # Remove oldest backups
-    to_remove = backup_files[:-keep_count]
-    for backup_path, mtime in to_remove:
+    for backup_path in to_remove:
         try:
             os.remove(backup_path)
             print(f"🗑️ Removed old backup: {os.path.basename(backup_path)}")
         except Exception as e:
             print(f"❌ Failed to remove {backup_path}: {e}")
+    return to_remove
 
 def main():
     """Main function to handle command line arguments."""
     if len(sys.argv) < 2:
-        print("Usage: python database_backup.py [backup|verify|restore|list|cleanup]")
+        print("Usage: python database_backup.py [backup|verify|restore|list|cleanup] [--no-compress]")
         print("Commands:")
-        print("  backup   - Create a new backup")
+        print("  backup   - Create a new online backup (gzip-compressed and quick_check verified)")
         print("  verify   - Verify database integrity")
         print("  restore  - Restore from backup (requires backup filename)")
         print("  list     - List available backups")
-        print("  cleanup  - Remove old backups (keeps 5 most recent)")
+        print(f"  cleanup  - Remove old backups (keeps {BACKUP_KEEP} most recent)")
         return
     
     command = sys.argv[1]
     
     if command == 'backup':
-        create_backup()
+        create_backup(compress='--no-compress' not in sys.argv)
     elif command == 'verify':
         verify_database()
     elif command == 'restore':
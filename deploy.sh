@@ -18,50 +18,25 @@ echo "📊 Database path: $DATABASE_PATH"
 echo "📊 Database directory: $(dirname $DATABASE_PATH)"
 echo "📊 Database exists: $(if [ -f "$DATABASE_PATH" ]; then echo "YES"; else echo "NO"; fi)"
 
-# Create backup if database exists
+# Online backup of the existing database (verified, compressed, oldest ones pruned)
 if [ -f "$DATABASE_PATH" ]; then
     echo "📊 Creating backup of existing database..."
-    cp "$DATABASE_PATH" "$DATABASE_PATH.backup.$(date +%Y%m%d_%H%M%S)"
-    echo "✅ Backup created successfully"
+    python database_backup.py backup
 fi
 
-# Check if database exists, if not create it
-if [ ! -f "$DATABASE_PATH" ]; then
-    echo "📊 Creating new database at $DATABASE_PATH"
-    python -c "
-import os
-from app import app, db
-with app.app_context():
-    db.create_all()
-    print('Database tables created successfully!')
-"
-else
-    echo "📊 Using existing database at $DATABASE_PATH"
-    # Verify database integrity
-    python -c "
-import os
-from app import app, db
-with app.app_context():
-    try:
-        # Test database connection
-        db.session.execute('SELECT 1')
-        print('✅ Database connection verified!')
-        
-        # Check if tables exist
-        from app import User, Category, Item
-        user_count = User.query.count()
-        category_count = Category.query.count()
-        item_count = Item.query.count()
-        print(f'📊 Current data: {user_count} users, {category_count} categories, {item_count} items')
-        
-    except Exception as e:
-        print(f'❌ Database verification failed: {e}')
-        # Recreate database if corrupted
-        db.create_all()
-        print('✅ Database recreated successfully!')
-"
-fi
+# Apply pending schema migrations (new columns and indexes, in place)
+echo "🔄 Applying database migrations..."
+python migrate_db.py
+
+# Create missing tables, the search index and default data once, before any worker starts
+echo "📊 Initializing database..."
+flask --app app init-db
+flask --app app seed
+
+# Precompress CSS/JS so the static handler can serve gzip/brotli copies
+echo "🗜️ Precompressing static assets..."
+flask --app app build-static
 
-# Start the application
+# Start the application (imported once and forked, workers share its memory and do no setup of their own)
 echo "🌐 Starting Found-It App..."
-gunicorn app:app --bind 0.0.0.0:$PORT --workers 2 --timeout 120 
\ No newline at end of file
+gunicorn 'app:create_app()' --preload --bind 0.0.0.0:$PORT --workers 2 --timeout 120 
\ No newline at end of file
@@ -1,118 +1,299 @@
 #!/usr/bin/env python3
 """
 Database Migration Script for Found-It App
-Handles schema updates and data preservation
+Applies versioned schema migrations in place, without dropping any data.
+
+Applied versions are recorded in the schema_migration table together with the
+EXPLAIN QUERY PLAN output of the hot queries before and after each migration.
+Migrations are idempotent (IF NOT EXISTS, column checks), so a run interrupted
+halfway is safe to repeat.
 """
 
 import os
-import sqlite3
-from app import app, db
+import sys
+import json
+import time
+from datetime import datetime
 
-def migrate_database():
-    """Migrate database schema and preserve data"""
-    with app.app_context():
+from sqlalchemy.schema import CreateTable
+
+from app import app, db, DATABASE_PATH, setup_search_index, backup_database
+
+MIGRATIONS = []
+
+# Queries run on every page view or dashboard, with representative parameters
+HOT_QUERIES = {
+    'home_recent_items': "SELECT id FROM item WHERE is_approved = 1 AND status IN ('found', 'lost', 'recovered') "
+                         "ORDER BY created_at DESC LIMIT 10",
+    'items_by_category': "SELECT id FROM item WHERE is_approved = 1 AND status IN ('found', 'lost', 'recovered') "
+                         "AND category_id = 1 ORDER BY created_at DESC, id DESC LIMIT 24",
+    'category_counts': "SELECT category_id, count(id) FROM item WHERE is_approved = 1 "
+                       "AND status IN ('found', 'lost', 'recovered') GROUP BY category_id",
+    'admin_items_by_status': "SELECT id FROM item WHERE status = 'found' ORDER BY created_at DESC",
+    'item_matches': "SELECT id FROM item_match WHERE item1_id = 1 OR item2_id = 1 ORDER BY similarity_score DESC",
+    'all_matches': "SELECT id FROM item_match ORDER BY similarity_score DESC",
+    'pending_claims': "SELECT id FROM claim WHERE status = 'pending' ORDER BY created_at DESC",
+    'user_unread_notifications': "SELECT id FROM notification WHERE user_id = 1 AND is_read = 0",
+    'analytics_range': "SELECT id FROM analytics WHERE date >= '2024-01-01' AND date <= '2024-01-31' ORDER BY date"
+}
+
+
+def migration(version, name):
+    """Register a function as schema migration number version"""
+    def decorator(f):
+        MIGRATIONS.append((version, name, f))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return f
+    return decorator
+
+
+def table_columns(connection, table_name):
+    """{column name: PRAGMA table_info row} of an existing table, empty when it does not exist"""
+    return {row[1]: row for row in connection.exec_driver_sql(f'PRAGMA table_info("{table_name}")')}
+
+
+def query_plans(connection):
+    """EXPLAIN QUERY PLAN details of every hot query"""
+    plans = {}
+    for name, sql in HOT_QUERIES.items():
         try:
-            # Get current database path
-            db_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-            
-            # Check if database exists
-            if os.path.exists(db_path):
-                print(f"📊 Found existing database at {db_path}")
-                
-                # Backup existing data
-                backup_path = db_path + '.backup'
-                import shutil
-                shutil.copy2(db_path, backup_path)
-                print(f"💾 Created backup at {backup_path}")
-                
-                # Get existing data
-                conn = sqlite3.connect(db_path)
-                cursor = conn.cursor()
-                
-                # Store existing data
-                existing_data = {}
-                
-                # Get users
-                try:
-                    cursor.execute("SELECT * FROM user")
-                    existing_data['users'] = cursor.fetchall()
-                    print(f"👥 Found {len(existing_data['users'])} users")
-                except:
-                    print("⚠️  No users table found")
-                
-                # Get items
-                try:
-                    cursor.execute("SELECT * FROM item")
-                    existing_data['items'] = cursor.fetchall()
-                    print(f"📦 Found {len(existing_data['items'])} items")
-                except:
-                    print("⚠️  No items table found")
-                
-                # Get categories
-                try:
-                    cursor.execute("SELECT * FROM category")
-                    existing_data['categories'] = cursor.fetchall()
-                    print(f"📂 Found {len(existing_data['categories'])} categories")
-                except:
-                    print("⚠️  No categories table found")
-                
-                conn.close()
-                
-                # Drop and recreate tables
-                db.drop_all()
-                db.create_all()
-                print("🔄 Recreated database schema")
-                
-                # Restore data with new schema
-                conn = sqlite3.connect(db_path)
-                cursor = conn.cursor()
-                
-                # Restore users
-                if 'users' in existing_data:
-                    for user_data in existing_data['users']:
-                        # Adapt to new schema if needed
-                        cursor.execute("""
-                            INSERT INTO user (username, email, password_hash, role, created_at)
-                            VALUES (?, ?, ?, ?, ?)
-                        """, user_data[:5])  # Adjust based on your schema
-                
-                # Restore categories
-                if 'categories' in existing_data:
-                    for cat_data in existing_data['categories']:
-                        cursor.execute("""
-                            INSERT INTO category (name, description, icon, color)
-                            VALUES (?, ?, ?, ?)
-                        """, cat_data[:4])  # Adjust based on your schema
-                
-                # Restore items
-                if 'items' in existing_data:
-                    for item_data in existing_data['items']:
-                        cursor.execute("""
-                            INSERT INTO item (title, description, category_id, status, location, 
-                                           contact_info, image_path, user_id, created_at, updated_at,
-                                           keywords, color, brand, model, size, material, condition)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, item_data[:17])  # Adjust based on your schema
-                
-                conn.commit()
-                conn.close()
-                print("✅ Data migration completed successfully!")
-                
-            else:
-                # Create new database
-                db.create_all()
-                print("📊 Created new database with current schema")
-                
+            plans[name] = [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + sql)]
         except Exception as e:
-            print(f"❌ Migration failed: {e}")
-            return False
-        
-        return True
+            plans[name] = [f'error: {e}']
+    return plans
 
-if __name__ == "__main__":
-    print("🔄 Starting database migration...")
-    success = migrate_database()
-    if success:
-        print("✅ Migration completed successfully!")
+
+def rebuild_table(connection, table, batch_size=5000):
+    """Recreate a table with the model's schema, copying rows across in rowid batches.
+
+    Only used for changes SQLite cannot make with ALTER TABLE, such as dropping a
+    NOT NULL column. Rows are copied with INSERT ... SELECT so they never pass
+    through Python.
+    """
+    existing = table_columns(connection, table.name)
+    temp_name = f'{table.name}__rebuild'
+    connection.exec_driver_sql(f'DROP TABLE IF EXISTS "{temp_name}"')
+    create = str(CreateTable(table).compile(dialect=connection.dialect))
+    quoted = connection.dialect.identifier_preparer.format_table(table)
+    connection.exec_driver_sql(create.replace(f'CREATE TABLE {quoted} (', f'CREATE TABLE "{temp_name}" (', 1))
+
+    targets, sources = [], []
+    for column in table.columns:
+        if column.name in existing:
+            targets.append(f'"{column.name}"')
+            sources.append(f'"{column.name}"')
+        elif column.default is not None and column.default.is_scalar:
+            targets.append(f'"{column.name}"')
+            sources.append(str(db.literal(column.default.arg).compile(
+                dialect=connection.dialect, compile_kwargs={'literal_binds': True})))
+
+    # Indexes and triggers (such as the item_fts sync triggers) are dropped with the table
+    dependents = [row[0] for row in connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL",
+        (table.name,))]
+
+    low, high = connection.exec_driver_sql(f'SELECT min(rowid), max(rowid) FROM "{table.name}"').first()
+    copied = 0
+    if low is not None:
+        for start in range(low, high + 1, batch_size):
+            copied += connection.exec_driver_sql(
+                f'INSERT INTO "{temp_name}" ({", ".join(targets)}) SELECT {", ".join(sources)} FROM "{table.name}" '
+                f'WHERE rowid >= ? AND rowid < ?', (start, start + batch_size)
+            ).rowcount
+
+    connection.exec_driver_sql(f'DROP TABLE "{table.name}"')
+    connection.exec_driver_sql(f'ALTER TABLE "{temp_name}" RENAME TO "{table.name}"')
+    for sql in dependents:
+        connection.exec_driver_sql(sql)
+    print(f"🔄 Rebuilt table {table.name} ({copied} rows)")
+
+
+@migration(1, 'add model columns missing from older databases')
+def add_missing_columns(connection):
+    for table in db.metadata.sorted_tables:
+        existing = table_columns(connection, table.name)
+        if not existing:
+            continue  # db.create_all() creates whole tables
+        missing = [column for column in table.columns if column.name not in existing]
+        # Leftover NOT NULL columns without a default would reject every insert from the current models
+        legacy = [name for name, info in existing.items()
+                  if name not in table.columns and info[3] and info[4] is None]
+        if legacy or any(not column.nullable and column.server_default is None for column in missing):
+            rebuild_table(connection, table)
+            continue
+        for column in missing:
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}')
+            print(f"➕ Added column {table.name}.{column.name}")
+
+
+@migration(2, 'indexes for listing, matching, claim, notification and analytics queries')
+def add_hot_query_indexes(connection):
+    statements = [
+        'CREATE INDEX IF NOT EXISTS ix_item_public_listing ON item (is_approved, status, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_item_category_status ON item (category_id, status)',
+        'CREATE INDEX IF NOT EXISTS ix_item_status_created ON item (status, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_item_created_at ON item (created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_item_match_item1_score ON item_match (item1_id, similarity_score)',
+        'CREATE INDEX IF NOT EXISTS ix_item_match_item2_score ON item_match (item2_id, similarity_score)',
+        'CREATE INDEX IF NOT EXISTS ix_item_match_score ON item_match (similarity_score)',
+        'CREATE INDEX IF NOT EXISTS ix_claim_status_created ON claim (status, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_claim_created_at ON claim (created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_claim_item_id ON claim (item_id)',
+        'CREATE INDEX IF NOT EXISTS ix_notification_user_read ON notification (user_id, is_read, created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_notification_created_at ON notification (created_at)',
+        'CREATE INDEX IF NOT EXISTS ix_analytics_date ON analytics (date)'
+    ]
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+    connection.exec_driver_sql('ANALYZE')  # Give the query planner row estimates for the new indexes
+
+
+@migration(3, 'item image variants')
+def add_item_image_variants(connection):
+    if 'image_variants' not in table_columns(connection, 'item'):
+        connection.exec_driver_sql('ALTER TABLE item ADD COLUMN image_variants TEXT')
+    print("ℹ️ Run 'flask build-image-variants' to resize images uploaded before this migration")
+
+
+@migration(4, 'item photo hashes for image matching')
+def add_item_image_hash(connection):
+    if 'image_hash' not in table_columns(connection, 'item'):
+        connection.exec_driver_sql('ALTER TABLE item ADD COLUMN image_hash VARCHAR(16)')
+    print("ℹ️ Run 'flask build-image-variants' to hash photos uploaded before this migration")
+
+
+@migration(5, 'notification digests')
+def add_notification_digest_columns(connection):
+    existing = table_columns(connection, 'notification')
+    if 'digest_key' not in existing:
+        connection.exec_driver_sql('ALTER TABLE notification ADD COLUMN digest_key VARCHAR(50)')
+    if 'event_count' not in existing:
+        connection.exec_driver_sql('ALTER TABLE notification ADD COLUMN event_count INTEGER DEFAULT 1')
+
+
+@migration(6, 'background job retry backoff')
+def add_job_run_after(connection):
+    if 'run_after' not in table_columns(connection, 'background_job'):
+        connection.exec_driver_sql('ALTER TABLE background_job ADD COLUMN run_after DATETIME')
+
+
+def ensure_migration_table(connection):
+    connection.exec_driver_sql("""
+        CREATE TABLE IF NOT EXISTS schema_migration (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL,
+            duration_ms REAL,
+            query_plans TEXT
+        )
+    """)
+
+
+def applied_versions(connection):
+    ensure_migration_table(connection)
+    return {row[0] for row in connection.exec_driver_sql('SELECT version FROM schema_migration')}
+
+
+def backup_before_migrating(db_path):
+    """Take an online backup before the first pending migration runs"""
+    if not db_path or not os.path.exists(db_path):
+        return None
+    return backup_database()
+
+
+def migrate_database(engine=None, backup=True):
+    """Apply every pending migration; returns the list of versions applied"""
+    with app.app_context():
+        engine = engine or db.engine
+        with engine.begin() as connection:
+            done = applied_versions(connection)
+        pending = [m for m in MIGRATIONS if m[0] not in done]
+        if not pending:
+            print("✅ Database schema is up to date")
+            return []
+
+        db.metadata.create_all(engine)  # Tables added since the database was created
+        if backup and engine is db.engine:
+            backup_before_migrating(DATABASE_PATH)
+
+        applied = []
+        for version, name, apply in pending:
+            with engine.begin() as connection:
+                before = query_plans(connection)
+                start = time.perf_counter()
+                apply(connection)
+                duration = (time.perf_counter() - start) * 1000
+                after = query_plans(connection)
+                plans = {query: {'before': before[query], 'after': after[query]} for query in HOT_QUERIES}
+                connection.exec_driver_sql(
+                    'INSERT INTO schema_migration (version, name, applied_at, duration_ms, query_plans) VALUES (?, ?, ?, ?, ?)',
+                    (version, name, datetime.utcnow().isoformat(), duration, json.dumps(plans))
+                )
+            applied.append(version)
+            print(f"✅ Applied migration {version}: {name} ({duration:.0f} ms)")
+            for query, plan in plans.items():
+                if plan['before'] != plan['after']:
+                    print(f"   📈 {query}: {' | '.join(plan['before'])}  ->  {' | '.join(plan['after'])}")
+
+        if engine is db.engine:
+            app.config['FTS_AVAILABLE'] = setup_search_index()  # Rebuilt tables lose their triggers
+        return applied
+
+
+def show_status(engine=None):
+    """Print applied and pending migrations"""
+    with app.app_context():
+        engine = engine or db.engine
+        with engine.begin() as connection:
+            ensure_migration_table(connection)
+            rows = {row[0]: row for row in connection.exec_driver_sql(
+                'SELECT version, name, applied_at, duration_ms FROM schema_migration')}
+        for version, name, apply in MIGRATIONS:
+            if version in rows:
+                print(f"✅ {version:>3} {name} (applied {rows[version][2]}, {rows[version][3]:.0f} ms)")
+            else:
+                print(f"⏳ {version:>3} {name} (pending)")
+
+
+def show_plans(version=None, engine=None):
+    """Print the recorded before/after query plans of one migration (default: the latest)"""
+    with app.app_context():
+        engine = engine or db.engine
+        with engine.begin() as connection:
+            ensure_migration_table(connection)
+            sql = 'SELECT version, name, query_plans FROM schema_migration'
+            if version is None:
+                row = connection.exec_driver_sql(sql + ' ORDER BY version DESC LIMIT 1').first()
+            else:
+                row = connection.exec_driver_sql(sql + ' WHERE version = ?', (version,)).first()
+        if not row:
+            print("❌ No recorded migration found")
+            return
+        print(f"📊 Query plans around migration {row[0]}: {row[1]}")
+        for query, plan in json.loads(row[2]).items():
+            print(f"  {query}")
+            print(f"    before: {' | '.join(plan['before'])}")
+            print(f"    after:  {' | '.join(plan['after'])}")
+
+
+def main():
+    """Main function to handle command line arguments."""
+    command = sys.argv[1] if len(sys.argv) > 1 else 'migrate'
+    if command == 'migrate':
+        print("🔄 Starting database migration...")
+        migrate_database()
+    elif command == 'status':
+        show_status()
+    elif command == 'plans':
+        show_plans(int(sys.argv[2]) if len(sys.argv) > 2 else None)
     else:
-        print("❌ Migration failed!") 
\ No newline at end of file
+        print("Usage: python migrate_db.py [migrate|status|plans [version]]")
+        print("Commands:")
+        print("  migrate  - Apply pending migrations (default)")
+        print("  status   - List applied and pending migrations")
+        print("  plans    - Show EXPLAIN QUERY PLAN before/after a migration")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Backup Tests for Found-It App
+Checks online backups of a database that is being written to, verification and retention.
+"""
+
+import gzip
+import os
+import sqlite3
+import threading
+import time
+
+from conftest import TEST_DATA_DIR
+from app import app, scheduled_backup
+from database_backup import create_backup, backup_files, cleanup_old_backups, quick_check, restore_backup
+
+
+def scratch_database(name, rows=2000):
+    """A WAL-mode database with some bulk to copy"""
+    path = os.path.join(TEST_DATA_DIR, name)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('CREATE TABLE IF NOT EXISTS note (id INTEGER PRIMARY KEY, body TEXT)')
+    conn.executemany('INSERT INTO note (body) VALUES (?)', [('x' * 500,) for i in range(rows)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_import_does_not_copy_the_database():
+    names = os.listdir(os.path.dirname(os.environ['DATABASE_PATH']))
+    assert not [name for name in names if '.backup' in name]
+
+
+def test_backup_while_writing_is_consistent_and_pruned():
+    db_path = scratch_database('live.db')
+    backup_dir = os.path.join(TEST_DATA_DIR, 'backups_live')
+    with open(db_path + '.backup_20240101_000000', 'wb') as f:
+        f.write(b'old full copy')  # Left behind by the import-time backups
+    stop = threading.Event()
+    writes = []
+
+    def writer():
+        conn = sqlite3.connect(db_path, timeout=10)
+        while not stop.is_set():
+            conn.execute("INSERT INTO note (body) VALUES ('during backup')")
+            conn.commit()
+            writes.append(time.perf_counter())
+            time.sleep(0.001)
+        conn.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        paths = []
+        for i in range(3):
+            paths.append(create_backup(db_path, backup_dir, keep=2, pages=16))
+            time.sleep(1.1)  # Distinct timestamps
+    finally:
+        stop.set()
+        thread.join()
+    assert all(paths) and len(writes) > 10  # The writer kept committing throughout
+
+    assert backup_files(backup_dir, db_path) == [paths[2], paths[1]]
+    assert not os.path.exists(paths[0]) and not os.path.exists(db_path + '.backup_20240101_000000')
+
+    restored = os.path.join(TEST_DATA_DIR, 'restored.db')
+    with gzip.open(paths[2], 'rb') as source, open(restored, 'wb') as target:
+        target.write(source.read())
+    assert quick_check(restored) == 'ok'
+    conn = sqlite3.connect(restored)
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+    assert conn.execute('SELECT count(*) FROM note').fetchone()[0] >= 2000
+    conn.close()
+
+    # Restoring goes through SQLite as well, so an open connection sees the restored rows
+    reader = sqlite3.connect(db_path)
+    assert restore_backup(paths[2], db_path)
+    assert reader.execute('SELECT count(*) FROM note').fetchone()[0] < 2000 + len(writes)
+    reader.close()
+
+
+def test_backups_next_to_the_database_survive_cleanup():
+    backup_dir = os.path.join(TEST_DATA_DIR, 'same_dir')
+    os.makedirs(backup_dir)
+    db_path = scratch_database(os.path.join('same_dir', 'found_it.db'), rows=10)
+    legacy = [db_path + '.backup.20240101_000000', db_path + '.backup_20240102_000000']
+    for age, path in enumerate(legacy):
+        with open(path, 'wb') as f:
+            f.write(b'old full copy')
+        os.utime(path, (time.time() - 100 + age, time.time() - 100 + age))
+
+    first = create_backup(db_path, backup_dir, keep=2)
+    assert first and os.path.exists(first)  # Not swept up as a legacy copy
+    assert os.path.exists(legacy[1]) and not os.path.exists(legacy[0])  # Legacy copies count toward keep
+
+    time.sleep(1.1)  # Distinct timestamps
+    second = create_backup(db_path, backup_dir, keep=2)
+    assert backup_files(backup_dir, db_path) == [second, first]
+    assert not os.path.exists(legacy[1])
+    assert cleanup_old_backups(2, backup_dir, db_path) == []
+
+
+def test_scheduled_backup_runs_once_per_interval():
+    backup_dir = os.path.join(TEST_DATA_DIR, 'backups_scheduled')
+    app.config['BACKUP_DIR'] = backup_dir
+    try:
+        first = scheduled_backup()
+        assert first and first.endswith('.db.gz') and os.path.dirname(first) == backup_dir
+        assert scheduled_backup() is None  # Another worker already backed up within the interval
+        assert len(backup_files(backup_dir, os.environ['DATABASE_PATH'])) == 1
+    finally:
+        app.config['BACKUP_DIR'] = os.path.join(TEST_DATA_DIR, 'backups')
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Statistics Counter Tests for Found-It App
+Checks that the stat_counter table follows every ORM write and feeds the dashboards.
+"""
+
+from app import app, db, Category, Claim, Item, ItemMatch, Message, User, get_counters, reconcile_counters
+
+
+def test_counters_follow_orm_writes(clean_items):
+    with app.app_context():
+        category_ids = [c.id for c in Category.query.order_by(Category.id)]
+        items = [Item(title=f'Blue umbrella {i}', status='lost' if i % 2 else 'found', category_id=category_ids[i % 3],
+                      is_approved=True) for i in range(6)]
+        db.session.add_all(items)
+        db.session.add(Message(name='Ada', email='ada@example.com', message='Hello'))
+        db.session.commit()
+
+        counters = get_counters()
+        assert counters['items.total'] == 6
+        assert counters['items.status.lost'] == counters['items.status.found'] == 3
+        assert counters[f'items.category_id.{category_ids[0]}'] == 2
+        assert counters['messages.is_read.0'] == 1
+
+        # Status changes on expired instances move the row between counters
+        items[0].status = 'claimed'
+        items[1].category_id = category_ids[4]
+        Message.query.first().is_read = True
+        db.session.delete(items[2])
+        db.session.add(Claim(item_id=items[3].id, claimer_name='Ada', claimer_email='ada@example.com', claim_proof='Receipt'))
+        db.session.commit()
+
+        counters = get_counters()
+        assert counters['items.total'] == 5
+        assert counters['items.status.found'] == 1
+        assert counters['items.status.claimed'] == 1
+        assert counters[f'items.category_id.{category_ids[4]}'] == 1
+        assert counters['messages.is_read.0'] == 0
+        assert counters['messages.is_read.1'] == 1
+        assert counters['claims.status.pending'] == 1
+        assert reconcile_counters(fix=False) == {}
+
+        # A rolled back flush leaves the counters untouched
+        db.session.add(Item(title='Never saved', category_id=category_ids[0]))
+        db.session.flush()
+        db.session.rollback()
+        assert get_counters()['items.total'] == 5
+
+
+def test_counters_follow_matching_job_and_reconcile_reports_drift(clean_items):
+    with app.app_context():
+        client = app.test_client()
+        category_id = Category.query.first().id
+        db.session.add(Item(title='Black leather wallet', description='wallet with id cards', status='found',
+                            category_id=category_id, location='library', is_approved=True))
+        db.session.commit()
+        for i in range(2):  # Posting twice re-runs matching without double counting
+            client.post('/post_item', data={'title': 'Black leather wallet', 'description': 'lost wallet with id cards',
+                                            'category_id': str(category_id), 'status': 'lost', 'location': 'library'})
+        assert ItemMatch.query.count() > 0
+        assert reconcile_counters(fix=False) == {}
+
+        ItemMatch.query.delete()  # Bulk delete bypasses the session events
+        db.session.commit()
+        drift = reconcile_counters()
+        assert drift['matches.total'][1] == 0
+        assert get_counters()['matches.total'] == 0
+        assert reconcile_counters(fix=False) == {}
+
+
+def test_dashboard_reads_counters_in_one_query(clean_items, admin_client, query_counter):
+    with app.app_context():
+        client = admin_client
+        client.get('/admin/dashboard')  # Warm up the settings cache
+        with query_counter() as queries:
+            for path in ('/admin/dashboard', '/api/analytics'):
+                assert client.get(path).status_code == 200
+        assert not [s for s in queries.statements if 'count(' in s.lower()]
+        assert not [s for s in queries.statements if s.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        assert sum('FROM stat_counter' in s for s in queries.statements) == 2  # One counters read per view
+
+        summary = client.get('/api/analytics').get_json()['summary']
+        assert summary['total_users'] == User.query.count()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Image Pipeline Tests for Found-It App
+Checks that uploads get resized WebP/JPEG variants and that listings use them.
+"""
+
+import io
+import json
+import os
+from datetime import timedelta
+
+from PIL import Image
+
+from conftest import TEST_DATA_DIR
+from app import app, db, Category, Item, UploadBlob, collect_upload_garbage
+
+
+def photo(width=2400, height=1800, image_format='JPEG'):
+    """An in-memory photo-sized upload"""
+    buffer = io.BytesIO()
+    image = Image.linear_gradient('L').resize((width, height)).convert('RGB')
+    image.save(buffer, image_format, quality=95)
+    buffer.seek(0)
+    return buffer
+
+
+def use_temp_uploads():
+    upload_folder = os.path.join(TEST_DATA_DIR, 'static', 'uploads')
+    app.config['UPLOAD_FOLDER'] = upload_folder
+    return upload_folder
+
+
+def test_posted_image_gets_variants_and_listing_uses_them(clean_items):
+    original_folder = app.config['UPLOAD_FOLDER']
+    upload_folder = use_temp_uploads()
+    try:
+        with app.app_context():
+            category_id = Category.query.first().id
+            client = app.test_client()
+            client.post('/post_item', data={
+                'title': 'Red umbrella', 'description': 'folding umbrella', 'category_id': str(category_id),
+                'status': 'found', 'location': 'library', 'image': (photo(), 'umbrella.jpg')
+            }, content_type='multipart/form-data')
+
+            item = Item.query.filter_by(title='Red umbrella').one()
+            assert item.image_path.startswith('uploads/blobs/') and item.image_path.endswith('.jpg')
+            assert len(item.image_hash) == 16  # Hashed for matching in the same job
+            variants = json.loads(item.image_variants)
+            assert {name: v['width'] for name, v in variants.items()} == app.config['IMAGE_VARIANTS']
+            assert variants['card']['height'] == 600  # Aspect ratio kept
+            original_size = os.path.getsize(os.path.join(upload_folder, os.path.relpath(item.image_path, 'uploads')))
+            for variant in variants.values():
+                for key in ('webp', 'jpeg'):
+                    path = os.path.join(upload_folder, os.path.relpath(variant[key], 'uploads'))
+                    assert os.path.getsize(path) < original_size
+            with Image.open(os.path.join(upload_folder, os.path.relpath(variants['thumb']['webp'], 'uploads'))) as thumb:
+                assert thumb.format == 'WEBP' and thumb.size == (400, 300)
+
+            for path in ('/', '/items'):
+                html = client.get(path).get_data(as_text=True)
+                assert 'type="image/webp"' in html and '800w' in html and 'loading="lazy"' in html
+                assert item.image_path not in html
+    finally:
+        app.config['UPLOAD_FOLDER'] = original_folder
+
+
+def test_backfill_command_builds_missing_variants(clean_items):
+    original_folder = app.config['UPLOAD_FOLDER']
+    upload_folder = use_temp_uploads()
+    try:
+        with app.app_context():
+            os.makedirs(upload_folder, exist_ok=True)
+            with open(os.path.join(upload_folder, 'old.png'), 'wb') as f:
+                f.write(photo(1000, 500, 'PNG').getvalue())
+            category_id = Category.query.first().id
+            db.session.add(Item(title='Old upload', category_id=category_id, image_path='uploads/old.png', is_approved=True))
+            db.session.add(Item(title='Missing file', category_id=category_id, image_path='uploads/gone.jpg', is_approved=True))
+            db.session.commit()
+
+            result = app.test_cli_runner().invoke(args=['build-image-variants'])
+            assert 'built for 1 item(s), 1 failed' in result.output
+            variants = json.loads(Item.query.filter_by(title='Old upload').one().image_variants)
+            assert variants['full']['width'] == 1000  # Never upscaled
+            assert variants['thumb']['width'] == 400
+    finally:
+        app.config['UPLOAD_FOLDER'] = original_folder
+
+
+def test_uploads_are_deduplicated_and_reference_counted(clean_items, admin_client):
+    original_folder = app.config['UPLOAD_FOLDER']
+    upload_folder = use_temp_uploads()
+    try:
+        with app.app_context():
+            UploadBlob.query.delete()
+            db.session.commit()
+            category_id = Category.query.first().id
+            client = admin_client
+            same = photo(640, 480).getvalue()
+            other = photo(480, 640).getvalue()
+            for title, data in (('First', same), ('Second', same), ('Third', other)):
+                client.post('/admin/items/add', data={
+                    'title': title, 'category_id': str(category_id), 'status': 'found', 'is_approved': 'on',
+                    'image': (io.BytesIO(data), 'IMG_0001.jpg')  # Same file name every time
+                }, content_type='multipart/form-data')
+            first, second, third = (Item.query.filter_by(title=t).one() for t in ('First', 'Second', 'Third'))
+            assert first.image_path == second.image_path != third.image_path
+            assert db.session.get(UploadBlob, os.path.basename(first.image_path).split('.')[0]).ref_count == 2
+
+            # Replacing and deleting drop references; the blob goes once nothing uses it
+            other_path = os.path.join(upload_folder, os.path.relpath(third.image_path, 'uploads'))
+            client.post(f'/admin/items/edit/{third.id}', data={
+                'title': 'Third', 'category_id': str(category_id), 'status': 'found',
+                'image': (io.BytesIO(same), 'replacement.jpg')
+            }, content_type='multipart/form-data')
+            db.session.expire_all()
+            third = db.session.get(Item, third.id)
+            assert third.image_path == first.image_path
+            client.get(f'/admin/items/delete/{first.id}')
+            blobs = {blob.path: blob.ref_count for blob in UploadBlob.query.all()}
+            assert blobs == {first.image_path: 2, os.path.relpath(other_path, os.path.dirname(upload_folder)): 0}
+
+            assert collect_upload_garbage()['deleted_blobs'] == 0  # Within the grace period
+            app.config['UPLOAD_GC_GRACE'] = timedelta(seconds=-1)
+            try:
+                assert collect_upload_garbage(dry_run=True)['deleted_blobs'] == 1
+                assert os.path.exists(other_path)
+                report = collect_upload_garbage()
+            finally:
+                app.config['UPLOAD_GC_GRACE'] = timedelta(hours=1)
+            assert report['deleted_blobs'] == 1 and report['recounted'] == 0
+            assert not os.path.exists(other_path)
+            assert os.path.exists(os.path.join(upload_folder, os.path.relpath(second.image_path, 'uploads')))
+    finally:
+        app.config['UPLOAD_FOLDER'] = original_folder
+
+
+def test_oversized_upload_is_rejected():
+    original_limit = app.config['MAX_CONTENT_LENGTH']
+    app.config['MAX_CONTENT_LENGTH'] = 1024 * 1024
+    try:
+        with app.app_context():
+            category_id = Category.query.first().id
+            before = Item.query.count()
+            response = app.test_client().post('/post_item', data={
+                'title': 'Huge photo', 'category_id': str(category_id), 'status': 'found',
+                'image': (io.BytesIO(b'0' * (2 * 1024 * 1024)), 'huge.jpg')
+            }, content_type='multipart/form-data')
+            assert response.status_code == 302
+            assert Item.query.count() == before
+    finally:
+        app.config['MAX_CONTENT_LENGTH'] = original_limit
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Background Job Tests for Found-It App
+Checks that matching runs through the persistent job queue when items are posted or changed.
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+from app import (app, db, BackgroundJob, Category, Item, ItemMatch, Notification, run_pending_jobs, wait_for_job,
+                 job_worker, smart_matcher)
+
+
+def post_pair(client, category_id):
+    """Post a found item and a matching lost item through the public form"""
+    client.post('/post_item', data={
+        'title': 'Black Samsung phone', 'description': 'black samsung phone with cracked screen',
+        'category_id': str(category_id), 'status': 'found', 'location': 'Main library'
+    })
+    return client.post('/post_item', data={
+        'title': 'Black Samsung phone', 'description': 'lost my black samsung phone, cracked screen',
+        'category_id': str(category_id), 'status': 'lost', 'location': 'Main library'
+    })
+
+
+def test_eager_mode_matches_before_redirect(clean_items):
+    with app.app_context():
+        category_id = Category.query.first().id
+        response = post_pair(app.test_client(), category_id)
+        assert response.status_code == 302
+        
+        lost = Item.query.filter_by(status='lost').one()
+        assert ItemMatch.query.filter_by(item1_id=lost.id).count() == 1
+        assert Notification.query.filter_by(type='match').count() >= 1
+        assert BackgroundJob.query.filter_by(status='done').count() == 2
+
+
+def test_thread_mode_runs_after_response(clean_items):
+    with app.app_context():
+        app.config['JOB_QUEUE_MODE'] = 'thread'
+        try:
+            post_pair(app.test_client(), Category.query.first().id)
+            job = BackgroundJob.query.order_by(BackgroundJob.id.desc()).first()
+            job = wait_for_job(job.id, timeout=10)
+            assert job.status == 'done'
+            assert job.to_dict()['result'] == {'matches': 1}
+        finally:
+            app.config['JOB_QUEUE_MODE'] = 'eager'
+            job_worker.stop()  # Its polling would show up in later tests' query counts
+
+
+def test_jobs_survive_restart_and_failures_are_recorded(clean_items):
+    with app.app_context():
+        # A job written by a previous process is still picked up
+        db.session.add(BackgroundJob(kind='match_item', payload='{"item_id": 12345}'))
+        # Unknown job kinds fail after the configured number of attempts
+        db.session.add(BackgroundJob(kind='no_such_job', payload='{}'))
+        db.session.commit()
+        
+        assert run_pending_jobs() == 2
+        # A failed attempt backs off instead of being picked up again straight away
+        failed = BackgroundJob.query.filter_by(kind='no_such_job').one()
+        assert failed.status == 'pending' and failed.attempts == 1
+        assert failed.run_after >= datetime.utcnow() + app.config['JOB_RETRY_DELAY'] - timedelta(seconds=5)
+        assert run_pending_jobs() == 0
+        
+        for attempt in range(2, app.config['JOB_MAX_ATTEMPTS'] + 1):
+            failed.run_after = datetime.utcnow() - timedelta(seconds=1)  # Let the backoff pass
+            db.session.commit()
+            assert run_pending_jobs() == 1
+            db.session.expire_all()
+        statuses = dict(db.session.query(BackgroundJob.kind, BackgroundJob.status).all())
+        assert statuses == {'match_item': 'done', 'no_such_job': 'failed'}
+        assert failed.attempts == app.config['JOB_MAX_ATTEMPTS']
+
+
+def test_edits_and_status_changes_rematch_only_the_item(clean_items, admin_client):
+    with app.app_context():
+        category_id = Category.query.first().id
+        client = admin_client
+        post_pair(client, category_id)
+        found = Item.query.filter_by(status='found').one()
+        lost = Item.query.filter_by(status='lost').one()
+        assert ItemMatch.query.count() == 1
+        
+        def edit(item, **changes):
+            form = {'title': item.title, 'description': item.description, 'category_id': str(item.category_id),
+                    'status': item.status, 'location': item.location, 'contact_info': item.contact_info or '',
+                    'is_approved': 'on'}
+            form.update(changes)
+            jobs = BackgroundJob.query.count()
+            client.post(f'/admin/items/edit/{item.id}', data=form)
+            db.session.expire_all()
+            new_jobs = BackgroundJob.query.order_by(BackgroundJob.id).offset(jobs).all()
+            assert all(job.status == 'done' for job in new_jobs)  # Ran before the redirect
+            return [job.to_dict()['payload']['item_id'] for job in new_jobs]
+        
+        # Columns matching ignores queue nothing
+        assert edit(found, contact_info='front desk') == []
+        # An edit re-matches just that item; pairs that no longer qualify are removed
+        assert edit(found, title='Blue umbrella', description='folding umbrella') == [found.id]
+        assert ItemMatch.query.count() == 0
+        assert edit(found, title='Black Samsung phone', description='black samsung phone, cracked screen') == [found.id]
+        pairs = [(m.item1_id, m.item2_id) for m in ItemMatch.query.all()]
+        assert pairs == [(found.id, lost.id)]
+        # Re-matching the other side updates the stored pair instead of adding the reverse one
+        assert edit(lost, location='Main library entrance') == [lost.id]
+        assert [(m.item1_id, m.item2_id) for m in ItemMatch.query.all()] == pairs
+        # Claimed items stop matching, and deleting a matched item takes its matches along
+        assert edit(lost, status='claimed') == [lost.id]
+        assert ItemMatch.query.count() == 0
+        edit(lost, status='lost')
+        assert ItemMatch.query.count() == 1
+        client.get(f'/admin/items/delete/{found.id}')
+        assert Item.query.count() == 1 and ItemMatch.query.count() == 0
+
+
+def test_rematch_keeps_pairs_with_one_approved_side(clean_items):
+    with app.app_context():
+        category_id = Category.query.first().id
+        found = Item(title='Black Samsung phone', description='black samsung phone with cracked screen',
+                     category_id=category_id, status='found', location='Main library', is_approved=True)
+        lost = Item(title='Black Samsung phone', description='lost my black samsung phone, cracked screen',
+                    category_id=category_id, status='lost', location='Main library', is_approved=False)
+        db.session.add_all([found, lost])
+        db.session.commit()
+        run_pending_jobs()
+        assert ItemMatch.query.count() == 1
+        
+        # Re-matching the approved side scores the unapproved one too, as rematch_all does
+        found.location = 'Main library entrance'
+        db.session.commit()
+        run_pending_jobs()
+        assert ItemMatch.query.count() == 1
+        
+        # Existing partners are re-scored even when they no longer share an index token
+        found.title, found.description = 'Water bottle', 'steel bottle'
+        db.session.commit()
+        assert lost.id not in smart_matcher.candidate_ids(found, 'lost', approved_only=False)
+        run_pending_jobs()
+        assert ItemMatch.query.count() == 0
+
+
+def test_request_only_runs_jobs_its_own_writes_queued(clean_items):
+    with app.app_context():
+        category_id = Category.query.first().id
+    
+    def post_elsewhere():
+        with app.app_context():  # Another worker thread with its own session
+            db.session.add(Item(title='Black Samsung phone', category_id=category_id, status='found', is_approved=True))
+            db.session.commit()
+    
+    with app.test_request_context('/'):
+        app.preprocess_request()
+        thread = threading.Thread(target=post_elsewhere)
+        thread.start()
+        thread.join()
+        app.process_response(app.response_class())  # Finishes while the other thread's job is pending
+        assert BackgroundJob.query.one().status == 'pending'
+        run_pending_jobs()
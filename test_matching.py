@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Smart Matching Tests for Found-It App
+Checks that the indexed matching path agrees with the brute-force scan.
+"""
+
+import itertools
+import random
+import string
+import zlib
+
+from PIL import Image
+
+from app import (app, db, Item, ItemMatch, ItemToken, ItemFeatures, ItemImageHash, Category, BackgroundJob, RematchRun,
+                 smart_matcher, match_cache, rebuild_item_features, run_pending_jobs, rematch_all, reconcile_counters,
+                 image_dhash, hamming_distance)
+
+OBJECTS = ['iphone', 'samsung phone', 'laptop', 'wallet', 'student id card', 'car keys',
+           'water bottle', 'backpack', 'calculator', 'textbook', 'umbrella', 'wrist watch']
+COLORS = ['black', 'blue', 'red', 'silver', 'brown', 'white']
+PLACES = ['main library', 'faculty of engineering', 'sports complex', 'cafeteria', 'hostel block b']
+
+
+def make_item(title, status, category_id, description='', location='', is_approved=True):
+    item = Item(
+        title=title,
+        description=description,
+        category_id=category_id,
+        status=status,
+        location=location,
+        keywords=','.join(smart_matcher.extract_keywords(title + ' ' + description)),
+        is_approved=is_approved
+    )
+    db.session.add(item)
+    return item
+
+
+def build_corpus(size, seed=7):
+    """Create a random mix of lost and found reports"""
+    rng = random.Random(seed)
+    category_ids = [c.id for c in Category.query.all()]
+    for i in range(size):
+        color = rng.choice(COLORS)
+        thing = rng.choice(OBJECTS)
+        place = rng.choice(PLACES)
+        make_item(
+            f'{color} {thing}',
+            rng.choice(['lost', 'found']),
+            rng.choice(category_ids[:3]),
+            description=f'{color} {thing} left near the {place}',
+            location=place
+        )
+    db.session.commit()
+
+
+def match_summary(matches):
+    return [(m['item'].id, round(m['similarity'], 9)) for m in matches]
+
+
+def test_indexed_matches_equal_brute_force(clean_items):
+    with app.app_context():
+        build_corpus(1500)
+        lost = Item.query.filter_by(status='lost').order_by(Item.id).limit(40).all()
+        # Well past the 200 candidates a top-K cut used to keep, so truncation would show up here
+        assert max(len(smart_matcher.candidate_ids(item, 'found')) for item in lost) > 200
+        # Items sharing a token but unable to reach the threshold are left out
+        assert sum(len(smart_matcher.candidate_ids(item, 'found')) for item in lost) < \
+            sum(len(smart_matcher.candidate_ids(item, 'found', threshold=0)) for item in lost) * 0.9
+        for item in lost:
+            indexed = smart_matcher.find_matches(item, use_index=True)
+            brute_force = smart_matcher.find_matches(item, use_index=False)
+            assert match_summary(indexed) == match_summary(brute_force)
+
+
+def test_score_many_bounds_exact_similarity(clean_items):
+    with app.app_context():
+        build_corpus(80, seed=11)
+        items = Item.query.all()
+        gaps = []
+        for item in items[:20]:
+            bounds = smart_matcher.score_many(item, items)
+            fallback = smart_matcher._score_many_python(item, items)
+            for other, bound, slow_bound in zip(items, bounds, fallback):
+                exact = smart_matcher.calculate_similarity(item, other)
+                assert bound >= exact - 1e-9
+                assert abs(bound - slow_bound) < 1e-9
+                gaps.append(bound - exact)
+        assert sum(gaps) / len(gaps) < 0.15
+
+
+def test_score_many_bound_holds_for_colliding_keywords(clean_items):
+    with app.app_context():
+        category_id = Category.query.first().id
+        # Shared keywords that all land in one crc32 % 512 bucket, the hashed bitset score_many used to use
+        words = (''.join(letters) for letters in itertools.product(string.ascii_lowercase, repeat=4))
+        shared = ' '.join(itertools.islice((w for w in words if zlib.crc32(w.encode()) % 512 == 346), 6))
+        lost = make_item('leather wallet', 'lost', category_id, f'{shared} zzqa', 'library')
+        found = make_item('leather wallet', 'found', category_id, f'{shared} zzqb', 'library')
+        db.session.commit()
+        exact = smart_matcher.calculate_similarity(lost, found)
+        assert smart_matcher.score_many(lost, [found])[0] >= exact - 1e-9
+        for use_index in (True, False):
+            matches = smart_matcher.find_matches(lost, threshold=exact, use_index=use_index)
+            assert [m['item'].id for m in matches] == [found.id]
+
+
+def test_pruned_similarity_equals_exact_score_for_passing_pairs(clean_items):
+    with app.app_context():
+        build_corpus(80, seed=13)
+        items = Item.query.all()
+        rng = random.Random(13)
+        for item in items[::3]:  # Some photos so the image blend is covered too
+            item.image_hash = f'{rng.getrandbits(64):016x}'
+        db.session.commit()
+        pruned = 0
+        for threshold in (0.3, 0.6, 0.8):
+            for item in items[:20]:
+                for other in items:
+                    exact = smart_matcher.calculate_similarity(item, other)
+                    bounded = smart_matcher.calculate_similarity(item, other, threshold=threshold)
+                    if bounded is None:
+                        assert exact < threshold
+                        pruned += 1
+                    else:
+                        assert bounded == exact
+        assert pruned > 0
+
+
+def test_index_follows_edits_and_deletes(clean_items):
+    with app.app_context():
+        category_id = Category.query.first().id
+        found = make_item('Wallet', 'found', category_id, 'leather wallet with student id', 'library')
+        lost = make_item('Umbrella', 'lost', category_id, 'folding umbrella', 'cafeteria')
+        db.session.commit()
+        assert found.id not in smart_matcher.candidate_ids(lost, 'found')
+        
+        lost.title = 'Leather wallet'
+        lost.description = 'leather wallet with my student id'
+        lost.keywords = ','.join(smart_matcher.extract_keywords(lost.title + ' ' + lost.description))
+        db.session.commit()
+        assert smart_matcher.candidate_ids(lost, 'found') == [found.id]
+        
+        db.session.delete(found)
+        db.session.commit()
+        assert ItemToken.query.filter_by(item_id=found.id).count() == 0
+        assert smart_matcher.candidate_ids(lost, 'found') == []
+
+
+def test_feature_records_follow_edits_and_version(clean_items):
+    with app.app_context():
+        category_id = Category.query.first().id
+        item = make_item('Red Umbrella', 'lost', category_id, 'Folding umbrella, red', 'Cafeteria')
+        db.session.commit()
+        record = db.session.get(ItemFeatures, item.id)
+        assert record.version == smart_matcher.FEATURE_VERSION
+        assert record.title == 'red umbrella'
+        assert record.keywords == 'folding,red,umbrella'
+        
+        item.location = 'Main Library'
+        db.session.commit()
+        db.session.expire_all()
+        assert db.session.get(ItemFeatures, item.id).location == 'main library'
+        
+        # Stored features give exactly the same scores as computing them on the fly
+        other = make_item('Umbrella', 'found', category_id, 'red folding umbrella', 'library')
+        db.session.commit()
+        stored = smart_matcher.load_features([item, other])
+        assert smart_matcher.calculate_similarity(item, other, *stored) == smart_matcher.calculate_similarity(item, other)
+        
+        # Records from an older tokenizer version are rebuilt in bulk
+        ItemFeatures.query.update({'version': 0, 'keywords': ''})
+        db.session.commit()
+        assert rebuild_item_features() == 2
+        assert ItemFeatures.query.filter_by(version=smart_matcher.FEATURE_VERSION).count() == 2
+        assert rebuild_item_features() == 0
+
+
+def flip_bits(image_hash, bits):
+    value = int(image_hash, 16)
+    for bit in bits:
+        value ^= 1 << bit
+    return format(value, '016x')
+
+
+def test_photo_hashes_find_near_duplicates(clean_items):
+    with app.app_context():
+        category_ids = [c.id for c in Category.query.all()]
+        
+        # A photo and a smaller, recompressed copy of it hash almost the same; another photo does not
+        photo = Image.merge('RGB', [Image.effect_noise((24, 32), 80) for channel in range(3)]).resize((600, 800))
+        copy = photo.resize((300, 400)).convert('L')
+        other = Image.merge('RGB', [Image.effect_noise((24, 32), 80) for channel in range(3)]).resize((600, 800))
+        assert hamming_distance(image_dhash(photo), image_dhash(copy)) <= 4
+        assert hamming_distance(image_dhash(photo), image_dhash(other)) > 16
+        
+        lost = make_item('Blue backpack', 'lost', category_ids[0], 'blue backpack with laptop', 'library')
+        lost.image_hash = image_dhash(photo)
+        same_photo = make_item('Rucksack', 'found', category_ids[1], 'school bag found on a bench', 'cafeteria')
+        same_photo.image_hash = image_dhash(copy)
+        same_text = make_item('Blue backpack', 'found', category_ids[0], 'blue backpack with laptop', 'library')
+        same_text.image_hash = image_dhash(other)
+        
+        # Random hashes at every distance from the lost item's, to compare the index with a linear scan
+        rng = random.Random(3)
+        for distance in range(20):
+            for i in range(10):
+                item = make_item(f'Thing {distance}-{i}', 'found', category_ids[2])
+                item.image_hash = flip_bits(lost.image_hash, rng.sample(range(64), distance))
+        db.session.commit()
+        assert ItemImageHash.query.count() == 4 * Item.query.count()
+        
+        scan = sorted((item for item in Item.query.filter(Item.status == 'found', Item.image_hash.isnot(None))
+                       if hamming_distance(item.image_hash, lost.image_hash) <= 10),
+                      key=lambda item: (hamming_distance(item.image_hash, lost.image_hash), item.id))
+        similar = smart_matcher.similar_image_ids(lost, 'found')
+        assert similar == [item.id for item in scan] and same_photo.id in similar
+        assert same_text.id not in similar
+        
+        # Photo similarity is blended into the score and the vectorized bound still holds
+        matched = {m['item'].id: m['similarity'] for m in smart_matcher.find_matches(lost, threshold=0.0)}
+        assert same_photo.id in matched
+        text_only = smart_matcher.calculate_similarity(lost, same_text)
+        app.config['IMAGE_MATCH_WEIGHT'] = 0.0
+        try:
+            assert smart_matcher.calculate_similarity(lost, same_photo) < matched[same_photo.id]
+            assert smart_matcher.calculate_similarity(lost, same_text) > text_only
+        finally:
+            app.config['IMAGE_MATCH_WEIGHT'] = 0.15
+        candidates = Item.query.filter_by(status='found').all()
+        for candidate, bound in zip(candidates, smart_matcher.score_many(lost, candidates)):
+            assert bound >= smart_matcher.calculate_similarity(lost, candidate) - 1e-9
+        
+        # The index follows photo changes and deletes
+        same_photo.image_hash = image_dhash(other)
+        db.session.delete(Item.query.filter_by(title='Thing 0-0').one())
+        db.session.commit()
+        similar = smart_matcher.similar_image_ids(lost, 'found')
+        assert same_photo.id not in similar and len(similar) == len(scan) - 2
+
+
+def test_match_cache_is_invalidated_by_relevant_writes_only(clean_items):
+    with app.app_context():
+        match_cache.clear()
+        category_id = Category.query.first().id
+        lost = make_item('Black leather wallet', 'lost', category_id, 'wallet with student id card', 'library')
+        other_lost = make_item('Blue umbrella', 'lost', category_id, 'folding umbrella', 'cafeteria')
+        wallet = make_item('Black leather wallet', 'found', category_id, 'wallet with id card', 'library')
+        bottle = make_item('Water bottle', 'found', category_id, 'steel bottle', 'sports complex')
+        db.session.commit()
+        client = app.test_client()
+        
+        def poll():
+            before = match_cache.stats.copy()
+            ids = [m['id'] for m in client.get(f'/api/matches/{lost.id}').get_json()['matches']]
+            return ids, 'hit' if match_cache.stats['hits'] > before['hits'] else 'miss'
+        
+        assert poll() == ([wallet.id], 'miss')
+        assert poll() == ([wallet.id], 'hit')
+        
+        # Same-status items and columns matching does not read leave the entry alone
+        other_lost.title = 'Red umbrella'
+        bottle.contact_info = 'front desk'
+        db.session.commit()
+        assert poll() == ([wallet.id], 'hit')
+        
+        # Unapproving, approving and status changes of opposite-status items invalidate it
+        wallet.is_approved = False
+        db.session.commit()
+        assert poll() == ([], 'miss')
+        wallet.is_approved = True
+        db.session.commit()
+        assert poll() == ([wallet.id], 'miss')
+        bottle.status = 'claimed'
+        db.session.commit()
+        assert poll() == ([wallet.id], 'miss')
+        assert match_cache.stats['stale'] == 3
+        
+        # Stored rows (kept by the change hooks), invalidated when the rows change
+        run_pending_jobs()
+        app.config['MATCH_RESULTS_SOURCE'] = 'persisted'
+        try:
+            assert poll() == ([wallet.id], 'miss')
+            assert poll() == ([wallet.id], 'hit')
+            etag = client.get(f'/api/matches/{lost.id}').headers['ETag']
+            assert client.get(f'/api/matches/{lost.id}', headers={'If-None-Match': etag}).status_code == 304
+            db.session.delete(ItemMatch.query.filter(ItemMatch.item2_id.in_([wallet.id, lost.id])).one())
+            db.session.commit()
+            # A changed match moves the ETag on, so clients do not keep the old list
+            changed = client.get(f'/api/matches/{lost.id}', headers={'If-None-Match': etag})
+            assert changed.status_code == 200 and changed.get_json()['matches'] == []
+            assert poll() == ([], 'hit')
+        finally:
+            app.config['MATCH_RESULTS_SOURCE'] = 'recompute'
+        
+        # Bounded: the least recently used entry goes first
+        app.config['MATCH_CACHE_SIZE'] = 2
+        try:
+            for item in (lost, wallet, bottle):
+                client.get(f'/api/matches/{item.id}')
+            assert len(match_cache.entries) == 2 and match_cache.stats['evictions'] >= 1
+            assert poll()[1] == 'miss'
+        finally:
+            app.config['MATCH_CACHE_SIZE'] = 1024
+        match_cache.clear()
+
+
+def test_full_rematch_resumes_and_equals_per_item_matching(clean_items):
+    with app.app_context():
+        build_corpus(120, seed=3)
+        BackgroundJob.query.delete()  # Matching is recomputed below
+        RematchRun.query.delete()
+        db.session.commit()
+        reconcile_counters()  # Bulk deletes bypass the session
+        lost = Item.query.filter_by(status='lost').order_by(Item.id).all()
+        expected = {(item.id, m['item'].id): round(m['similarity'], 9)
+                    for item in lost for m in smart_matcher.find_matches(item, use_index=False)}
+        claimed = Item.query.filter_by(status='found').first()
+        db.session.add(ItemMatch(item1_id=claimed.id, item2_id=claimed.id, similarity_score=0.7, match_type='similar'))
+        db.session.commit()
+        
+        # Interrupted after two chunks, then resumed with a pool
+        first = rematch_all(workers=1, chunk_size=10, max_chunks=2)
+        assert first['lost'] == 20 and not first['complete']
+        run = db.session.get(RematchRun, first['run_id'])
+        assert run.status == 'running' and run.last_item_id == lost[19].id
+        second = rematch_all(workers=2, chunk_size=10)
+        assert second['run_id'] == first['run_id'] and second['resumed_after'] == lost[19].id
+        assert second['lost'] == len(lost) - 20 and second['complete']
+        assert first['pairs'] + second['pairs'] == len(lost) * Item.query.filter_by(status='found').count()
+        
+        stored = {(m.item1_id, m.item2_id): round(m.similarity_score, 9) for m in ItemMatch.query.all()}
+        assert stored == expected  # The stray pair between two found items is gone too
+        db.session.expire_all()
+        assert db.session.get(RematchRun, first['run_id']).status == 'done'
+        assert reconcile_counters(fix=False) == {}
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Migration Tests for Found-It App
+Upgrades a database in the shape of an early release and checks nothing is lost.
+"""
+
+import json
+import os
+
+from sqlalchemy import create_engine, inspect
+
+from conftest import TEST_DATA_DIR
+from migrate_db import MIGRATIONS, migrate_database
+
+
+def legacy_engine(name):
+    """A database with the early item table, including a NOT NULL column the models have dropped"""
+    path = os.path.join(TEST_DATA_DIR, name)
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f'sqlite:///{path}')
+    with engine.begin() as connection:
+        connection.exec_driver_sql('CREATE TABLE category (id INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, '
+                                   'description TEXT, icon VARCHAR(50), color VARCHAR(7))')
+        connection.exec_driver_sql('CREATE TABLE item (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, '
+                                   'description TEXT, category_id INTEGER NOT NULL, status VARCHAR(20), '
+                                   'location VARCHAR(200), user_id INTEGER NOT NULL, is_approved BOOLEAN, '
+                                   'created_at DATETIME, updated_at DATETIME)')
+        connection.exec_driver_sql('CREATE TABLE notification (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, '
+                                   'title VARCHAR(200) NOT NULL, message TEXT NOT NULL, created_at DATETIME)')
+        connection.exec_driver_sql("INSERT INTO category (id, name) VALUES (1, 'Electronics')")
+        for i in range(1, 1201):
+            connection.exec_driver_sql(
+                'INSERT INTO item (id, title, category_id, status, location, user_id, is_approved, created_at) '
+                "VALUES (?, ?, 1, ?, 'library', 1, 1, '2024-01-01 10:00:00')",
+                (i, f'Item {i}', 'lost' if i % 2 else 'found')
+            )
+        connection.exec_driver_sql("INSERT INTO notification (user_id, title, message) VALUES (1, 'Hi', 'Hello')")
+    return engine
+
+
+def test_legacy_database_is_upgraded_in_place():
+    engine = legacy_engine('legacy.db')
+    applied = migrate_database(engine)
+    assert applied == [version for version, name, apply in MIGRATIONS]
+
+    inspector = inspect(engine)
+    item_columns = {c['name'] for c in inspector.get_columns('item')}
+    assert 'user_id' not in item_columns and {'keywords', 'claimed_at', 'brand'} <= item_columns
+    assert 'is_read' in {c['name'] for c in inspector.get_columns('notification')}
+    assert 'ix_item_public_listing' in {i['name'] for i in inspector.get_indexes('item')}
+    assert 'ix_notification_user_read' in {i['name'] for i in inspector.get_indexes('notification')}
+
+    with engine.begin() as connection:
+        assert connection.exec_driver_sql('SELECT count(*) FROM item').scalar() == 1200
+        assert connection.exec_driver_sql("SELECT title FROM item WHERE id = 1200").scalar() == 'Item 1200'
+        assert connection.exec_driver_sql('SELECT count(*) FROM notification').scalar() == 1
+        plans = json.loads(connection.exec_driver_sql(
+            'SELECT query_plans FROM schema_migration WHERE version = 2').scalar())
+    home = plans['home_recent_items']
+    assert home['before'] == ['SCAN item', 'USE TEMP B-TREE FOR ORDER BY']
+    assert home['after'] != home['before'] and all('INDEX' in step for step in home['after'])
+    unread = plans['user_unread_notifications']
+    assert unread['before'] == ['SCAN notification'] and 'ix_notification_user_read' in unread['after'][0]
+
+    # A second run has nothing to do
+    assert migrate_database(engine) == []
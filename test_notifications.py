@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Notification Tests for Found-It App
+Checks bulk fan-out to admins, digest mode and pruning of read notifications.
+"""
+
+from datetime import datetime, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app import (app, db, Notification, User, StatCounter, add_notifications, add_admin_event, prune_notifications,
+                 reconcile_counters, write_queue)
+
+
+def add_admins(count):
+    for i in range(count):
+        db.session.add(User(username=f'extra_admin_{i}', email=f'extra_admin_{i}@example.com',
+                            password_hash=generate_password_hash('secret'), role='admin'))
+    db.session.commit()
+    return User.query.filter_by(role='admin').count()
+
+
+def test_bulk_notifications_use_one_statement(clean_notifications):
+    with app.app_context():
+        admins = add_admins(5)
+        statements = []
+
+        def callback(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        db.event.listen(db.engine, 'before_cursor_execute', callback)
+        try:
+            written = write_queue.submit(add_admin_event, 'New Match Found - Wallet', 'Found 2 potential match(es)',
+                                         'match', wait=True)
+        finally:
+            db.event.remove(db.engine, 'before_cursor_execute', callback)
+        assert written == admins == Notification.query.filter_by(type='match').count()
+        assert len([s for s in statements if s.startswith('INSERT INTO notification')]) == 1
+
+        ids = [user.id for user in User.query.filter_by(role='user').limit(2)] + [User.query.first().id]
+        assert write_queue.submit(add_notifications, ids, 'Hello', 'Welcome', wait=True) == len(ids)
+        assert reconcile_counters(fix=False) == {}  # Counters kept in step without the flush listener
+
+
+def test_digest_mode_folds_events_per_admin(clean_notifications):
+    with app.app_context():
+        admins = add_admins(2)
+        app.config['NOTIFICATION_DIGEST_WINDOW'] = 3600
+        try:
+            for i in range(3):
+                write_queue.submit(add_admin_event, f'New Item Claim - Item {i}', 'Please review the claim.', 'alert', wait=True)
+            digests = Notification.query.all()
+            assert len(digests) == admins
+            assert {(n.event_count, n.title) for n in digests} == {(3, 'Activity digest - 3 new events')}
+            assert digests[0].message.startswith('New Item Claim - Item 2')  # Newest first
+
+            # Reading a digest closes it; so does the end of the window
+            digests[0].is_read = True
+            digests[1].created_at = datetime.utcnow() - timedelta(hours=2)
+            db.session.commit()
+            write_queue.submit(add_admin_event, 'New Item Claim - Item 3', 'Please review the claim.', 'alert', wait=True)
+            open_digests = Notification.query.filter_by(event_count=1).all()
+            assert len(open_digests) == 2 and {n.user_id for n in open_digests} == {digests[0].user_id, digests[1].user_id}
+            assert Notification.query.filter_by(event_count=4).count() == admins - 2
+        finally:
+            app.config['NOTIFICATION_DIGEST_WINDOW'] = 0
+        assert reconcile_counters(fix=False) == {}
+
+
+def test_prune_deletes_old_read_notifications_in_batches(clean_notifications):
+    with app.app_context():
+        user_id = User.query.first().id
+        old = datetime.utcnow() - timedelta(days=45)
+        for i in range(1200):
+            db.session.add(Notification(user_id=user_id, title=f'Old {i}', message='read', is_read=True, created_at=old))
+        db.session.add(Notification(user_id=user_id, title='Old unread', message='kept', created_at=old))
+        db.session.add(Notification(user_id=user_id, title='New read', message='kept', is_read=True))
+        db.session.commit()
+
+        commits = []
+
+        def callback(session):
+            commits.append(session)
+
+        db.event.listen(db.session, 'after_commit', callback)
+        try:
+            assert prune_notifications(batch_size=500) == 1200
+        finally:
+            db.event.remove(db.session, 'after_commit', callback)
+        assert len(commits) == 3
+        assert sorted(n.title for n in Notification.query) == ['New read', 'Old unread']
+        assert reconcile_counters(fix=False) == {}
+        assert db.session.get(StatCounter, 'notifications.total').value == 2
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Page Rendering Tests for Found-It App
+Checks that public pages stay cheap to render as the catalogue grows.
+"""
+
+import gzip
+import os
+import re
+from datetime import datetime
+
+from app import (app, db, Analytics, Category, Item, run_periodic_tasks, SystemInfo, system_info_cache, sqlite_settings,
+                 precompress_static, StatCounter)
+
+
+def add_items(count, status='found'):
+    category_ids = [c.id for c in Category.query.order_by(Category.id)]
+    for i in range(count):
+        db.session.add(Item(title=f'Item {i}', description='test item', status=status,
+                            category_id=category_ids[i % len(category_ids)], is_approved=True))
+    db.session.commit()
+
+
+def test_items_page_query_count_is_constant(clean_items, query_counter):
+    with app.app_context():
+        client = app.test_client()
+        add_items(5)
+        client.get('/items')  # Warm up
+        with query_counter() as small:
+            assert client.get('/items').status_code == 200
+        
+        add_items(120)
+        with query_counter() as large:
+            assert client.get('/items').status_code == 200
+        with query_counter() as later_page:
+            assert client.get('/items?page=3').status_code == 200
+        assert small.count == large.count == later_page.count
+
+
+def test_items_pagination_and_category_counts(clean_items):
+    with app.app_context():
+        add_items(30)
+        add_items(4, status='claimed')  # Not public, so not counted
+        client = app.test_client()
+        
+        first = client.get('/items?per_page=12').get_data(as_text=True)
+        assert first.count('class="card h-100') == 12
+        assert 'per_page=12' in first and 'page=3' in first
+        last = client.get('/items?per_page=12&page=3').get_data(as_text=True)
+        assert last.count('class="card h-100') == 6
+        
+        first_category = Category.query.order_by(Category.id).first()
+        expected = Item.query.filter_by(category_id=first_category.id, status='found').count()
+        html = client.get(f'/items?category={first_category.id}').get_data(as_text=True)
+        assert f'rounded-pill float-end">{expected}</span>' in html
+
+
+def test_home_page_is_read_only(clean_items, query_counter):
+    with app.app_context():
+        add_items(12)
+        Analytics.query.delete()
+        db.session.commit()
+        client = app.test_client()
+        client.get('/')  # Warm up
+        with query_counter() as home_small:
+            assert client.get('/').status_code == 200
+        writes = [s for s in home_small.statements if s.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        assert writes == []
+        assert Analytics.query.count() == 0
+        
+        add_items(40)
+        with query_counter() as home_large:
+            client.get('/')
+        assert home_small.count == home_large.count
+        
+        # Snapshots come from the background worker's periodic task instead
+        assert 'analytics_snapshot' in run_periodic_tasks(force=True)
+        snapshot = Analytics.query.filter_by(date=datetime.now().date()).one()
+        assert snapshot.found_items == 52
+
+
+def test_system_info_is_cached(query_counter):
+    # Requests run outside the test's app context so each gets its own flask.g, like in production
+    client = app.test_client()
+    client.get('/')  # Warm up, syncing the snapshot with version.settings
+    with app.app_context(), query_counter() as warm:
+        for path in ('/', '/about', '/contact', '/items'):
+            assert client.get(path).status_code == 200
+    assert not [s for s in warm.statements if 'system_info' in s]
+    
+    # A save in another worker only bumps the row; the TTL check picks it up
+    with app.app_context():
+        original = SystemInfo.query.first().site_name
+        db.session.execute(SystemInfo.__table__.update().values(site_name='Lost Property Office',
+                                                                 updated_at=datetime.utcnow()))
+        db.session.commit()
+    assert 'Lost Property Office' not in client.get('/about').get_data(as_text=True)
+    system_info_cache.checked_at = 0  # Let the TTL expire
+    assert 'Lost Property Office' in client.get('/about').get_data(as_text=True)
+    
+    # A missing row falls back to defaults without writing during a GET
+    with app.app_context():
+        db.session.execute(SystemInfo.__table__.delete())
+        db.session.commit()
+    system_info_cache.invalidate()
+    with app.app_context(), query_counter() as missing:
+        assert 'FOUND IT' in client.get('/about').get_data(as_text=True)
+    assert not [s for s in missing.statements if s.lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))]
+    
+    with app.app_context():
+        db.session.execute(SystemInfo.__table__.insert().values(site_name=original, about_content='About us',
+                                                                 updated_at=datetime.utcnow()))
+        db.session.commit()
+    system_info_cache.invalidate()
+
+def test_page_etag_follows_settings_saved_in_another_worker():
+    client = app.test_client()
+    etag = client.get('/').headers['ETag']
+    with app.app_context():
+        # Saved through the ORM like another worker would: version.settings moves, this process's cache is not told
+        info = SystemInfo.query.first()
+        original, info.site_name = info.site_name, 'Lost Property Office'
+        db.session.commit()
+    try:
+        changed = client.get('/', headers={'If-None-Match': etag})
+        assert changed.status_code == 200 and 'Lost Property Office' in changed.get_data(as_text=True)
+        assert client.get('/', headers={'If-None-Match': changed.headers['ETag']}).status_code == 304
+    finally:
+        with app.app_context():
+            SystemInfo.query.first().site_name = original
+            db.session.commit()
+        system_info_cache.invalidate()
+
+
+def test_sqlite_profile_and_diagnostics_page(admin_client):
+    with app.app_context():
+        settings = sqlite_settings()
+        assert settings['journal_mode'] == 'wal'
+        assert settings['busy_timeout'] == 5000
+        assert settings['synchronous'] == 1  # NORMAL
+    client = admin_client
+    html = client.get('/admin/diagnostics').get_data(as_text=True)
+    assert 'SQLite Profile' in html and '<code>journal_mode</code>' in html and 'found_it.db-wal' in html
+
+
+def static_urls(html):
+    """Every /static/ URL a browser would fetch for a page"""
+    urls = re.findall(r'(?:href|src)="(/static/[^"]+)"', html)
+    for srcset in re.findall(r'srcset="([^"]+)"', html):
+        urls.extend(candidate.split()[0] for candidate in srcset.split(','))
+    return {url.replace('&amp;', '&') for url in urls}
+
+
+def test_repeat_page_load_makes_no_static_requests(clean_items):
+    with app.app_context():
+        add_items(3)
+        precompress_static()
+    client = app.test_client()
+    cache = {}  # url -> Cache-Control of the stored response, like a browser's HTTP cache
+
+    def load(path):
+        requests = 0
+        html = client.get(path).get_data(as_text=True)
+        for url in static_urls(html):
+            cached = cache.get(url, '')
+            if 'immutable' in cached and 'max-age=31536000' in cached:
+                continue  # Fresh and never revalidated
+            requests += 1
+            response = client.get(url, headers={'Accept-Encoding': 'gzip, deflate, br'})
+            assert response.status_code == 200
+            cache[url] = response.headers.get('Cache-Control', '')
+        return requests
+
+    assert load('/') > 0
+    assert '/static/css/style.css?v=' in ' '.join(cache)
+    for path in ('/', '/items', '/about'):
+        assert load(path) == 0
+
+    # Precompressed copy for clients that accept it, the plain file otherwise
+    url = next(url for url in cache if url.startswith('/static/css/style.css'))
+    with open(os.path.join(app.static_folder, 'css', 'style.css'), 'rb') as f:
+        original = f.read()
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip' and response.headers['Content-Type'].startswith('text/css')
+    assert gzip.decompress(response.data) == original and 'Accept-Encoding' in response.headers['Vary']
+    response = client.get(url)
+    assert 'Content-Encoding' not in response.headers and response.data == original
+
+    # A stale or missing fingerprint is served but not cached forever
+    for stale in ('/static/css/style.css?v=0123456789ab', '/static/css/style.css'):
+        assert 'immutable' not in client.get(stale).headers.get('Cache-Control', '')
+
+
+def test_unchanged_polls_get_304_after_one_query(clean_items, query_counter):
+    with app.app_context():
+        add_items(5)
+        item_id = Item.query.first().id
+    client = app.test_client()
+    for path in ('/api/search?q=Item', f'/api/matches/{item_id}', '/', '/items?page=1'):
+        first = client.get(path)
+        assert first.status_code == 200 and first.headers['ETag']
+        with app.app_context(), query_counter() as poll:
+            repeat = client.get(path, headers={'If-None-Match': first.headers['ETag']})
+        assert repeat.status_code == 304 and repeat.data == b'' and repeat.headers['ETag'] == first.headers['ETag']
+        assert poll.count <= 1 and 'stat_counter' in poll.statements[0]
+    
+    # Any write to the items moves the ETag on
+    etag = client.get('/api/search?q=Item').headers['ETag']
+    with app.app_context():
+        Item.query.first().title = 'Item renamed'
+        db.session.commit()
+    changed = client.get('/api/search?q=Item', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+    
+    # Last-Modified is offered once the newest write is a second old, and If-Modified-Since works on its own
+    with app.app_context():
+        StatCounter.query.filter(StatCounter.name.startswith('version.')).update(
+            {'value': StatCounter.value - 5000}, synchronize_session=False)
+        db.session.commit()
+    response = client.get('/api/search?q=Item')
+    with app.app_context(), query_counter() as poll:
+        repeat = client.get('/api/search?q=Item', headers={'If-Modified-Since': response.headers['Last-Modified']})
+    assert repeat.status_code == 304 and poll.count == 1
+    
+    # Pages depend on who is logged in, so a login never reuses the anonymous copy
+    etag = client.get('/').headers['ETag']
+    client.post('/login', data={'username': 'admin', 'password': 'admin123'})
+    client.get('/about')  # Shows the login flash message
+    assert client.get('/', headers={'If-None-Match': etag}).status_code == 200
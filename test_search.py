@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Search Tests for Found-It App
+Checks the full-text search backend and its LIKE fallback.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+from app import app, db, Category, Item
+
+
+def add_items():
+    electronics, documents = [c.id for c in Category.query.order_by(Category.id).limit(2)]
+    items = [
+        Item(title='Samsung Galaxy phone', description='black phone with blue case', category_id=electronics,
+             status='found', location='Main library', brand='Samsung', is_approved=True),
+        Item(title='Student ID card', description='found near the samsung stand at the fair', category_id=documents,
+             status='found', location='Senate building', is_approved=True),
+        Item(title='HP laptop', description='silver laptop in a black bag', category_id=electronics,
+             status='lost', location='Computer centre', brand='HP', color='silver', is_approved=True),
+    ]
+    db.session.add_all(items)
+    db.session.commit()
+    return items
+
+
+def search_titles(client, **params):
+    response = client.get('/api/search', query_string=params)
+    assert response.status_code == 200
+    return [item['title'] for item in response.get_json()['items']]
+
+
+def test_fts_prefix_relevance_and_sync(clean_items):
+    with app.app_context():
+        assert app.config['FTS_AVAILABLE']
+        phone, card, laptop = add_items()
+        client = app.test_client()
+        
+        # Prefix queries, all words must match
+        assert set(search_titles(client, q='sams')) == {'Samsung Galaxy phone', 'Student ID card'}
+        assert search_titles(client, q='black lap') == ['HP laptop']
+        
+        # A title hit outranks a description hit
+        assert search_titles(client, q='samsung', sort='relevance') == ['Samsung Galaxy phone', 'Student ID card']
+        
+        # Filters still apply on top of the search
+        assert search_titles(client, q='samsung', category=card.category_id) == ['Student ID card']
+        
+        # Triggers keep the index in sync with edits and deletes
+        laptop.title = 'Dell laptop'
+        db.session.commit()
+        assert search_titles(client, q='dell') == ['Dell laptop']
+        assert search_titles(client, q='laptop') == ['Dell laptop']
+        db.session.delete(phone)
+        db.session.commit()
+        assert search_titles(client, q='galaxy') == []
+
+
+def test_like_fallback_matches_substrings(clean_items):
+    with app.app_context():
+        add_items()
+        app.config['SEARCH_BACKEND'] = 'like'
+        try:
+            client = app.test_client()
+            assert set(search_titles(client, q='amsun')) == {'Samsung Galaxy phone', 'Student ID card'}
+            assert search_titles(client, q='samsung', sort='relevance')[0] == 'Student ID card'  # newest first
+            response = client.get('/items', query_string={'search': 'laptop'})
+            assert b'HP laptop' in response.data
+        finally:
+            app.config['SEARCH_BACKEND'] = 'fts'
+
+
+def add_phone_items(count):
+    category_ids = [c.id for c in Category.query.order_by(Category.id)]
+    now = datetime.utcnow()
+    for i in range(count):
+        # Pairs of items share a timestamp so the id tie-breaker is exercised
+        db.session.add(Item(title=f'Phone {i}', description='phone ' * (1 + i % 3), status='found',
+                            category_id=category_ids[i % len(category_ids)], is_approved=True,
+                            created_at=now - timedelta(minutes=i // 2)))
+    db.session.commit()
+
+
+def collect_pages(client, **params):
+    pages, cursor = [], None
+    while True:
+        query = dict(params, cursor=cursor) if cursor else params
+        data = client.get('/api/search', query_string=query).get_json()
+        pages.append([item['id'] for item in data['items']])
+        cursor = data['next_cursor']
+        if not cursor:
+            return pages
+
+
+def test_keyset_pagination_and_streaming(clean_items):
+    with app.app_context():
+        add_phone_items(11)
+        client = app.test_client()
+        full = [item['id'] for item in client.get('/api/search', query_string={'limit': 100}).get_json()['items']]
+        assert len(full) == 11
+        
+        pages = collect_pages(client, limit=4)
+        assert [len(page) for page in pages] == [4, 4, 3]
+        assert sum(pages, []) == full
+        
+        relevance_full = [item['id'] for item in client.get(
+            '/api/search', query_string={'q': 'phone', 'sort': 'relevance', 'limit': 100}).get_json()['items']]
+        assert sum(collect_pages(client, q='phone', sort='relevance', limit=3), []) == relevance_full
+        
+        response = client.get('/api/search', query_string={'format': 'ndjson'})
+        assert response.mimetype == 'application/x-ndjson'
+        assert [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()] == full
+        
+        assert client.get('/api/search', query_string={'cursor': 'not-a-cursor'}).status_code == 400
+        newest_cursor = client.get('/api/search', query_string={'limit': 2}).get_json()['next_cursor']
+        assert client.get('/api/search', query_string={'q': 'phone', 'sort': 'relevance',
+                                                       'cursor': newest_cursor}).status_code == 400
+
+
+def test_search_categories_are_eager_loaded(clean_items, query_counter):
+    with app.app_context():
+        add_phone_items(3)
+        client = app.test_client()
+        with query_counter() as small:
+            client.get('/api/search', query_string={'limit': 100})
+        add_phone_items(30)
+        with query_counter() as large:
+            client.get('/api/search', query_string={'limit': 100})
+        assert small.count == large.count
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Write Queue Tests for Found-It App
+Checks that writes submitted by concurrent callers share group commits.
+"""
+
+import threading
+
+from app import app, db, Notification, User, add_notification, write_queue
+
+
+def failing_unit(session):
+    raise ValueError('bad unit')
+
+
+def test_concurrent_writes_share_commits(clean_notifications):
+    with app.app_context():
+        admin_id = User.query.filter_by(role='admin').first().id
+        before = write_queue.stats.copy()
+        futures = []
+
+        def submit_many():
+            for i in range(25):
+                futures.append(write_queue.submit(add_notification, admin_id, f'Note {i}', 'group commit test'))
+
+        threads = [threading.Thread(target=submit_many) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        ids = [future.result(timeout=10) for future in futures]
+
+        assert len(set(ids)) == 100
+        assert Notification.query.count() == 100
+        units = write_queue.stats['units'] - before['units']
+        commits = write_queue.stats['commits'] - before['commits']
+        assert units == 100 and commits < units
+
+
+def test_failing_unit_only_fails_its_caller(clean_notifications):
+    with app.app_context():
+        admin_id = User.query.filter_by(role='admin').first().id
+        app.config['WRITE_BATCH_WINDOW'] = 0.2  # Make sure all three land in one batch
+        try:
+            good = write_queue.submit(add_notification, admin_id, 'Before', 'kept')
+            bad = write_queue.submit(failing_unit)
+            later = write_queue.submit(add_notification, admin_id, 'After', 'kept')
+            assert good.result(timeout=10) and later.result(timeout=10)
+            assert isinstance(bad.exception(timeout=10), ValueError)
+        finally:
+            app.config['WRITE_BATCH_WINDOW'] = 0.005
+        assert Notification.query.count() == 2
+
+
+def test_direct_mode_commits_inline(clean_notifications):
+    with app.app_context():
+        admin_id = User.query.filter_by(role='admin').first().id
+        app.config['WRITE_QUEUE_MODE'] = 'direct'
+        try:
+            notification_id = write_queue.submit(add_notification, admin_id, 'Inline', 'direct mode', wait=True)
+            assert db.session.get(Notification, notification_id).title == 'Inline'
+            try:
+                write_queue.submit(failing_unit, wait=True)
+                assert False, 'expected the unit error to propagate'
+            except ValueError:
+                pass
+        finally:
+            app.config['WRITE_QUEUE_MODE'] = 'group'
@@ -1,13 +1,7 @@
-from app import app
+from app import create_app
 
-# Ensure database is properly initialized
-with app.app_context():
-    try:
-        from app import db
-        db.create_all()
-        print("✅ Database tables created successfully in wsgi!")
-    except Exception as e:
-        print(f"❌ Database initialization error in wsgi: {e}")
+# The database is set up once per deploy ('flask init-db' and 'flask seed'), not in every worker
+app = create_app()
 
 if __name__ == "__main__":
-    app.run() 
\ No newline at end of file
+    app.run() 